@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, questions, practice, exams
+from app.api.v1.endpoints import auth, questions, practice, exams, metrics
 
 api_router = APIRouter()
 
@@ -7,4 +7,5 @@ api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(questions.router, prefix="/questions", tags=["questions"])
 api_router.include_router(practice.router, prefix="/practice", tags=["practice"])
-api_router.include_router(exams.router, prefix="/exams", tags=["exams"])
\ No newline at end of file
+api_router.include_router(exams.router, prefix="/exams", tags=["exams"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
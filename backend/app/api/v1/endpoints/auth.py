@@ -12,7 +12,7 @@ from app.models.auth import (
     DeviceRegistrationRequest,
     GoogleAuthRequest
 )
-from app.core.exceptions import AuthenticationError, ValidationError, ConflictError
+from app.core.exceptions import AuthenticationError, ConflictError, DatabaseUnavailableError, ValidationError
 from app.core.security import generate_device_fingerprint
 
 router = APIRouter()
@@ -59,6 +59,8 @@ async def register_user(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Registration failed: {e}")
         raise HTTPException(
@@ -99,6 +101,8 @@ async def login(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e)
         )
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Login failed: {e}")
         raise HTTPException(
@@ -130,6 +134,8 @@ async def anonymous_login(
             user=UserResponse(**user)
         )
         
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Anonymous login failed: {e}")
         raise HTTPException(
@@ -170,6 +176,8 @@ async def get_current_user(token: str = Depends(security)):
         
         return UserResponse(**user)
         
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Get current user failed: {e}")
         raise HTTPException(
@@ -219,6 +227,8 @@ async def register_device(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Device registration failed: {e}")
         raise HTTPException(
@@ -268,6 +278,8 @@ async def google_auth(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e)
         )
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Google authentication failed: {e}")
         raise HTTPException(
@@ -1,15 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.security import HTTPBearer
 from typing import Dict, Any, List
 import logging
+import math
 
+from app.core.exam_blueprints import check_time_minutes, get_blueprint, validate_blueprint
+from app.core.exceptions import ConflictError, DatabaseUnavailableError, NotFoundError, ValidationError
+from app.models.exam import ExamSubmissionRequest
 from app.services.auth_service import auth_service
+from app.services.exam_assembly import exam_assembler
+from app.services.exam_paper_pool import exam_paper_pool
+from app.services.exam_session_service import exam_session_service
+from app.services.grading_service import grading_service
 from app.services.question_service import question_service
 
 router = APIRouter()
 security = HTTPBearer(auto_error=False)
 logger = logging.getLogger(__name__)
 
+# Time allowed per sprint question when the client does not set a limit
+SPRINT_MINUTES_PER_QUESTION = 1.5
+
 async def get_current_user_dependency(token: str = Depends(security)):
     """Get current user from token"""
     if not token:
@@ -43,26 +54,43 @@ async def create_sprint_exam(
                 detail="Exam type is required"
             )
         
-        if question_count < 5 or question_count > 50:
+        if not isinstance(question_count, int) or isinstance(question_count, bool) or not 5 <= question_count <= 50:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Question count must be between 5 and 50"
             )
         
+        # The client may shorten a sprint, not lengthen it
+        default_minutes = question_count * SPRINT_MINUTES_PER_QUESTION
+        time_minutes = exam_config.get("time_minutes")
+        if time_minutes is not None:
+            time_minutes = check_time_minutes(time_minutes, math.ceil(default_minutes))
+        
         questions = await question_service.get_questions_for_exam(
             exam_type=exam_type,
             question_count=question_count,
             arde_priority=exam_config.get("arde_priority", True)
         )
         
-        return {
-            "exam_id": f"sprint_{current_user['id']}_{exam_type}",
-            "questions": questions,
-            "exam_config": exam_config
-        }
+        session = await exam_session_service.create_session(
+            user_id=current_user["id"],
+            kind="sprint",
+            exam_type=exam_type,
+            question_ids=[question["id"] for question in questions],
+            time_minutes=time_minutes or default_minutes,
+            details={"exam_config": exam_config}
+        )
+        return await _session_start(session)
         
     except HTTPException:
         raise
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Failed to create sprint exam: {e}")
         raise HTTPException(
@@ -85,38 +113,54 @@ async def create_simulated_exam(
                 detail="Exam type is required"
             )
         
-        # Define official exam patterns
-        exam_patterns = {
-            "ECAT": {"question_count": 100, "time_minutes": 100},
-            "MCAT": {"question_count": 200, "time_minutes": 150},
-            "CCAT": {"question_count": 80, "time_minutes": 90},
-            "SAT": {"question_count": 154, "time_minutes": 180},
-            "GMAT": {"question_count": 80, "time_minutes": 210},
-            "GRE": {"question_count": 80, "time_minutes": 180}
-        }
-        
-        pattern = exam_patterns.get(exam_type)
+        # Official exam pattern, optionally overridden by a custom blueprint
+        pattern = get_blueprint(exam_type)
         if not pattern:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Unsupported exam type"
             )
+        custom = exam_config.get("blueprint")
+        if custom:
+            if isinstance(custom, dict):
+                custom = {"time_minutes": pattern["time_minutes"], **custom}
+            # A custom paper may be shorter than the official time, never longer
+            pattern = validate_blueprint(custom, max_time_minutes=pattern["time_minutes"])
         
-        questions = await question_service.get_questions_for_exam(
-            exam_type=exam_type,
-            question_count=pattern["question_count"],
-            arde_priority=True
-        )
-        
-        return {
-            "exam_id": f"sre_{current_user['id']}_{exam_type}",
-            "questions": questions,
+        details = {
             "exam_pattern": pattern,
             "instructions": f"This simulates the actual {exam_type} exam pattern"
         }
         
+        # Official patterns are served from the pre-assembled pool when possible
+        paper = None if custom else await exam_paper_pool.checkout(exam_type, current_user["id"])
+        if paper is None:
+            assembly = await exam_assembler.assemble(exam_type, pattern)
+            questions = assembly["questions"]
+            details["assembly"] = {"strata": assembly["strata"], "shortfall": assembly["shortfall"]}
+        else:
+            questions = paper["questions"]
+        
+        session = await exam_session_service.create_session(
+            user_id=current_user["id"],
+            kind="sre",
+            exam_type=exam_type,
+            question_ids=[question["id"] for question in questions],
+            time_minutes=pattern["time_minutes"],
+            paper_id=paper["paper_id"] if paper else None,
+            details=details
+        )
+        return await _session_start(session)
+        
     except HTTPException:
         raise
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Failed to create simulated exam: {e}")
         raise HTTPException(
@@ -124,6 +168,102 @@ async def create_simulated_exam(
             detail="Failed to create simulated exam"
         )
 
+async def _session_start(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Response for a new session: its summary and the first page of questions"""
+    page = await exam_session_service.page(session)
+    return {
+        "exam_id": session["id"],
+        "session": exam_session_service.summary(session),
+        "questions": page["items"],
+        "next_offset": page["next_offset"]
+    }
+
+@router.get("/sessions/{session_id}")
+async def get_exam_session(
+    session_id: str,
+    current_user = Depends(get_current_user_dependency)
+):
+    """Get an exam session (to resume it)"""
+    try:
+        session = await exam_session_service.get_session(session_id, current_user["id"])
+        return exam_session_service.summary(session)
+        
+    except NotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get exam session: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve exam session"
+        )
+
+@router.get("/sessions/{session_id}/questions")
+async def get_exam_session_questions(
+    session_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user = Depends(get_current_user_dependency)
+):
+    """Get a page of an exam session's questions, in paper order"""
+    try:
+        return await exam_session_service.get_questions(session_id, current_user["id"], offset, limit)
+        
+    except NotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get exam session questions: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve questions"
+        )
+
+@router.get("/sessions/{session_id}/questions/{position}")
+async def get_exam_session_question(
+    session_id: str,
+    position: int,
+    current_user = Depends(get_current_user_dependency)
+):
+    """Get one question of an exam session by its position"""
+    try:
+        page = await exam_session_service.get_questions(session_id, current_user["id"], position, 1)
+        if not page["items"]:
+            raise NotFoundError("Question is no longer available")
+        return page["items"][0]
+        
+    except NotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get exam session question: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve question"
+        )
+
 @router.get("/results")
 async def get_exam_results(
     current_user = Depends(get_current_user_dependency)
@@ -134,9 +274,46 @@ async def get_exam_results(
 
 @router.post("/submit")
 async def submit_exam(
-    exam_data: Dict[str, Any],
+    submission: ExamSubmissionRequest,
     current_user = Depends(get_current_user_dependency)
 ):
     """Submit exam for grading"""
-    # TODO: Implement exam submission and grading
-    return {"message": "Exam submission endpoint - to be implemented"}
\ No newline at end of file
+    try:
+        # Only papers the server handed out are graded, never a client-sent question list
+        session = await exam_session_service.begin_grading(submission.exam_id, current_user["id"])
+        submission_data = {
+            **submission.dict(),
+            "question_ids": session["question_ids"],
+            "exam_type": session["exam_type"]
+        }
+        try:
+            result = await grading_service.grade_submission(current_user["id"], submission_data)
+        except Exception:
+            await exam_session_service.release(session["id"], session["grading_claim"])
+            raise
+        await exam_session_service.complete(session["id"], session["grading_claim"], result["id"])
+        return result
+        
+    except ConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except NotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to grade exam: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to grade exam"
+        )
\ No newline at end of file
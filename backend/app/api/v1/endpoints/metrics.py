@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse
+from fastapi.security import HTTPBearer
+import logging
+
+from app.core.config import settings
+from app.core.database import db
+from app.core.db_metrics import db_metrics
+from app.core.query_shapes import build_manifest, query_shapes
+from app.services.attempt_ingestion import attempt_queue
+from app.services.auth_service import auth_service
+from app.services.exam_paper_pool import exam_paper_pool
+from app.services.question_index import question_index
+from app.services.question_service import question_service
+
+security = HTTPBearer(auto_error=False)
+logger = logging.getLogger(__name__)
+
+async def require_admin(token: str = Depends(security)):
+    """Metrics expose collection names, query shapes and traffic: admins only"""
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token required"
+        )
+    
+    user = await auth_service.get_current_user(token.credentials)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+    
+    if not user.get("is_admin", False):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    
+    return user
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/cache")
+async def cache_metrics():
+    if not settings.ENABLE_METRICS or db.cache is None:
+        return JSONResponse(status_code=404, content={"detail": "Cache metrics disabled"})
+    return db.cache.stats()
+
+@router.get("/db")
+async def database_metrics():
+    if not settings.ENABLE_METRICS:
+        return JSONResponse(status_code=404, content={"detail": "Database metrics disabled"})
+    snapshot = db_metrics.snapshot()
+    if db.breaker is not None:
+        snapshot["circuit_breaker"] = db.breaker.stats()
+    return snapshot
+
+@router.get("/query-shapes")
+async def query_shape_metrics():
+    if not settings.ENABLE_METRICS:
+        return JSONResponse(status_code=404, content={"detail": "Query shape metrics disabled"})
+    shapes = query_shapes.shapes()
+    return {"shapes": shapes, **build_manifest(shapes)}
+
+@router.get("/attempts")
+async def attempt_metrics():
+    if not settings.ENABLE_METRICS:
+        return JSONResponse(status_code=404, content={"detail": "Attempt metrics disabled"})
+    return attempt_queue.stats()
+
+@router.get("/exam-papers")
+async def exam_paper_metrics():
+    if not settings.ENABLE_METRICS:
+        return JSONResponse(status_code=404, content={"detail": "Exam paper metrics disabled"})
+    return exam_paper_pool.stats()
+
+@router.get("/questions")
+async def question_metrics():
+    if not settings.ENABLE_METRICS:
+        return JSONResponse(status_code=404, content={"detail": "Question metrics disabled"})
+    return {"index": question_index.stats(), "json_cache": question_service.json_cache.stats()}
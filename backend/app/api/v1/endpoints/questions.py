@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from fastapi.security import HTTPBearer
 from typing import List, Optional
 import logging
 
 from app.services.auth_service import auth_service
+from app.services.exam_session_service import exam_session_service
+from app.services.question_index import strip_answers
 from app.services.question_service import question_service
+from app.core.exceptions import ConflictError, DatabaseUnavailableError, ValidationError
 from app.models.question import (
-    QuestionResponse,
+    QuestionDeliveryResponse,
     QuestionCreateRequest,
-    QuestionExplanationResponse
+    QuestionExplanationResponse,
+    QuestionAttemptBatchRequest
 )
 
 router = APIRouter()
@@ -32,7 +36,7 @@ async def get_current_user_dependency(token: str = Depends(security)):
     
     return user
 
-@router.get("/practice", response_model=List[QuestionResponse])
+@router.get("/practice", response_model=List[QuestionDeliveryResponse])
 async def get_practice_questions(
     exam_type: str,
     subject: Optional[str] = None,
@@ -40,21 +44,36 @@ async def get_practice_questions(
     difficulty: Optional[str] = None,
     arde_probability: Optional[str] = None,
     limit: int = Query(20, ge=1, le=50),
+    page_token: Optional[str] = None,
     current_user = Depends(get_current_user_dependency)
 ):
-    """Get questions for practice session"""
+    """Get questions for practice session.
+
+    The token for the next page is returned in the ``X-Next-Page-Token``
+    header and can be passed back as ``page_token``. The body is assembled
+    from pre-encoded questions rather than validated per item.
+    """
     try:
-        questions = await question_service.get_questions_for_practice(
+        page = await question_service.get_practice_questions_json(
             exam_type=exam_type,
             subject=subject,
             topic=topic,
             difficulty=difficulty,
             arde_probability=arde_probability,
-            limit=limit
+            limit=limit,
+            page_token=page_token
         )
         
-        return [QuestionResponse(**q) for q in questions]
+        headers = {"X-Next-Page-Token": page["next_page_token"]} if page["next_page_token"] else None
+        return Response(content=page["body"], media_type="application/json", headers=headers)
         
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Failed to get practice questions: {e}")
         raise HTTPException(
@@ -62,12 +81,30 @@ async def get_practice_questions(
             detail="Failed to retrieve questions"
         )
 
-@router.get("/{question_id}", response_model=QuestionResponse)
+@router.get("/facets")
+async def get_question_bank_facets(
+    exam_type: str,
+    current_user = Depends(get_current_user_dependency)
+):
+    """Get approved question counts per difficulty and ARDE probability"""
+    try:
+        return await question_service.get_question_bank_facets(exam_type)
+        
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get question facets: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve question facets"
+        )
+
+@router.get("/{question_id}", response_model=QuestionDeliveryResponse)
 async def get_question(
     question_id: str,
     current_user = Depends(get_current_user_dependency)
 ):
-    """Get a specific question"""
+    """Get a specific question, without its answer"""
     try:
         question = await question_service.get_question(question_id)
         
@@ -77,10 +114,12 @@ async def get_question(
                 detail="Question not found"
             )
         
-        return QuestionResponse(**question)
+        return QuestionDeliveryResponse(**strip_answers(question))
         
     except HTTPException:
         raise
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Failed to get question: {e}")
         raise HTTPException(
@@ -110,6 +149,8 @@ async def get_question_explanation(
         
     except HTTPException:
         raise
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Failed to get explanation: {e}")
         raise HTTPException(
@@ -120,21 +161,72 @@ async def get_question_explanation(
 @router.post("/attempt")
 async def record_question_attempt(
     question_id: str,
-    is_correct: bool,
     time_taken: float,
+    response: Response,
+    selected_answer: Optional[str] = None,
+    is_correct: Optional[bool] = None,
     current_user = Depends(get_current_user_dependency)
 ):
-    """Record a question attempt"""
+    """Record a question attempt.
+
+    Practice questions are served without answers: send ``selected_answer``
+    and the response says whether it was correct and what the answer is.
+    Questions on an exam the user is still sitting are refused, so the exam's
+    answers cannot be collected one guess at a time.
+
+    Deprecated: older clients that send only a client-graded ``is_correct``
+    are still accepted during the deprecation window. Their attempts are
+    stored as unverified, kept out of question stats, and get no answer back.
+    """
     try:
+        if selected_answer is None and is_correct is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="selected_answer is required"
+            )
+        if question_id in await exam_session_service.active_question_ids(current_user["id"]):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="This question is on an exam in progress; it is graded when the exam is submitted"
+            )
+        
+        if selected_answer is None:
+            if not await question_service.is_gradable(question_id):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Question not found"
+                )
+            response.headers["Deprecation"] = "true"
+            response.headers["Warning"] = '299 - "is_correct is deprecated; send selected_answer"'
+            success = await question_service.record_question_attempt(
+                question_id=question_id,
+                user_id=current_user["id"],
+                is_correct=is_correct,
+                time_taken=time_taken,
+                verified=False
+            )
+            return {"success": success}
+        
+        check = await question_service.check_answer(question_id, selected_answer)
+        if check is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Question not found"
+            )
+        
         success = await question_service.record_question_attempt(
             question_id=question_id,
             user_id=current_user["id"],
-            is_correct=is_correct,
+            is_correct=check["is_correct"],
             time_taken=time_taken
         )
         
-        return {"success": success}
+        return {"success": success, **check}
         
+    except HTTPException:
+        raise
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Failed to record attempt: {e}")
         raise HTTPException(
@@ -142,6 +234,42 @@ async def record_question_attempt(
             detail="Failed to record attempt"
         )
 
+@router.post("/attempts/batch")
+async def record_question_attempts(
+    batch: QuestionAttemptBatchRequest,
+    current_user = Depends(get_current_user_dependency)
+):
+    """Record a batch of attempts, e.g. a whole offline session"""
+    try:
+        on_exam = await exam_session_service.active_question_ids(current_user["id"])
+        if any(attempt.question_id in on_exam for attempt in batch.attempts):
+            raise ConflictError("Attempts include questions on an exam in progress; they are graded when the exam is submitted")
+        
+        return await question_service.record_question_attempts(
+            user_id=current_user["id"],
+            attempts=[attempt.dict() for attempt in batch.attempts],
+            idempotency_key=batch.idempotency_key
+        )
+        
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except ConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except DatabaseUnavailableError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to record attempt batch: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to record attempts"
+        )
+
 @router.post("/", response_model=str)
 async def create_question(
     question_data: QuestionCreateRequest,
@@ -165,6 +293,8 @@ async def create_question(
         
     except HTTPException:
         raise
+    except DatabaseUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Failed to create question: {e}")
         raise HTTPException(
@@ -0,0 +1,153 @@
+"""
+In-process read-through cache for database documents and query results.
+
+Only collections with a configured TTL are cached. Entries are evicted
+least-recently-used once ``max_entries`` is reached, and writes through the
+database client invalidate the touched document plus every cached query on
+its collection. Values are copied in and out because callers routinely
+mutate the dicts they get back.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import copy
+import json
+import time
+
+_MISSING = object()
+
+
+class DocumentCache:
+    """TTL + LRU cache keyed by collection"""
+
+    def __init__(self, ttls: Dict[str, float], max_entries: int = 10000):
+        self.ttls = dict(ttls)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        # Cached query keys per collection, so a write drops them without a full scan
+        self._queries: Dict[str, set] = {}
+        # Bumped on every invalidation so reads that raced a write are not stored
+        self._generations: Dict[str, int] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def is_cached(self, collection: str) -> bool:
+        """Whether reads from ``collection`` go through the cache"""
+        return self.ttls.get(collection, 0) > 0
+
+    def _count(self, collection: str, counter: str):
+        counters = self._counters.setdefault(
+            collection, {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        )
+        counters[counter] += 1
+
+    def _get(self, key: Tuple[str, str, Hashable]) -> Any:
+        collection = key[0]
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._drop(key)
+            self._count(collection, "misses")
+            return _MISSING
+
+        self._entries.move_to_end(key)
+        self._count(collection, "hits")
+        return copy.deepcopy(entry[1])
+
+    def _set(self, key: Tuple[str, str, Hashable], value: Any):
+        collection = key[0]
+        self._entries[key] = (time.monotonic() + self.ttls[collection], copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        if key[1] == "query":
+            self._queries.setdefault(collection, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            evicted = next(iter(self._entries))
+            self._drop(evicted)
+            self._count(evicted[0], "evictions")
+
+    def _drop(self, key: Tuple[str, str, Hashable]):
+        self._entries.pop(key, None)
+        if key[1] == "query":
+            self._queries.get(key[0], set()).discard(key)
+
+    # Documents
+
+    def get_document(self, collection: str, document_id: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Return ``(hit, document)``; a cached miss is ``(True, None)``"""
+        value = self._get((collection, "doc", document_id))
+        if value is _MISSING:
+            return False, None
+        return True, value
+
+    def set_document(
+        self,
+        collection: str,
+        document_id: str,
+        document: Optional[Dict[str, Any]],
+        generation: Optional[int] = None
+    ):
+        if self._accepts(collection, generation):
+            self._set((collection, "doc", document_id), document)
+
+    def generation(self, collection: str) -> int:
+        """Take before reading from the backend; pass to ``set_*`` afterwards"""
+        return self._generations.get(collection, 0)
+
+    def _accepts(self, collection: str, generation: Optional[int]) -> bool:
+        return self.is_cached(collection) and (generation is None or generation == self.generation(collection))
+
+    # Queries
+
+    @staticmethod
+    def query_key(**query: Any) -> str:
+        """Normalize query arguments into a hashable key"""
+        return json.dumps(query, sort_keys=True, default=str)
+
+    def get_query(self, collection: str, key: str) -> Optional[Any]:
+        value = self._get((collection, "query", key))
+        return None if value is _MISSING else value
+
+    def set_query(self, collection: str, key: str, results: Any, generation: Optional[int] = None):
+        if self._accepts(collection, generation):
+            self._set((collection, "query", key), results)
+
+    # Invalidation
+
+    def invalidate(self, collection: str, document_id: Optional[str] = None):
+        """
+        Drop a document (or the whole collection) from the cache.
+
+        Any write can change query membership, so cached queries on the
+        collection are always dropped as well.
+        """
+        if not self.is_cached(collection):
+            return
+
+        if document_id is None:
+            stale = [key for key in self._entries if key[0] == collection]
+        else:
+            stale = [(collection, "doc", document_id), *self._queries.get(collection, ())]
+        for key in stale:
+            self._drop(key)
+        self._generations[collection] = self.generation(collection) + 1
+        self._count(collection, "invalidations")
+
+    def clear(self):
+        self._entries.clear()
+        self._queries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per collection plus overall totals"""
+        totals = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        for counters in self._counters.values():
+            for name, value in counters.items():
+                totals[name] += value
+
+        lookups = totals["hits"] + totals["misses"]
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_ratio": totals["hits"] / lookups if lookups else 0.0,
+            **totals,
+            "collections": {name: dict(counters) for name, counters in self._counters.items()}
+        }
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -25,6 +25,9 @@ class Settings(BaseSettings):
     ALLOWED_HOSTS: List[str] = ["*"]
     
     # Database settings
+    DATABASE_BACKEND: str = "firestore"  # "firestore", "sqlite" or "memory"
+    SQLITE_PATH: str = "entrytestguru.db"
+    SQLITE_MAX_WORKERS: int = 8  # reader threads; SQLite serializes writers
     FIREBASE_PROJECT_ID: str = "entrytestguru-dev"
     FIREBASE_PRIVATE_KEY_ID: Optional[str] = None
     FIREBASE_PRIVATE_KEY: Optional[str] = None
@@ -34,6 +37,70 @@ class Settings(BaseSettings):
     FIREBASE_TOKEN_URI: str = "https://oauth2.googleapis.com/token"
     FIREBASE_AUTH_PROVIDER_CERT_URL: str = "https://www.googleapis.com/oauth2/v1/certs"
     FIREBASE_CLIENT_CERT_URL: Optional[str] = None
+    FIRESTORE_MAX_WORKERS: int = 32  # threads serving blocking Firestore RPCs
+    FIRESTORE_MAX_QUEUED: int = 64  # RPCs waiting for a thread before new ones fail fast
+    FIRESTORE_BATCH_SIZE: int = 500  # Firestore rejects batches above 500 writes
+    FIRESTORE_BULK_CONCURRENCY: int = 8  # batches committed in parallel by bulk_write
+    FIRESTORE_BULK_MAX_RETRIES: int = 3
+    
+    # Resilience (see app/core/resilience.py)
+    DB_REQUEST_DEADLINE: float = 10.0  # seconds of database time a request may use, retries included
+    DB_CALL_TIMEOUT: float = 10.0  # seconds per database call attempt
+    DB_MAX_RETRIES: int = 3  # retries of idempotent calls on transient errors
+    DB_BREAKER_FAILURE_THRESHOLD: int = 5  # consecutive transient failures that open the circuit
+    DB_BREAKER_RESET_SECONDS: float = 10.0  # open time before a probe call is allowed
+    
+    # Read-through document cache (seconds per collection; absent = not cached)
+    DB_CACHE_ENABLED: bool = True
+    DB_CACHE_MAX_ENTRIES: int = 10000
+    DB_CACHE_TTLS: Dict[str, int] = {
+        "users": 30,
+        "anonymous_users": 30,
+        "questions": 300,
+        "exam_sessions": 60,
+    }
+    
+    # Write-behind buffer for counters and heartbeats (see app/core/write_behind.py)
+    WRITE_BEHIND_ENABLED: bool = True
+    WRITE_BEHIND_FLUSH_INTERVAL: float = 1.0  # seconds
+    WRITE_BEHIND_MAX_PENDING: int = 5000  # documents buffered before an early flush
+    
+    # Sharded counters for hot documents (see app/core/sharded_counter.py)
+    COUNTER_SHARDS: int = 10  # shard documents per counted document
+    COUNTER_ROLLUP_SECONDS: float = 30.0  # fold shard totals back onto the counted documents
+    
+    # Buffered question attempt ingestion (see app/services/attempt_ingestion.py)
+    ATTEMPT_INGESTION_ENABLED: bool = True
+    ATTEMPT_BATCH_SIZE: int = 200  # attempts per bulk write
+    ATTEMPT_BATCH_SECONDS: float = 0.5  # longest an attempt waits for its batch to fill
+    ATTEMPT_QUEUE_MAX: int = 10000  # queued attempts before submitters wait
+    ATTEMPT_BATCH_CLAIM_SECONDS: float = 300.0  # a synced batch still "processing" after this may be taken over
+    
+    # Process-local question bank index (see app/services/question_index.py)
+    QUESTION_INDEX_ENABLED: bool = True
+    QUESTION_INDEX_REFRESH_SECONDS: float = 30.0  # poll for questions changed since the last refresh
+    QUESTION_INDEX_REBUILD_SECONDS: float = 3600.0  # full reload, which also drops deleted questions
+    QUESTION_JSON_CACHE_QUESTIONS: int = 20000  # pre-encoded questions (see app/services/question_json_cache.py)
+    QUESTION_JSON_CACHE_RESULTS: int = 1000  # pre-encoded practice pages
+    
+    # Pre-assembled simulated exam papers (see app/services/exam_paper_pool.py)
+    EXAM_PAPER_POOL_ENABLED: bool = True
+    EXAM_PAPER_POOL_SIZE: int = 20  # papers kept per exam type
+    EXAM_PAPER_POOL_MIN: int = 5  # refill when fewer remain
+    EXAM_PAPER_MAX_USES: int = 200  # handouts before a paper is rotated out
+    EXAM_PAPER_HISTORY: int = 50  # papers remembered per user to avoid repeats
+    EXAM_PAPER_CHECK_SECONDS: float = 60.0  # sync handout counts, drop papers with retired questions and refill
+    
+    # Server-side exam sessions (see app/services/exam_session_service.py)
+    EXAM_SUBMIT_GRACE_SECONDS: float = 60.0  # submissions accepted this long after the deadline
+    EXAM_GRADING_CLAIM_SECONDS: float = 300.0  # a session still "grading" after this may be graded again
+    
+    # Secondary indexes kept by the in-memory backend (equality and "in" lookups)
+    MEMORY_DB_INDEXES: Dict[str, List[str]] = {
+        "questions": ["exam_type", "subject", "topic", "difficulty", "approval_status", "arde_probability"],
+        "question_attempts": ["user_id", "question_id"],
+        "user_devices": ["user_id"],
+    }
     
     # Redis settings
     REDIS_URL: str = "redis://localhost:6379"
@@ -58,6 +125,8 @@ class Settings(BaseSettings):
     
     # Monitoring
     ENABLE_METRICS: bool = True
+    DB_SLOW_QUERY_MS: float = 250.0  # database calls at least this slow are logged
+    QUERY_SHAPES_PATH: Optional[str] = None  # persist recorded query shapes here (see tools/index_manifest.py)
     METRICS_PORT: int = 9090
     
     class Config:
@@ -1,18 +1,74 @@
 from google.cloud import firestore
 from google.oauth2 import service_account
-from typing import Dict, List, Optional, Any
+from google.api_core import exceptions as gcp_exceptions
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, TypeVar
+import asyncio
 import json
 import logging
 from app.core.config import settings
+from app.core.db_base import BaseDatabase
+from app.core.db_metrics import instrumented
+from app.core.db_utils import (
+    Increment, aggregation_alias, chunk_operations, decode_page_token, page_token_for, parse_order_by
+)
+from app.core.exceptions import DatabaseUnavailableError, ValidationError
+from app.core.resilience import BoundedExecutor, CircuitBreaker, call_with_resilience
 
 logger = logging.getLogger(__name__)
 
-class FirestoreClient:
-    """Firebase Firestore database client"""
+T = TypeVar("T")
+
+# Errors worth retrying: the write may succeed if simply sent again
+TRANSIENT_ERRORS = (
+    gcp_exceptions.ServiceUnavailable,
+    gcp_exceptions.DeadlineExceeded,
+    gcp_exceptions.Aborted,
+    gcp_exceptions.InternalServerError,
+    gcp_exceptions.ResourceExhausted,
+)
+
+
+def _has_increment(data: Dict[str, Any]) -> bool:
+    """Whether a write contains increments, which must not be sent twice"""
+    return any(
+        isinstance(value, Increment) or (isinstance(value, dict) and _has_increment(value))
+        for value in data.values()
+    )
+
+
+class FirestoreClient(BaseDatabase):
+    """Firebase Firestore database client.
+
+    Reads of collections listed in ``DB_CACHE_TTLS`` go through an in-process
+    read-through cache (``db.cache``) that every write invalidates.
+
+    The google-cloud-firestore ``Client`` is synchronous, so every RPC is
+    dispatched to a bounded thread pool instead of running on the event loop.
+    A slow read then only occupies one worker thread rather than stalling
+    every other in-flight request. The client itself is created lazily on
+    first use.
+
+    Every RPC goes through :func:`call_with_resilience`: it is bounded by the
+    request deadline, retried on transient errors when it is safe to repeat,
+    and rejected up front while the circuit breaker is open.
+    """
+    
+    not_found_errors = (gcp_exceptions.NotFound,)
     
-    def __init__(self):
-        self._client = None
-        self._initialize_client()
+    def __init__(
+        self,
+        client: Optional[firestore.Client] = None,
+        max_workers: Optional[int] = None,
+        cache_enabled: Optional[bool] = None
+    ):
+        super().__init__(cache_enabled)
+        self._client = client
+        self.breaker = CircuitBreaker("firestore")
+        self._executor = BoundedExecutor(
+            "firestore",
+            max_workers=max_workers or settings.FIRESTORE_MAX_WORKERS,
+            max_queued=settings.FIRESTORE_MAX_QUEUED
+        )
     
     def _initialize_client(self):
         """Initialize Firestore client"""
@@ -51,6 +107,34 @@ class FirestoreClient:
             self._initialize_client()
         return self._client
     
+    async def _run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking Firestore call on the bounded worker pool"""
+        return await self._executor.run(func, *args, **kwargs)
+    
+    async def _call(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        idempotent: bool = True,
+        max_retries: Optional[int] = None,
+        **kwargs: Any
+    ) -> T:
+        """Run a Firestore RPC under the deadline, retry policy and circuit breaker"""
+        return await call_with_resilience(
+            lambda: self._run(func, *args, **kwargs),
+            self.breaker,
+            TRANSIENT_ERRORS,
+            idempotent=idempotent,
+            max_retries=max_retries
+        )
+    
+    def close(self):
+        """Release the worker pool and the underlying client"""
+        self._executor.shutdown(wait=True)
+        if self._client is not None:
+            self._client.close()
+    
+    @instrumented("create")
     async def create_document(
         self, 
         collection: str, 
@@ -59,128 +143,486 @@ class FirestoreClient:
     ) -> str:
         """Create a document"""
         try:
-            if document_id:
-                doc_ref = self.client.collection(collection).document(document_id)
-                doc_ref.set(data)
-                return document_id
-            else:
-                doc_ref = self.client.collection(collection).add(data)
-                return doc_ref[1].id
+            # Choosing the ID client-side makes the write safe to retry
+            doc_ref = self.client.collection(collection).document(document_id)
+            try:
+                await self._call(doc_ref.set, self._prepare(data), idempotent=not _has_increment(data))
+            finally:
+                self._invalidate(collection, doc_ref.id)
+            return doc_ref.id
         except Exception as e:
             logger.error(f"Failed to create document in {collection}: {e}")
             raise
     
-    async def get_document(self, collection: str, document_id: str) -> Optional[Dict[str, Any]]:
-        """Get a document by ID"""
-        try:
-            doc_ref = self.client.collection(collection).document(document_id)
-            doc = doc_ref.get()
-            
+    @instrumented("get")
+    async def _get_uncached(
+        self,
+        collection: str,
+        document_id: str,
+        fields: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        doc_ref = self.client.collection(collection).document(document_id)
+        doc = await self._call(doc_ref.get, field_paths=fields) if fields else await self._call(doc_ref.get)
+        return self._to_dict(doc) if doc.exists else None
+    
+    def _fetch_many(
+        self,
+        keys: List[Tuple[str, str]],
+        fields: Optional[List[str]] = None
+    ) -> Dict[Tuple[str, str], Optional[Dict[str, Any]]]:
+        """Read documents with one BatchGetDocuments RPC (runs on a worker thread)"""
+        refs = [self.client.collection(collection).document(document_id) for collection, document_id in keys]
+        by_path = {ref.path: key for ref, key in zip(refs, keys)}
+        documents: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = dict.fromkeys(keys)
+        
+        # get_all yields snapshots in arbitrary order, so match them by path
+        for doc in self.client.get_all(refs, field_paths=fields):
             if doc.exists:
-                data = doc.to_dict()
-                data['id'] = doc.id
-                return data
-            return None
+                documents[by_path[doc.reference.path]] = self._to_dict(doc)
+        return documents
+    
+    @instrumented("get_many")
+    async def _get_many_uncached(
+        self,
+        keys: List[Tuple[str, str]],
+        fields: Optional[List[str]] = None
+    ) -> Dict[Tuple[str, str], Optional[Dict[str, Any]]]:
+        try:
+            return await self._call(self._fetch_many, keys, fields)
         except Exception as e:
-            logger.error(f"Failed to get document {document_id} from {collection}: {e}")
+            logger.error(f"Failed to get {len(keys)} documents: {e}")
             raise
     
+    @instrumented("update")
     async def update_document(
         self, 
         collection: str, 
         document_id: str, 
         data: Dict[str, Any]
     ) -> bool:
-        """Update a document"""
+        """
+        Update a document.
+
+        Returns:
+            True if updated, False if the document does not exist. Other
+            failures raise (``DatabaseUnavailableError`` for transient ones).
+        """
         try:
             doc_ref = self.client.collection(collection).document(document_id)
-            doc_ref.update(data)
+            try:
+                await self._call(doc_ref.update, self._prepare(data), idempotent=not _has_increment(data))
+            finally:
+                self._invalidate(collection, document_id)
             return True
+        except gcp_exceptions.NotFound:
+            return False
         except Exception as e:
             logger.error(f"Failed to update document {document_id} in {collection}: {e}")
-            return False
+            raise
     
+    def _transactional_update_sync(
+        self,
+        collection: str,
+        document_id: str,
+        update_fn: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        doc_ref = self.client.collection(collection).document(document_id)
+        
+        @firestore.transactional
+        def apply(transaction):
+            snapshot = doc_ref.get(transaction=transaction)
+            current = self._to_dict(snapshot) if snapshot.exists else None
+            updates = update_fn(current)
+            if updates is None:
+                return None
+            if current is None:
+                transaction.set(doc_ref, self._prepare(updates))
+            else:
+                transaction.update(doc_ref, self._prepare(updates))
+            return updates
+        
+        return apply(self.client.transaction())
+    
+    @instrumented("transaction")
+    async def transactional_update(
+        self,
+        collection: str,
+        document_id: str,
+        update_fn: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Read-modify-write a document inside a transaction.
+
+        ``update_fn`` receives the current document (None if missing) and
+        returns the field updates to apply, or None to write nothing. It may
+        be called more than once if the transaction is retried on contention,
+        so it must not have side effects. A transaction whose commit outcome
+        is unknown is not retried here, since ``update_fn`` would be applied
+        to its own result.
+
+        Returns:
+            The updates that were committed, or None if nothing was written
+        """
+        try:
+            return await self._call(
+                self._transactional_update_sync, collection, document_id, update_fn, idempotent=False
+            )
+        except Exception as e:
+            logger.error(f"Transaction on {collection}/{document_id} failed: {e}")
+            raise
+        finally:
+            self._invalidate(collection, document_id)
+    
+    @instrumented("delete")
     async def delete_document(self, collection: str, document_id: str) -> bool:
         """Delete a document"""
         try:
             doc_ref = self.client.collection(collection).document(document_id)
-            doc_ref.delete()
+            try:
+                await self._call(doc_ref.delete)
+            finally:
+                self._invalidate(collection, document_id)
             return True
         except Exception as e:
             logger.error(f"Failed to delete document {document_id} from {collection}: {e}")
             return False
     
-    async def query_collection(
+    def _build_query(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        order_by: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ):
+        """Build a Firestore query from the generic filter/order spec"""
+        query = self.client.collection(collection)
+        
+        # Apply projection
+        if fields:
+            query = query.select(fields)
+        
+        # Apply filters
+        if filters:
+            for filter_dict in filters:
+                field = filter_dict.get('field')
+                operator = filter_dict.get('operator', '==')
+                value = filter_dict.get('value')
+                query = query.where(field, operator, value)
+        
+        # Apply ordering
+        field, descending = parse_order_by(order_by)
+        if field:
+            direction = firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING
+            query = query.order_by(field, direction=direction)
+        
+        return query
+    
+    @classmethod
+    def _prepare(cls, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Translate backend-neutral write sentinels into Firestore transforms"""
+        prepared = {}
+        for key, value in data.items():
+            if isinstance(value, Increment):
+                value = firestore.Increment(value.amount)
+            elif isinstance(value, dict):
+                value = cls._prepare(value)
+            prepared[key] = value
+        return prepared
+    
+    @staticmethod
+    def _to_dict(doc) -> Dict[str, Any]:
+        data = doc.to_dict()
+        data['id'] = doc.id
+        return data
+    
+    @instrumented("query")
+    async def _query(
         self,
         collection: str,
         filters: Optional[List[Dict[str, Any]]] = None,
         order_by: Optional[str] = None,
         limit: Optional[int] = None,
-        offset: Optional[int] = None
+        offset: Optional[int] = None,
+        fields: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
-        """Query a collection with filters"""
-        try:
-            query = self.client.collection(collection)
-            
-            # Apply filters
-            if filters:
-                for filter_dict in filters:
-                    field = filter_dict.get('field')
-                    operator = filter_dict.get('operator', '==')
-                    value = filter_dict.get('value')
-                    query = query.where(field, operator, value)
-            
-            # Apply ordering
-            if order_by:
-                if order_by.startswith('-'):
-                    query = query.order_by(order_by[1:], direction=firestore.Query.DESCENDING)
-                else:
-                    query = query.order_by(order_by, direction=firestore.Query.ASCENDING)
-            
-            # Apply pagination
-            if offset:
-                query = query.offset(offset)
-            if limit:
-                query = query.limit(limit)
+        # Firestore select() keeps unused fields off the wire; offset is
+        # still billed and scanned document by document
+        query = self._build_query(collection, filters, order_by, fields)
+        
+        # Apply pagination
+        if offset:
+            query = query.offset(offset)
+        if limit:
+            query = query.limit(limit)
+        
+        docs = await self._call(query.get)
+        return [self._to_dict(doc) for doc in docs]
+    
+    @instrumented("aggregate")
+    async def aggregate(
+        self,
+        collection: str,
+        aggregations: List[Dict[str, str]],
+        filters: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run server-side aggregations over a query.
+
+        Firestore computes the result from its indexes in one round-trip and
+        no documents are transferred.
+
+        Args:
+            collection: Collection name
+            aggregations: Dicts with ``type`` ('count', 'sum', 'avg'), a
+                ``field`` for sum/avg, and an optional ``alias``
+            filters: Filters as accepted by :meth:`query_collection`
+
+        Returns:
+            Dict mapping each alias (default ``count``, ``sum_<field>``,
+            ``avg_<field>``) to its value
+        """
+        query = self._build_query(collection, filters)
+        aggregation_query = None
+        
+        for spec in aggregations:
+            kind = spec.get('type')
+            alias = spec.get('alias') or aggregation_alias(spec)
+            target = aggregation_query if aggregation_query is not None else query
             
-            docs = query.stream()
-            results = []
+            if kind == 'count':
+                aggregation_query = target.count(alias=alias)
+            elif kind in ('sum', 'avg') and spec.get('field'):
+                aggregation_query = getattr(target, kind)(spec['field'], alias=alias)
+            else:
+                raise ValidationError(f"Invalid aggregation: {spec}")
+        
+        if aggregation_query is None:
+            return {}
+        
+        try:
+            results = await self._call(aggregation_query.get)
+            return {result.alias: result.value for batch in results for result in batch}
+        except Exception as e:
+            logger.error(f"Failed to aggregate collection {collection}: {e}")
+            raise
+    
+    def _paged_query(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]],
+        order_by: Optional[str],
+        fields: Optional[List[str]] = None
+    ):
+        """Query ordered by ``order_by`` and then by document ID so cursors are stable"""
+        field, descending = parse_order_by(order_by)
+        if fields and field and field not in fields:
+            # The cursor needs the order value of the last document
+            fields = [*fields, field]
+        query = self._build_query(collection, filters, order_by, fields)
+        direction = firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING
+        return query.order_by("__name__", direction=direction)
+    
+    @instrumented("page")
+    async def query_page(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        order_by: Optional[str] = None,
+        page_size: Optional[int] = None,
+        page_token: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Fetch one page of a query using a ``start_after`` cursor.
+
+        Args:
+            collection: Collection name
+            filters: Filters as accepted by :meth:`query_collection`
+            order_by: Field to order by (prefix with ``-`` for descending)
+            page_size: Documents per page (capped at ``MAX_PAGE_SIZE``)
+            page_token: Token returned with the previous page
+            fields: Optional field paths to project
+
+        Returns:
+            Dict with ``items`` and ``next_page_token`` (None on the last page)
+        """
+        page_size = min(page_size or settings.DEFAULT_PAGE_SIZE, settings.MAX_PAGE_SIZE)
+        field, _ = parse_order_by(order_by)
+        try:
+            query = self._paged_query(collection, filters, order_by, fields)
+            if page_token:
+                values, last_id = decode_page_token(page_token)
+                query = query.start_after([*values, last_id])
             
-            for doc in docs:
-                data = doc.to_dict()
-                data['id'] = doc.id
-                results.append(data)
+            docs = await self._call(query.limit(page_size).get)
+            items = [self._to_dict(doc) for doc in docs]
+            next_token = page_token_for(items[-1], field) if len(items) == page_size else None
             
-            return results
+            return {"items": items, "next_page_token": next_token}
+        except ValidationError:
+            raise
         except Exception as e:
-            logger.error(f"Failed to query collection {collection}: {e}")
+            logger.error(f"Failed to page collection {collection}: {e}")
             raise
     
-    async def batch_write(self, operations: List[Dict[str, Any]]) -> bool:
-        """Perform batch write operations"""
-        try:
-            batch = self.client.batch()
+    @instrumented("stream")
+    async def query_iter(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        order_by: Optional[str] = None,
+        batch_size: int = 500,
+        fields: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream every document matching a query.
+
+        Documents are fetched ``batch_size`` at a time with cursor pagination,
+        so memory stays bounded by one batch regardless of collection size.
+        """
+        query = self._paged_query(collection, filters, order_by, fields)
+        last_snapshot = None
+        
+        while True:
+            page = query.start_after(last_snapshot) if last_snapshot else query
+            try:
+                docs = await self._call(page.limit(batch_size).get)
+            except Exception as e:
+                logger.error(f"Failed to stream collection {collection}: {e}")
+                raise
             
-            for op in operations:
-                operation_type = op.get('type')  # 'create', 'update', 'delete'
-                collection = op.get('collection')
-                document_id = op.get('document_id')
-                data = op.get('data', {})
-                
-                doc_ref = self.client.collection(collection).document(document_id)
-                
-                if operation_type == 'create':
-                    batch.set(doc_ref, data)
-                elif operation_type == 'update':
-                    batch.update(doc_ref, data)
-                elif operation_type == 'delete':
-                    batch.delete(doc_ref)
+            for doc in docs:
+                yield self._to_dict(doc)
             
-            batch.commit()
-            return True
+            if len(docs) < batch_size:
+                return
+            last_snapshot = docs[-1]
+    
+    def _commit_chunk(self, chunk: List[Tuple[int, Dict[str, Any]]]):
+        """Build and commit one WriteBatch (runs on a worker thread)"""
+        batch = self.client.batch()
+        
+        for _, op in chunk:
+            operation_type = op.get('type')  # 'create', 'update', 'delete'
+            doc_ref = self.client.collection(op['collection']).document(op['document_id'])
+            data = self._prepare(op.get('data', {}))
+            
+            if operation_type == 'create':
+                batch.set(doc_ref, data)
+            elif operation_type == 'update':
+                batch.update(doc_ref, data)
+            elif operation_type == 'delete':
+                batch.delete(doc_ref)
+            else:
+                raise ValueError(f"Unknown operation type: {operation_type}")
+        
+        batch.commit()
+    
+    async def _commit_with_retry(self, chunk: List[Tuple[int, Dict[str, Any]]]) -> Optional[Exception]:
+        """Commit a chunk, retrying transient failures unless it contains increments"""
+        try:
+            await self._call(
+                self._commit_chunk,
+                chunk,
+                idempotent=not any(_has_increment(op.get('data', {})) for _, op in chunk),
+                max_retries=settings.FIRESTORE_BULK_MAX_RETRIES
+            )
+            return None
         except Exception as e:
-            logger.error(f"Failed to perform batch write: {e}")
-            return False
+            return e
+    
+    @instrumented("bulk_write")
+    async def bulk_write(
+        self,
+        operations: List[Dict[str, Any]],
+        max_concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Write any number of operations as concurrent, size-limited batches.
+
+        Operations are split into batches of at most ``FIRESTORE_BATCH_SIZE``
+        writes (all writes to the same document stay in one batch, in order)
+        and committed with bounded parallelism. Transient failures are retried
+        with backoff (batches with increments excepted, as a commit that timed
+        out may still have been applied); a batch that still fails is replayed
+        one write at a time so the offending operations can be reported
+        individually. Batches that fail because the database is unavailable
+        are not replayed.
+
+        Args:
+            operations: Dicts with ``type`` ('create', 'update', 'delete'),
+                ``collection``, ``document_id`` and optional ``data``. A
+                create without ``document_id`` gets an auto-generated one.
+            max_concurrency: Batches committed at once (default
+                ``FIRESTORE_BULK_CONCURRENCY``)
+
+        Returns:
+            Dict with ``success``, ``written``, ``failed`` and per-operation
+            ``results`` (``index``, ``document_id``, ``success``, ``error``
+            and ``reason``: 'not_found', 'unavailable' or 'error')
+        """
+        operations = [dict(op) for op in operations]
+        for op in operations:
+            if op.get('type') == 'create' and not op.get('document_id'):
+                op['document_id'] = self.client.collection(op['collection']).document().id
+        
+        results = [
+            {"index": i, "collection": op.get('collection'), "document_id": op.get('document_id'), "success": False, "error": None, "reason": None}
+            for i, op in enumerate(operations)
+        ]
+        semaphore = asyncio.Semaphore(max_concurrency or settings.FIRESTORE_BULK_CONCURRENCY)
+        
+        async def commit(chunk: List[Tuple[int, Dict[str, Any]]]):
+            async with semaphore:
+                error = await self._commit_with_retry(chunk)
+            for _, op in chunk:
+                self._invalidate(op['collection'], op['document_id'])
+            
+            if error is None:
+                for index, _ in chunk:
+                    results[index]["success"] = True
+            elif len(chunk) == 1 or isinstance(error, DatabaseUnavailableError):
+                for index, _ in chunk:
+                    results[index]["error"] = str(error)
+                    results[index]["reason"] = self.failure_reason(error)
+            else:
+                logger.warning(f"Batch of {len(chunk)} writes failed ({error}), isolating failed operations")
+                groups: Dict[Tuple[str, str], List[Tuple[int, Dict[str, Any]]]] = {}
+                for index, op in chunk:
+                    groups.setdefault((op['collection'], op['document_id']), []).append((index, op))
+                await asyncio.gather(*(replay(group) for group in groups.values()))
+        
+        async def replay(group: List[Tuple[int, Dict[str, Any]]]):
+            # Writes to one document are replayed in their original order
+            for item in group:
+                await commit([item])
+        
+        chunks = chunk_operations(list(enumerate(operations)), settings.FIRESTORE_BATCH_SIZE)
+        await asyncio.gather(*(commit(chunk) for chunk in chunks))
+        
+        failed = sum(1 for r in results if not r["success"])
+        if failed:
+            logger.error(f"Bulk write finished with {failed}/{len(operations)} failed operations")
+        
+        return {
+            "success": failed == 0,
+            "written": len(operations) - failed,
+            "failed": failed,
+            "results": results
+        }
+
+def create_database(backend: Optional[str] = None) -> BaseDatabase:
+    """Instantiate the storage backend named by ``DATABASE_BACKEND``"""
+    backend = backend or settings.DATABASE_BACKEND
+    if backend == "firestore":
+        return FirestoreClient()
+    if backend == "sqlite":
+        from app.core.sqlite_database import SQLiteDatabase
+        return SQLiteDatabase()
+    if backend == "memory":
+        from app.core.memory_database import MemoryDatabase
+        return MemoryDatabase()
+    raise ValueError(f"Unknown database backend: {backend}")
 
 # Global database instance
-db = FirestoreClient()
\ No newline at end of file
+db = create_database()
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""
+Request-scoped batching of single-document reads.
+
+Within a batching scope (one per HTTP request, see ``RequestContextMiddleware``)
+every ``get_document`` call made in the same event-loop tick is coalesced into
+one multi-document RPC. Code that awaits reads concurrently, e.g. with
+``asyncio.gather``, therefore pays for a single round-trip.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import copy
+import logging
+
+logger = logging.getLogger(__name__)
+
+DocumentKey = Tuple[str, str]
+FetchMany = Callable[[List[DocumentKey]], Awaitable[Dict[DocumentKey, Optional[Dict[str, Any]]]]]
+
+# Loaders for the current request, keyed by the database client they batch for
+_loader_scope: ContextVar[Optional[Dict[Any, "DocumentLoader"]]] = ContextVar("document_loaders", default=None)
+
+
+class DocumentLoader:
+    """Coalesces document loads issued in the same loop tick into one fetch."""
+
+    def __init__(self, fetch_many: FetchMany):
+        self._fetch_many = fetch_many
+        self._pending: Dict[DocumentKey, List[asyncio.Future]] = {}
+        self._scheduled = False
+        self.batches = 0
+
+    def load(self, collection: str, document_id: str) -> "asyncio.Future[Optional[Dict[str, Any]]]":
+        """Queue a document read; it is sent with the rest of this tick's reads."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault((collection, document_id), []).append(future)
+
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._dispatch)
+        return future
+
+    def _dispatch(self):
+        pending, self._pending = self._pending, {}
+        self._scheduled = False
+        self.batches += 1
+        asyncio.ensure_future(self._resolve(pending))
+
+    async def _resolve(self, pending: Dict[DocumentKey, List[asyncio.Future]]):
+        try:
+            documents = await self._fetch_many(list(pending))
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for key, futures in pending.items():
+            document = documents.get(key)
+            for i, future in enumerate(futures):
+                if future.done():
+                    continue
+                # Callers mutate what they get back, so duplicates get their own copy
+                future.set_result(document if i == 0 or document is None else copy.deepcopy(document))
+
+
+@contextmanager
+def batching_scope() -> Iterator[None]:
+    """Enable read coalescing for everything running in this context."""
+    token = _loader_scope.set({})
+    try:
+        yield
+    finally:
+        _loader_scope.reset(token)
+
+
+def in_batching_scope() -> bool:
+    """Whether reads made in this context are coalesced"""
+    return _loader_scope.get() is not None
+
+
+def loader_for(client: Any, fetch_many: FetchMany) -> Optional[DocumentLoader]:
+    """Return the current request's loader for ``client``, or None outside a scope."""
+    scope = _loader_scope.get()
+    if scope is None:
+        return None
+    loader = scope.get(client)
+    if loader is None:
+        loader = scope[client] = DocumentLoader(fetch_many)
+    return loader
@@ -0,0 +1,335 @@
+"""
+Backend-independent half of the database client.
+
+``BaseDatabase`` owns everything that does not depend on where documents are
+stored: the read-through cache, request-scoped read batching, and the
+convenience methods built on the primitives. Storage backends subclass it and
+implement the uncached primitives (``_get_uncached``, ``_get_many_uncached``,
+``_query``) plus the write, aggregation and paging methods.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+import logging
+from app.core.config import settings
+from app.core.cache import DocumentCache
+from app.core.dataloader import loader_for
+from app.core.db_utils import Increment, project
+from app.core.exceptions import DatabaseUnavailableError
+from app.core.resilience import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+DocumentKey = Tuple[str, str]
+
+
+class BaseDatabase(ABC):
+    """Document database interface shared by every storage backend"""
+
+    # Coalesce concurrent get_document calls within a request into one fetch
+    batch_reads = True
+
+    # Errors meaning "the document does not exist" (update_document returns False)
+    not_found_errors: Tuple[type, ...] = (KeyError,)
+
+    # Remote backends guard their calls with a circuit breaker
+    breaker: Optional[CircuitBreaker] = None
+
+    def __init__(self, cache_enabled: Optional[bool] = None):
+        if settings.DB_CACHE_ENABLED if cache_enabled is None else cache_enabled:
+            self.cache: Optional[DocumentCache] = DocumentCache(settings.DB_CACHE_TTLS, settings.DB_CACHE_MAX_ENTRIES)
+        else:
+            self.cache = None
+
+    def close(self):
+        """Release resources held by the backend"""
+
+    def _cached(self, collection: str) -> bool:
+        return self.cache is not None and self.cache.is_cached(collection)
+
+    def _invalidate(self, collection: str, document_id: Optional[str] = None):
+        if self.cache is not None:
+            self.cache.invalidate(collection, document_id)
+
+    def failure_reason(self, error: BaseException) -> str:
+        """Classify a failed write as ``not_found``, ``unavailable`` or ``error``"""
+        if isinstance(error, self.not_found_errors):
+            return "not_found"
+        if isinstance(error, DatabaseUnavailableError):
+            return "unavailable"
+        return "error"
+
+    # Backend primitives
+
+    @abstractmethod
+    async def _get_uncached(
+        self,
+        collection: str,
+        document_id: str,
+        fields: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def _get_many_uncached(
+        self,
+        keys: List[DocumentKey],
+        fields: Optional[List[str]] = None
+    ) -> Dict[DocumentKey, Optional[Dict[str, Any]]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def _query(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def create_document(
+        self,
+        collection: str,
+        data: Dict[str, Any],
+        document_id: Optional[str] = None
+    ) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_document(self, collection: str, document_id: str, data: Dict[str, Any]) -> bool:
+        """Update an existing document; False if it does not exist, other failures raise"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def transactional_update(
+        self,
+        collection: str,
+        document_id: str,
+        update_fn: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_document(self, collection: str, document_id: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def aggregate(
+        self,
+        collection: str,
+        aggregations: List[Dict[str, str]],
+        filters: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def query_page(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        order_by: Optional[str] = None,
+        page_size: Optional[int] = None,
+        page_token: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def query_iter(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        order_by: Optional[str] = None,
+        batch_size: int = 500,
+        fields: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def bulk_write(
+        self,
+        operations: List[Dict[str, Any]],
+        max_concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    # Shared behaviour
+
+    async def get_document(
+        self,
+        collection: str,
+        document_id: str,
+        fields: Optional[List[str]] = None,
+        cached: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """Get a document by ID.
+
+        Served from the read-through cache when the collection has a TTL.
+        Otherwise, inside a request's batching scope, the read is coalesced
+        with every other ``get_document`` issued in the same loop tick.
+        With ``fields`` only those field paths (plus ``id``) are returned.
+        With ``cached=False`` the cache is skipped (for reads that enforce
+        limits) and refreshed with the result.
+        """
+        try:
+            generation = None
+            if self._cached(collection):
+                if cached:
+                    hit, document = self.cache.get_document(collection, document_id)
+                    if hit:
+                        return project(document, fields) if document and fields else document
+                generation = self.cache.generation(collection)
+
+            if fields:
+                # Partial documents are never cached or shared with the loader
+                return await self._get_uncached(collection, document_id, fields)
+
+            loader = loader_for(self, self._get_many_uncached) if self.batch_reads else None
+            if loader is not None:
+                document = await loader.load(collection, document_id)
+            else:
+                document = await self._get_uncached(collection, document_id)
+
+            if generation is not None:
+                self.cache.set_document(collection, document_id, document, generation)
+            return document
+        except Exception as e:
+            logger.error(f"Failed to get document {document_id} from {collection}: {e}")
+            raise
+
+    async def get_many(
+        self,
+        keys: List[DocumentKey],
+        fields: Optional[List[str]] = None
+    ) -> Dict[DocumentKey, Optional[Dict[str, Any]]]:
+        """Get documents from any collections, keyed by ``(collection, document_id)``"""
+        keys = list(dict.fromkeys(keys))
+        documents: Dict[DocumentKey, Optional[Dict[str, Any]]] = {}
+        generations: Dict[str, int] = {}
+
+        misses = []
+        for collection, document_id in keys:
+            if self._cached(collection):
+                hit, document = self.cache.get_document(collection, document_id)
+                if hit:
+                    documents[(collection, document_id)] = project(document, fields) if document and fields else document
+                    continue
+                generations.setdefault(collection, self.cache.generation(collection))
+            misses.append((collection, document_id))
+
+        if misses:
+            fetched = await self._get_many_uncached(misses, fields)
+            if not fields:
+                for (collection, document_id), document in fetched.items():
+                    if collection in generations:
+                        self.cache.set_document(collection, document_id, document, generations[collection])
+            documents.update(fetched)
+
+        return documents
+
+    async def get_documents(
+        self,
+        collection: str,
+        document_ids: List[str],
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get several documents from one collection in a single round-trip.
+
+        Args:
+            collection: Collection name
+            document_ids: Document IDs to fetch
+            fields: Optional field paths to project
+
+        Returns:
+            Dict mapping each requested ID to its document, or None if missing
+        """
+        documents = await self.get_many([(collection, document_id) for document_id in document_ids], fields)
+        return {document_id: documents[(collection, document_id)] for document_id in document_ids}
+
+    async def increment(
+        self,
+        collection: str,
+        document_id: str,
+        increments: Dict[str, Union[int, float]],
+        data: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Atomically add to numeric fields in a single write.
+
+        Increments are applied by the backend, so concurrent callers never
+        lose each other's updates and no read is needed.
+
+        Args:
+            collection: Collection name
+            document_id: Document ID (the document must exist)
+            increments: Field paths mapped to the amount to add
+            data: Optional plain field updates applied in the same write
+
+        Returns:
+            Success status
+        """
+        update = {**(data or {}), **{field: Increment(amount) for field, amount in increments.items()}}
+        return await self.update_document(collection, document_id, update)
+
+    async def query_collection(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Query a collection with filters.
+
+        ``fields`` projects the results to the given field paths, so unused
+        fields are neither transferred nor decoded. ``offset`` is honoured
+        but still scans every skipped document; prefer :meth:`query_page`
+        for paging.
+        """
+        try:
+            cache_key = generation = None
+            if self._cached(collection):
+                cache_key = self.cache.query_key(
+                    filters=filters, order_by=order_by, limit=limit, offset=offset, fields=fields
+                )
+                cached = self.cache.get_query(collection, cache_key)
+                if cached is not None:
+                    return cached
+                generation = self.cache.generation(collection)
+
+            results = await self._query(collection, filters, order_by, limit, offset, fields)
+
+            if cache_key is not None:
+                self.cache.set_query(collection, cache_key, results, generation)
+            return results
+        except Exception as e:
+            logger.error(f"Failed to query collection {collection}: {e}")
+            raise
+
+    async def count(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]] = None
+    ) -> int:
+        """Count documents matching a query without reading them"""
+        result = await self.aggregate(collection, [{"type": "count"}], filters)
+        return int(result.get("count", 0))
+
+    async def batch_write(self, operations: List[Dict[str, Any]]) -> bool:
+        """Perform batch write operations.
+
+        Writes are committed through :meth:`bulk_write`, so lists above the
+        500-write Firestore limit are accepted; atomicity holds per batch.
+        """
+        try:
+            result = await self.bulk_write(operations)
+            return result["success"]
+        except Exception as e:
+            logger.error(f"Failed to perform batch write: {e}")
+            return False
@@ -0,0 +1,332 @@
+"""
+Latency and document-count instrumentation for the database backends.
+
+Every backend primitive is wrapped with :func:`instrumented`, which records
+into the global :data:`db_metrics`:
+
+* a latency histogram per ``(collection, operation)``
+* documents read and written, and errors
+* a slow-query log entry (and warning) for calls slower than
+  ``DB_SLOW_QUERY_MS``, with the query's filter shape but never its values
+
+Calls made while a request is being handled are also added to that request's
+:class:`RequestDbStats` (see :func:`request_scope`), which the request-context
+middleware reports per endpoint and in response headers.
+"""
+
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+import functools
+import inspect
+import logging
+import time
+from app.core.config import settings
+from app.core.query_shapes import query_shapes
+
+logger = logging.getLogger(__name__)
+
+# Operations whose filters and ordering are recorded as query shapes
+SHAPED_OPERATIONS = {"query", "page", "stream", "aggregate"}
+
+# Upper bounds of the latency buckets, in milliseconds
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+
+
+def _reads(operation: str, arguments: Dict[str, Any], result: Any) -> int:
+    """Documents billed as read by an operation"""
+    if operation == "get":
+        return 1
+    if operation == "get_many":
+        return len(arguments.get("keys") or ())
+    if operation == "query":
+        return len(result)
+    if operation == "page":
+        return len(result["items"])
+    if operation in ("aggregate", "transaction"):
+        return 1
+    return 0
+
+
+def _writes(operation: str, arguments: Dict[str, Any], result: Any) -> int:
+    """Documents written by an operation"""
+    if operation in ("create", "delete"):
+        return 1
+    if operation == "update":
+        return 1 if result else 0
+    if operation == "transaction":
+        return 1 if result is not None else 0
+    if operation == "bulk_write":
+        return result["written"]
+    return 0
+
+
+def _collection(arguments: Dict[str, Any]) -> str:
+    if arguments.get("collection"):
+        return arguments["collection"]
+    names = {key[0] for key in arguments.get("keys") or ()}
+    names |= {op.get("collection") for op in arguments.get("operations") or ()}
+    return names.pop() if len(names) == 1 else "(multiple)"
+
+
+def filter_shape(arguments: Dict[str, Any]) -> Optional[str]:
+    """Describe a query without its values, e.g. ``exam_type == ? AND difficulty in ? ORDER BY -created_at``"""
+    filters = arguments.get("filters") or []
+    parts = [" AND ".join(f"{f.get('field')} {f.get('operator', '==')} ?" for f in filters)] if filters else []
+    if arguments.get("order_by"):
+        parts.append(f"ORDER BY {arguments['order_by']}")
+    for name in ("limit", "page_size", "batch_size"):
+        if arguments.get(name):
+            parts.append(f"{name.upper().replace('_', ' ')} {arguments[name]}")
+    aggregations = arguments.get("aggregations")
+    if aggregations:
+        parts.insert(0, ", ".join(spec.get("type", "?") for spec in aggregations))
+    return " ".join(parts) or None
+
+
+class RequestDbStats:
+    """Database usage attributed to one request"""
+
+    __slots__ = ("calls", "reads", "writes", "seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.reads = 0
+        self.writes = 0
+        self.seconds = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "reads": self.reads,
+            "writes": self.writes,
+            "time_ms": round(self.seconds * 1000, 3)
+        }
+
+
+_request_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+@contextmanager
+def request_scope() -> Iterator[RequestDbStats]:
+    """Attribute database calls made in this context to a new ``RequestDbStats``"""
+    stats = RequestDbStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "sum", "max", "reads", "writes", "errors")
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS_MS)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.reads = 0
+        self.writes = 0
+        self.errors = 0
+
+    def observe(self, milliseconds: float):
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if milliseconds <= bound:
+                self.counts[i] += 1
+                break
+        self.total += 1
+        self.sum += milliseconds
+        self.max = max(self.max, milliseconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return self.max if bound == float("inf") else bound
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.total,
+            "errors": self.errors,
+            "documents_read": self.reads,
+            "documents_written": self.writes,
+            "mean_ms": round(self.sum / self.total, 3) if self.total else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max, 3),
+            "buckets": {
+                ("+Inf" if bound == float("inf") else str(bound)): count
+                for bound, count in zip(LATENCY_BUCKETS_MS, self.counts)
+            }
+        }
+
+
+class DatabaseMetrics:
+    """Process-wide database call statistics"""
+
+    def __init__(self, slow_query_ms: Optional[float] = None, slow_log_size: int = 100):
+        self.slow_query_ms = settings.DB_SLOW_QUERY_MS if slow_query_ms is None else slow_query_ms
+        self._operations: Dict[Tuple[str, str], _Histogram] = {}
+        self._endpoints: Dict[str, Dict[str, float]] = {}
+        self._slow: deque = deque(maxlen=slow_log_size)
+
+    def record(
+        self,
+        collection: str,
+        operation: str,
+        seconds: float,
+        reads: int = 0,
+        writes: int = 0,
+        error: bool = False,
+        shape: Optional[str] = None
+    ):
+        histogram = self._operations.get((collection, operation))
+        if histogram is None:
+            histogram = self._operations[(collection, operation)] = _Histogram()
+        milliseconds = seconds * 1000
+        histogram.observe(milliseconds)
+        histogram.reads += reads
+        histogram.writes += writes
+        histogram.errors += error
+
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.calls += 1
+            stats.reads += reads
+            stats.writes += writes
+            stats.seconds += seconds
+
+        if milliseconds >= self.slow_query_ms:
+            entry = {
+                "collection": collection,
+                "operation": operation,
+                "duration_ms": round(milliseconds, 3),
+                "documents_read": reads,
+                "shape": shape,
+                "at": time.time()
+            }
+            self._slow.append(entry)
+            logger.warning(
+                f"Slow {operation} on {collection}: {milliseconds:.1f}ms, {reads} read"
+                + (f" [{shape}]" if shape else "")
+            )
+
+    def record_request(self, endpoint: str, stats: RequestDbStats):
+        """Add one finished request's database usage to its endpoint's totals"""
+        totals = self._endpoints.setdefault(
+            endpoint, {"requests": 0, "calls": 0, "reads": 0, "writes": 0, "time_ms": 0.0}
+        )
+        totals["requests"] += 1
+        totals["calls"] += stats.calls
+        totals["reads"] += stats.reads
+        totals["writes"] += stats.writes
+        totals["time_ms"] += stats.seconds * 1000
+
+    def reset(self):
+        self._operations.clear()
+        self._endpoints.clear()
+        self._slow.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Histograms per collection/operation, per-endpoint totals and recent slow calls"""
+        operations: Dict[str, Dict[str, Any]] = {}
+        for (collection, operation), histogram in sorted(self._operations.items()):
+            operations.setdefault(collection, {})[operation] = histogram.as_dict()
+        return {
+            "slow_query_ms": self.slow_query_ms,
+            "collections": operations,
+            "endpoints": {
+                endpoint: {**totals, "time_ms": round(totals["time_ms"], 3)}
+                for endpoint, totals in sorted(self._endpoints.items(), key=lambda item: -item[1]["reads"])
+            },
+            "slow_queries": list(self._slow)
+        }
+
+
+# Global metrics registry
+db_metrics = DatabaseMetrics()
+
+
+def instrumented(operation: str) -> Callable:
+    """
+    Record latency, document counts and slow calls for a backend method.
+
+    Works on coroutines and on async generators (``query_iter``); for the
+    latter only time spent fetching is counted, not time spent by the
+    consumer between items. Queries are also recorded in the query-shape
+    registry before they run, so shapes that fail (e.g. for want of an index)
+    are still seen.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        def bind(args: Tuple, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+            arguments = signature.bind(*args, **kwargs).arguments
+            if operation in SHAPED_OPERATIONS:
+                query_shapes.record(
+                    _collection(arguments), arguments.get("filters"), arguments.get("order_by"), operation
+                )
+            return arguments
+
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def stream(*args, **kwargs):
+                arguments = bind(args, kwargs)
+                iterator = func(*args, **kwargs)
+                seconds, count, error = 0.0, 0, False
+                try:
+                    while True:
+                        start = time.perf_counter()
+                        try:
+                            item = await iterator.__anext__()
+                        except StopAsyncIteration:
+                            break
+                        finally:
+                            seconds += time.perf_counter() - start
+                        count += 1
+                        yield item
+                except BaseException as e:
+                    error = not isinstance(e, GeneratorExit)
+                    raise
+                finally:
+                    await iterator.aclose()
+                    db_metrics.record(
+                        _collection(arguments), operation, seconds, reads=count, error=error,
+                        shape=filter_shape(arguments)
+                    )
+            return stream
+
+        @functools.wraps(func)
+        async def call(*args, **kwargs):
+            arguments = bind(args, kwargs)
+            start = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception:
+                db_metrics.record(
+                    _collection(arguments), operation, time.perf_counter() - start, error=True,
+                    shape=filter_shape(arguments)
+                )
+                raise
+            db_metrics.record(
+                _collection(arguments),
+                operation,
+                time.perf_counter() - start,
+                reads=_reads(operation, arguments, result),
+                writes=_writes(operation, arguments, result),
+                # update_document reports failure by returning False
+                error=result is False,
+                shape=filter_shape(arguments)
+            )
+            return result
+        return call
+    return decorator
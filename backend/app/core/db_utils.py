@@ -0,0 +1,192 @@
+"""
+Backend-neutral helpers shared by the database client.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, Union
+from datetime import datetime, timezone
+import base64
+import copy
+import json
+import random
+
+from app.core.exceptions import ValidationError
+
+
+class Increment:
+    """Write sentinel: add ``amount`` to the stored numeric field."""
+
+    __slots__ = ("amount",)
+
+    def __init__(self, amount: Union[int, float]):
+        self.amount = amount
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Increment) and other.amount == self.amount
+
+    def __repr__(self) -> str:
+        return f"Increment({self.amount})"
+
+
+def utc_naive(value: datetime) -> datetime:
+    """``value`` as a naive UTC datetime; Firestore and SQLite return stored timestamps tz-aware."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def resolve_value(value: Any, current: Any = None) -> Any:
+    """Value to store for ``value`` written over ``current`` (applies ``Increment``)."""
+    if isinstance(value, Increment):
+        numeric = isinstance(current, (int, float)) and not isinstance(current, bool)
+        return current + value.amount if numeric else value.amount
+    if isinstance(value, dict):
+        return {key: resolve_value(item) for key, item in value.items()}
+    return copy.deepcopy(value)
+
+
+def apply_update(document: Dict[str, Any], data: Dict[str, Any]):
+    """Apply an update in place: dotted keys are field paths, dicts replace whole fields."""
+    for field_path, value in data.items():
+        *parents, leaf = field_path.split('.')
+        target = document
+        for part in parents:
+            child = target.get(part)
+            if not isinstance(child, dict):
+                child = target[part] = {}
+            target = child
+        target[leaf] = resolve_value(value, target.get(leaf))
+
+
+def _encode_value(value: Any) -> Any:
+    """Make a cursor value JSON-safe, tagging datetimes so they round-trip."""
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+
+def parse_order_by(order_by: Optional[str]) -> Tuple[Optional[str], bool]:
+    """Split an ``order_by`` spec like ``-created_at`` into (field, descending)."""
+    if not order_by:
+        return None, False
+    if order_by.startswith('-'):
+        return order_by[1:], True
+    return order_by, False
+
+
+def encode_page_token(values: List[Any], document_id: str) -> str:
+    """
+    Encode a pagination cursor.
+
+    Args:
+        values: Values of the ordered fields on the last document of the page
+        document_id: ID of the last document, used as the tie-breaker
+
+    Returns:
+        Opaque URL-safe token
+    """
+    payload = {"v": [_encode_value(v) for v in values], "id": document_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_page_token(token: str) -> Tuple[List[Any], str]:
+    """Decode a token produced by :func:`encode_page_token`."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return [_decode_value(v) for v in payload["v"]], payload["id"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValidationError("Invalid page token") from e
+
+
+def page_token_for(document: Dict[str, Any], order_field: Optional[str]) -> str:
+    """Build the token that resumes a query right after ``document``."""
+    values = [get_field(document, order_field)] if order_field else []
+    return encode_page_token(values, document["id"])
+
+
+def get_field(document: Dict[str, Any], field_path: str) -> Any:
+    """Resolve a dotted field path (``performance_stats.total_attempts``)."""
+    value: Any = document
+    for part in field_path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def project(document: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """Keep only ``fields`` (dotted paths allowed) and the document ``id``."""
+    projected: Dict[str, Any] = {}
+    for field_path in fields:
+        parts = field_path.split('.')
+        value = get_field(document, field_path)
+        if value is None and not _has_field(document, parts):
+            continue
+        target = projected
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    if "id" in document:
+        projected["id"] = document["id"]
+    return projected
+
+
+def _has_field(document: Dict[str, Any], parts: List[str]) -> bool:
+    value: Any = document
+    for part in parts:
+        if not isinstance(value, dict) or part not in value:
+            return False
+        value = value[part]
+    return True
+
+
+def aggregation_alias(spec: Dict[str, str]) -> str:
+    """Default result key for an aggregation spec (``count``, ``sum_<field>``)."""
+    if spec.get('type') == 'count':
+        return "count"
+    return f"{spec.get('type')}_{spec.get('field', '').replace('.', '_')}"
+
+
+def chunk_operations(
+    operations: List[Tuple[int, Dict[str, Any]]],
+    max_size: int
+) -> List[List[Tuple[int, Dict[str, Any]]]]:
+    """
+    Split indexed write operations into batches of at most ``max_size``.
+
+    All operations on the same document are kept together and in their
+    original order, so batches can be committed concurrently without
+    reordering writes to any single document.
+    """
+    groups: Dict[Tuple[str, str], List[Tuple[int, Dict[str, Any]]]] = {}
+    for item in operations:
+        _, op = item
+        groups.setdefault((op.get('collection'), op.get('document_id')), []).append(item)
+
+    chunks: List[List[Tuple[int, Dict[str, Any]]]] = []
+    current: List[Tuple[int, Dict[str, Any]]] = []
+    for group in groups.values():
+        if current and len(current) + len(group) > max_size:
+            chunks.append(current)
+            current = []
+        # A single document with more writes than fit in one batch has to be
+        # split; ordering across those batches is not guaranteed.
+        while len(group) > max_size:
+            chunks.append(group[:max_size])
+            group = group[max_size:]
+        current.extend(group)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def backoff_delay(attempt: int, base: float = 0.2, cap: float = 5.0) -> float:
+    """Full-jitter exponential backoff delay for the given retry attempt."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
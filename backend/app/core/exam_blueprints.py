@@ -0,0 +1,200 @@
+"""
+Centralized configuration for simulated real exam (SRE) blueprints.
+
+A blueprint fixes how many questions each subject contributes to a paper and
+how each subject's share splits by topic, difficulty and ARDE probability.
+Mixes are relative weights; :func:`expand_blueprint` turns a blueprint into
+strata (one per subject x topic x difficulty x ARDE cell) with whole-number
+quotas that add up exactly to the paper length.
+"""
+
+from typing import Any, Dict, List, Optional
+import copy
+
+from app.core.exceptions import ValidationError
+
+DIFFICULTIES = ["easy", "medium", "hard"]
+ARDE_PROBABILITIES = ["high", "medium", "low"]
+
+# Limits on client-supplied blueprints. Every stratum has a quota of at least
+# one, so the question cap also bounds the assembly fan-out.
+MAX_BLUEPRINT_QUESTIONS = 250
+MAX_BLUEPRINT_SECTIONS = 10
+MAX_SECTION_TOPICS = 20
+MAX_EXAM_MINUTES = 240
+
+# Used by sections that do not set their own mix
+DEFAULT_DIFFICULTY_MIX = {"easy": 0.3, "medium": 0.5, "hard": 0.2}
+DEFAULT_ARDE_MIX = {"high": 0.5, "medium": 0.3, "low": 0.2}
+
+# Official paper patterns. Sections may also set "topics" (topic -> weight),
+# "difficulty" and "arde_probability" mixes.
+EXAM_BLUEPRINTS = {
+    "ECAT": {
+        "question_count": 100,
+        "time_minutes": 100,
+        "sections": [
+            {"subject": "mathematics", "question_count": 30},
+            {"subject": "physics", "question_count": 30},
+            {"subject": "chemistry", "question_count": 30},
+            {"subject": "english", "question_count": 10},
+        ]
+    },
+    "MCAT": {
+        "question_count": 200,
+        "time_minutes": 150,
+        "sections": [
+            {"subject": "biology", "question_count": 68},
+            {"subject": "chemistry", "question_count": 54},
+            {"subject": "physics", "question_count": 54},
+            {"subject": "english", "question_count": 18},
+            {"subject": "logical_reasoning", "question_count": 6},
+        ]
+    },
+    "CCAT": {
+        "question_count": 80,
+        "time_minutes": 90,
+        "sections": [
+            {"subject": "verbal", "question_count": 28},
+            {"subject": "quantitative", "question_count": 28},
+            {"subject": "logical_reasoning", "question_count": 24},
+        ]
+    },
+    "SAT": {
+        "question_count": 154,
+        "time_minutes": 180,
+        "sections": [
+            {"subject": "reading", "question_count": 52},
+            {"subject": "writing", "question_count": 44},
+            {"subject": "mathematics", "question_count": 58},
+        ]
+    },
+    "GMAT": {
+        "question_count": 80,
+        "time_minutes": 210,
+        "sections": [
+            {"subject": "quantitative", "question_count": 31},
+            {"subject": "verbal", "question_count": 36},
+            {"subject": "integrated_reasoning", "question_count": 12},
+            {"subject": "analytical_writing", "question_count": 1},
+        ]
+    },
+    "GRE": {
+        "question_count": 80,
+        "time_minutes": 180,
+        "sections": [
+            {"subject": "verbal", "question_count": 40},
+            {"subject": "quantitative", "question_count": 40},
+        ]
+    },
+}
+
+
+# Marks per answer outcome; exam types not listed score one mark per correct answer
+DEFAULT_MARKING = {"correct": 1.0, "incorrect": 0.0, "unanswered": 0.0}
+EXAM_MARKING = {
+    "ECAT": {"correct": 4.0, "incorrect": -1.0, "unanswered": 0.0},
+}
+
+
+def get_marking(exam_type: Optional[str]) -> Dict[str, float]:
+    """Get the marking scheme for an exam type."""
+    return dict(EXAM_MARKING.get(exam_type, DEFAULT_MARKING))
+
+
+def get_blueprint(exam_type: str) -> Optional[Dict[str, Any]]:
+    """Get a copy of the blueprint for an exam type, or None if unsupported."""
+    blueprint = EXAM_BLUEPRINTS.get(exam_type)
+    return copy.deepcopy(blueprint) if blueprint is not None else None
+
+
+def apportion(total: int, weights: Dict[str, float]) -> Dict[str, int]:
+    """Split ``total`` in proportion to ``weights`` (largest remainder method)."""
+    positive = {key: weight for key, weight in weights.items() if weight > 0}
+    weight_sum = sum(positive.values())
+    if total <= 0 or not weight_sum:
+        return {}
+    exact = {key: total * weight / weight_sum for key, weight in positive.items()}
+    shares = {key: int(value) for key, value in exact.items()}
+    leftover = total - sum(shares.values())
+    for key in sorted(exact, key=lambda key: shares[key] - exact[key])[:leftover]:
+        shares[key] += 1
+    return {key: share for key, share in shares.items() if share}
+
+
+def _check_mix(mix: Any, allowed: Optional[List[str]], name: str):
+    if not isinstance(mix, dict) or not mix or not all(
+        isinstance(weight, (int, float)) and weight >= 0 for weight in mix.values()
+    ) or not sum(mix.values()):
+        raise ValidationError(f"{name} must map values to non-negative weights")
+    if allowed is not None and not set(mix) <= set(allowed):
+        raise ValidationError(f"{name} keys must be among: {', '.join(allowed)}")
+
+
+def check_time_minutes(value: Any, limit: int = MAX_EXAM_MINUTES) -> int:
+    """Check that an exam length is a whole number of minutes in 1..``limit``."""
+    if not isinstance(value, int) or isinstance(value, bool) or not 0 < value <= limit:
+        raise ValidationError(f"time_minutes must be a whole number from 1 to {limit}")
+    return value
+
+
+def validate_blueprint(blueprint: Dict[str, Any], max_time_minutes: int = MAX_EXAM_MINUTES) -> Dict[str, Any]:
+    """Check a blueprint's structure, its size limits and that section counts add up."""
+    sections = blueprint.get("sections") if isinstance(blueprint, dict) else None
+    if not sections or not isinstance(sections, list):
+        raise ValidationError("Blueprint needs a non-empty list of sections")
+    if len(sections) > MAX_BLUEPRINT_SECTIONS:
+        raise ValidationError(f"A blueprint can have at most {MAX_BLUEPRINT_SECTIONS} sections")
+
+    for section in sections:
+        if not isinstance(section, dict) or not section.get("subject"):
+            raise ValidationError("Every section needs a subject")
+        count = section.get("question_count")
+        if not isinstance(count, int) or isinstance(count, bool) or count <= 0:
+            raise ValidationError(f"Section {section['subject']} needs a positive question_count")
+        if "topics" in section:
+            _check_mix(section["topics"], None, f"Section {section['subject']} topics")
+            if len(section["topics"]) > MAX_SECTION_TOPICS:
+                raise ValidationError(f"Section {section['subject']} can have at most {MAX_SECTION_TOPICS} topics")
+        if "difficulty" in section:
+            _check_mix(section["difficulty"], DIFFICULTIES, f"Section {section['subject']} difficulty")
+        if "arde_probability" in section:
+            _check_mix(section["arde_probability"], ARDE_PROBABILITIES, f"Section {section['subject']} arde_probability")
+
+    total = sum(section["question_count"] for section in sections)
+    if total > MAX_BLUEPRINT_QUESTIONS:
+        raise ValidationError(f"A blueprint can have at most {MAX_BLUEPRINT_QUESTIONS} questions")
+    if blueprint.get("question_count", total) != total:
+        raise ValidationError(f"Section counts add up to {total}, not {blueprint['question_count']}")
+    if "time_minutes" in blueprint:
+        check_time_minutes(blueprint["time_minutes"], max_time_minutes)
+    return {**blueprint, "question_count": total}
+
+
+def expand_blueprint(exam_type: str, blueprint: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Break a blueprint into strata with whole-number quotas.
+
+    Returns:
+        List of dicts with ``section`` (index), ``criteria`` (question index
+        criteria: exam_type, subject, topic, difficulty, arde_probability)
+        and ``quota``
+    """
+    strata = []
+    for position, section in enumerate(blueprint["sections"]):
+        topics = apportion(section["question_count"], section["topics"]) if section.get("topics") else {None: section["question_count"]}
+        for topic, topic_count in topics.items():
+            for difficulty, difficulty_count in apportion(topic_count, section.get("difficulty", DEFAULT_DIFFICULTY_MIX)).items():
+                for arde, quota in apportion(difficulty_count, section.get("arde_probability", DEFAULT_ARDE_MIX)).items():
+                    strata.append({
+                        "section": position,
+                        "criteria": {
+                            "exam_type": exam_type,
+                            "subject": section["subject"],
+                            "topic": topic,
+                            "difficulty": difficulty,
+                            "arde_probability": arde
+                        },
+                        "quota": quota
+                    })
+    return strata
@@ -51,4 +51,8 @@ class FileUploadError(ETGException):
 
 class DatabaseError(ETGException):
     """Database operation error"""
-    message = "Database operation failed"
\ No newline at end of file
+    message = "Database operation failed"
+
+class DatabaseUnavailableError(DatabaseError):
+    """Database unreachable, too slow for the request deadline, or circuit open"""
+    message = "Database is temporarily unavailable"
@@ -101,6 +101,18 @@ USAGE_FIELDS = {
     ]
 }
 
+# Usage counter behind each limited feature
+FEATURE_USAGE_FIELDS = {
+    "daily": {
+        "practice_mcqs": "practice_mcqs_today",
+        "explanations": "explanations_used_today",
+    },
+    "total": {
+        "sprint_exams": "sprint_exams_used",
+        "simulated_exams": "simulated_exams_used",
+    }
+}
+
 # Error messages for limit exceeded scenarios
 ERROR_MESSAGES = {
     "daily_limit_exceeded": "Daily limit exceeded for {feature}. Reset at {reset_time}.",
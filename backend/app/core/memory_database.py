@@ -0,0 +1,500 @@
+"""
+In-process implementation of the database interface.
+
+Documents live in plain dicts, so the whole app (and its tests, load tests and
+benchmarks) can run without Firebase at memory speed. Query semantics follow
+Firestore where they are observable by callers:
+
+* filters support ``==``, ``!=``, ``<``, ``<=``, ``>``, ``>=``, ``in``,
+  ``not-in``, ``array-contains`` and ``array-contains-any``; a filter or
+  ``order_by`` on a field excludes documents that do not have it
+* values of different types never compare equal and sort in Firestore's type
+  order (null, booleans, numbers, timestamps, strings, ...)
+* ties are broken by document ID, in the direction of the last ordering
+
+Equality and ``in`` filters on fields listed in ``MEMORY_DB_INDEXES`` are
+answered from hash indexes instead of a collection scan.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+import asyncio
+import copy
+import logging
+import uuid
+from app.core.config import settings
+from app.core.db_base import BaseDatabase, DocumentKey
+from app.core.db_metrics import instrumented
+from app.core.db_utils import (
+    aggregation_alias, apply_update, decode_page_token, get_field, page_token_for, parse_order_by, project,
+    resolve_value
+)
+from app.core.exceptions import ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Firestore's cross-type ordering
+_TYPE_RANKS = {type(None): 0, bool: 1, int: 2, float: 2, datetime: 3, str: 4, bytes: 5, list: 8, dict: 9}
+_UNHASHABLE = object()
+_ABSENT = object()
+
+
+def _rank(value: Any) -> int:
+    return _TYPE_RANKS.get(type(value), 6)
+
+
+def _sort_key(value: Any) -> Tuple:
+    """Total order over field values, matching Firestore's ordering"""
+    rank = _rank(value)
+    if rank == 3 and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    elif rank == 8:
+        value = tuple(_sort_key(item) for item in value)
+    elif rank == 9:
+        value = tuple(sorted((key, _sort_key(item)) for key, item in value.items()))
+    elif rank == 6:
+        value = repr(value)
+    return rank, value
+
+
+def _equal(left: Any, right: Any) -> bool:
+    return _rank(left) == _rank(right) and _sort_key(left) == _sort_key(right)
+
+
+def _index_key(value: Any) -> Hashable:
+    """Hash-index bucket for a value; booleans are kept apart from 0 and 1"""
+    try:
+        hash(value)
+    except TypeError:
+        return _UNHASHABLE
+    if isinstance(value, datetime):
+        return _sort_key(value)
+    return (type(value) is bool, value)
+
+
+def _lookup(document: Dict[str, Any], field_path: str) -> Any:
+    value: Any = document
+    for part in field_path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return _ABSENT
+        value = value[part]
+    return value
+
+
+def _matches(value: Any, operator: str, expected: Any) -> bool:
+    if value is _ABSENT:
+        return False
+    if operator == '==':
+        return _equal(value, expected)
+    if operator == '!=':
+        return value is not None and not _equal(value, expected)
+    if operator == 'in':
+        return any(_equal(value, item) for item in expected)
+    if operator == 'not-in':
+        return value is not None and not any(_equal(value, item) for item in expected)
+    if operator == 'array-contains':
+        return isinstance(value, list) and any(_equal(item, expected) for item in value)
+    if operator == 'array-contains-any':
+        return isinstance(value, list) and any(_equal(item, other) for item in value for other in expected)
+    if _rank(value) != _rank(expected):
+        return False
+    left, right = _sort_key(value), _sort_key(expected)
+    if operator == '<':
+        return left < right
+    if operator == '<=':
+        return left <= right
+    if operator == '>':
+        return left > right
+    return left >= right
+
+
+_OPERATORS = {'==', '!=', '<', '<=', '>', '>=', 'in', 'not-in', 'array-contains', 'array-contains-any'}
+
+
+class MemoryDatabase(BaseDatabase):
+    """Dict-backed database with Firestore query semantics and secondary indexes"""
+
+    # Reads cost no round-trip, so there is nothing to coalesce
+    batch_reads = False
+
+    def __init__(
+        self,
+        indexes: Optional[Dict[str, List[str]]] = None,
+        cache_enabled: bool = False
+    ):
+        super().__init__(cache_enabled)
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._index_fields: Dict[str, List[str]] = {
+            collection: list(fields)
+            for collection, fields in (settings.MEMORY_DB_INDEXES if indexes is None else indexes).items()
+        }
+        # collection -> field -> bucket -> document IDs
+        self._indexes: Dict[str, Dict[str, Dict[Hashable, Set[str]]]] = {}
+
+    def load(self, collection: str, documents: Dict[str, Dict[str, Any]]):
+        """Seed ``collection`` with documents keyed by ID (fixtures, benchmarks)"""
+        for document_id, data in documents.items():
+            self._put(collection, document_id, data)
+        self._invalidate(collection)
+
+    def clear(self):
+        """Drop every document"""
+        self._collections.clear()
+        self._indexes.clear()
+        if self.cache is not None:
+            self.cache.clear()
+
+    # Storage and indexes
+
+    def _documents(self, collection: str) -> Dict[str, Dict[str, Any]]:
+        return self._collections.setdefault(collection, {})
+
+    def _index_entries(self, collection: str, document: Dict[str, Any]) -> List[Tuple[str, Hashable]]:
+        entries = []
+        for field in self._index_fields.get(collection, ()):
+            value = _lookup(document, field)
+            if value is not _ABSENT:
+                entries.append((field, _index_key(value)))
+        return entries
+
+    def _reindex(
+        self,
+        collection: str,
+        document_id: str,
+        old: List[Tuple[str, Hashable]],
+        new: List[Tuple[str, Hashable]]
+    ):
+        if old == new:
+            return
+        indexes = self._indexes.setdefault(collection, {})
+        for field, key in old:
+            bucket = indexes.get(field, {}).get(key)
+            if bucket is not None:
+                bucket.discard(document_id)
+                if not bucket:
+                    del indexes[field][key]
+        for field, key in new:
+            indexes.setdefault(field, {}).setdefault(key, set()).add(document_id)
+
+    def _put(self, collection: str, document_id: str, data: Dict[str, Any]):
+        documents = self._documents(collection)
+        existing = documents.get(document_id)
+        old = self._index_entries(collection, existing) if existing is not None else []
+        document = resolve_value(data)
+        documents[document_id] = document
+        self._reindex(collection, document_id, old, self._index_entries(collection, document))
+
+    def _patch(self, collection: str, document_id: str, data: Dict[str, Any]):
+        document = self._documents(collection).get(document_id)
+        if document is None:
+            raise KeyError(f"No document to update: {collection}/{document_id}")
+        old = self._index_entries(collection, document)
+        apply_update(document, data)
+        self._reindex(collection, document_id, old, self._index_entries(collection, document))
+
+    def _remove(self, collection: str, document_id: str):
+        document = self._documents(collection).pop(document_id, None)
+        if document is not None:
+            self._reindex(collection, document_id, self._index_entries(collection, document), [])
+
+    @staticmethod
+    def _export(document_id: str, document: Dict[str, Any], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        data = copy.deepcopy(project(document, fields) if fields else document)
+        data['id'] = document_id
+        return data
+
+    @staticmethod
+    def _new_id() -> str:
+        return uuid.uuid4().hex[:20]
+
+    # Query planning
+
+    def _candidates(self, collection: str, filters: List[Dict[str, Any]]) -> Iterable[str]:
+        """IDs that can match, narrowed with the most selective indexed filter"""
+        indexes = self._indexes.get(collection, {})
+        best: Optional[Set[str]] = None
+        for filter_dict in filters:
+            field = filter_dict.get('field')
+            operator = filter_dict.get('operator', '==')
+            if field not in self._index_fields.get(collection, ()) or operator not in ('==', 'in'):
+                continue
+            values = filter_dict.get('value') if operator == 'in' else [filter_dict.get('value')]
+            index = indexes.get(field, {})
+            ids: Set[str] = set(index.get(_UNHASHABLE, ()))
+            for value in values:
+                ids |= index.get(_index_key(value), set())
+            if best is None or len(ids) < len(best):
+                best = ids
+        return self._documents(collection).keys() if best is None else best
+
+    def _select(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        order_by: Optional[str] = None
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Matching ``(id, document)`` pairs in query order (not copied)"""
+        filters = filters or []
+        for filter_dict in filters:
+            if filter_dict.get('operator', '==') not in _OPERATORS:
+                raise ValidationError(f"Unsupported filter operator: {filter_dict.get('operator')}")
+
+        documents = self._documents(collection)
+        matches = []
+        for document_id in self._candidates(collection, filters):
+            document = documents[document_id]
+            if all(
+                _matches(_lookup(document, f.get('field')), f.get('operator', '=='), f.get('value'))
+                for f in filters
+            ):
+                matches.append((document_id, document))
+
+        field, descending = parse_order_by(order_by)
+        if field:
+            matches = [(i, d) for i, d in matches if _lookup(d, field) is not _ABSENT]
+            matches.sort(key=lambda item: (_sort_key(_lookup(item[1], field)), item[0]), reverse=descending)
+        else:
+            matches.sort(key=lambda item: item[0])
+        return matches
+
+    # Reads
+
+    def _read(self, collection: str, document_id: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        document = self._documents(collection).get(document_id)
+        return self._export(document_id, document, fields) if document is not None else None
+
+    @instrumented("get")
+    async def _get_uncached(
+        self,
+        collection: str,
+        document_id: str,
+        fields: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        return self._read(collection, document_id, fields)
+
+    @instrumented("get_many")
+    async def _get_many_uncached(
+        self,
+        keys: List[DocumentKey],
+        fields: Optional[List[str]] = None
+    ) -> Dict[DocumentKey, Optional[Dict[str, Any]]]:
+        return {(collection, document_id): self._read(collection, document_id, fields) for collection, document_id in keys}
+
+    @instrumented("query")
+    async def _query(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        matches = self._select(collection, filters, order_by)
+        start = offset or 0
+        end = start + limit if limit else None
+        return [self._export(document_id, document, fields) for document_id, document in matches[start:end]]
+
+    @instrumented("aggregate")
+    async def aggregate(
+        self,
+        collection: str,
+        aggregations: List[Dict[str, str]],
+        filters: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Run count/sum/avg aggregations (see :meth:`FirestoreClient.aggregate`)"""
+        for spec in aggregations:
+            if spec.get('type') not in ('count', 'sum', 'avg') or (spec.get('type') != 'count' and not spec.get('field')):
+                raise ValidationError(f"Invalid aggregation: {spec}")
+
+        matches = self._select(collection, filters)
+        result: Dict[str, Any] = {}
+        for spec in aggregations:
+            alias = spec.get('alias') or aggregation_alias(spec)
+            if spec['type'] == 'count':
+                result[alias] = len(matches)
+                continue
+            values = [
+                value for value in (get_field(document, spec['field']) for _, document in matches)
+                if isinstance(value, (int, float)) and not isinstance(value, bool)
+            ]
+            if spec['type'] == 'sum':
+                result[alias] = sum(values)
+            else:
+                result[alias] = sum(values) / len(values) if values else None
+        return result
+
+    @instrumented("page")
+    async def query_page(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        order_by: Optional[str] = None,
+        page_size: Optional[int] = None,
+        page_token: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Fetch one page of a query (see :meth:`FirestoreClient.query_page`)"""
+        page_size = min(page_size or settings.DEFAULT_PAGE_SIZE, settings.MAX_PAGE_SIZE)
+        field, descending = parse_order_by(order_by)
+        matches = self._select(collection, filters, order_by)
+
+        if page_token:
+            values, last_id = decode_page_token(page_token)
+            cursor = (_sort_key(values[0]) if field else None, last_id)
+
+            def after(item: Tuple[str, Dict[str, Any]]) -> bool:
+                key = (_sort_key(_lookup(item[1], field)) if field else None, item[0])
+                return key < cursor if descending else key > cursor
+
+            matches = [item for item in matches if after(item)]
+
+        page = matches[:page_size]
+        next_token = None
+        if len(page) == page_size:
+            last_id, last = page[-1]
+            next_token = page_token_for({**last, "id": last_id}, field)
+
+        return {
+            "items": [self._export(document_id, document, fields) for document_id, document in page],
+            "next_page_token": next_token
+        }
+
+    @instrumented("stream")
+    async def query_iter(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        order_by: Optional[str] = None,
+        batch_size: int = 500,
+        fields: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream every document matching a query.
+
+        The match set is taken once up front; the loop yields control to
+        other tasks after every ``batch_size`` documents.
+        """
+        matches = self._select(collection, filters, order_by)
+        for start in range(0, len(matches), batch_size):
+            for document_id, document in matches[start:start + batch_size]:
+                yield self._export(document_id, document, fields)
+            await asyncio.sleep(0)
+
+    # Writes
+
+    @instrumented("create")
+    async def create_document(
+        self,
+        collection: str,
+        data: Dict[str, Any],
+        document_id: Optional[str] = None
+    ) -> str:
+        """Create (or overwrite) a document"""
+        document_id = document_id or self._new_id()
+        try:
+            self._put(collection, document_id, data)
+        finally:
+            self._invalidate(collection, document_id)
+        return document_id
+
+    @instrumented("update")
+    async def update_document(
+        self,
+        collection: str,
+        document_id: str,
+        data: Dict[str, Any]
+    ) -> bool:
+        """Update fields (dotted paths allowed) of an existing document; False if it is missing"""
+        try:
+            self._patch(collection, document_id, data)
+            return True
+        except KeyError:
+            return False
+        except Exception as e:
+            logger.error(f"Failed to update document {document_id} in {collection}: {e}")
+            raise
+        finally:
+            self._invalidate(collection, document_id)
+
+    @instrumented("transaction")
+    async def transactional_update(
+        self,
+        collection: str,
+        document_id: str,
+        update_fn: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Read-modify-write a document.
+
+        Nothing awaits between the read and the write, so the update is
+        atomic with respect to every other task on the event loop.
+        """
+        try:
+            document = self._documents(collection).get(document_id)
+            current = self._export(document_id, document) if document is not None else None
+            updates = update_fn(current)
+            if updates is None:
+                return None
+            if current is None:
+                self._put(collection, document_id, updates)
+            else:
+                self._patch(collection, document_id, updates)
+            return updates
+        finally:
+            self._invalidate(collection, document_id)
+
+    @instrumented("delete")
+    async def delete_document(self, collection: str, document_id: str) -> bool:
+        """Delete a document (deleting a missing document succeeds)"""
+        self._remove(collection, document_id)
+        self._invalidate(collection, document_id)
+        return True
+
+    @instrumented("bulk_write")
+    async def bulk_write(
+        self,
+        operations: List[Dict[str, Any]],
+        max_concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Apply write operations in order.
+
+        Accepts and returns the same shapes as
+        :meth:`FirestoreClient.bulk_write`. Each operation succeeds or fails
+        on its own; ``max_concurrency`` is accepted for compatibility.
+        """
+        results = []
+        for index, op in enumerate(operations):
+            operation_type = op.get('type')
+            collection = op.get('collection')
+            document_id = op.get('document_id') or (self._new_id() if operation_type == 'create' else None)
+            result = {"index": index, "collection": collection, "document_id": document_id, "success": False, "error": None, "reason": None}
+            try:
+                if operation_type == 'create':
+                    self._put(collection, document_id, op.get('data', {}))
+                elif operation_type == 'update':
+                    self._patch(collection, document_id, op.get('data', {}))
+                elif operation_type == 'delete':
+                    self._remove(collection, document_id)
+                else:
+                    raise ValueError(f"Unknown operation type: {operation_type}")
+                result["success"] = True
+            except Exception as e:
+                result["error"] = str(e)
+                result["reason"] = self.failure_reason(e)
+            finally:
+                if collection and document_id:
+                    self._invalidate(collection, document_id)
+            results.append(result)
+
+        failed = sum(1 for r in results if not r["success"])
+        if failed:
+            logger.error(f"Bulk write finished with {failed}/{len(operations)} failed operations")
+
+        return {
+            "success": failed == 0,
+            "written": len(operations) - failed,
+            "failed": failed,
+            "results": results
+        }
@@ -0,0 +1,276 @@
+"""
+Registry of query shapes and the Firestore composite indexes they need.
+
+Every query that reaches a backend (``query_collection`` misses,
+``query_page``, ``query_iter`` and aggregations such as ``count``) is recorded
+in :data:`query_shapes` as a *shape*: its collection, the fields it filters on
+grouped by operator kind, and its ordering. Values are never recorded.
+
+:func:`build_manifest` turns recorded shapes into a ``firestore.indexes.json``
+manifest and warns about shapes that:
+
+* need more composite indexes than is reasonable because optional equality
+  filters multiply (every subset needs its own index)
+* scan instead of seek (``!=``/``not-in`` in Firestore, filters on fields the
+  memory and SQLite backends do not index)
+* Firestore rejects outright (several array filters in one query)
+
+Shapes are collected by running the application with ``QUERY_SHAPES_PATH``
+set (or by saving ``GET /api/v1/metrics/query-shapes``) and fed to
+``tools/index_manifest.py``.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json
+import logging
+import os
+import time
+from app.core.config import settings
+from app.core.db_utils import parse_order_by
+
+logger = logging.getLogger(__name__)
+
+EQUALITY_OPERATORS = {"==", "in"}
+ARRAY_OPERATORS = {"array-contains", "array-contains-any"}
+NEGATION_OPERATORS = {"!=", "not-in"}
+
+# Composite indexes allowed per Firestore database
+FIRESTORE_COMPOSITE_INDEX_LIMIT = 200
+
+# Equality-filter combinations per ordering before index merging is suggested
+EXPLOSION_THRESHOLD = 4
+
+ShapeKey = Tuple[str, Tuple[str, ...], Tuple[str, ...], Tuple[Tuple[str, str], ...], Optional[str]]
+
+
+def shape_key(
+    collection: str,
+    filters: Optional[List[Dict[str, Any]]] = None,
+    order_by: Optional[str] = None
+) -> ShapeKey:
+    """
+    Normalize a query to ``(collection, equality, array, inequality, order_by)``.
+
+    Equality (``==``, ``in``) and array fields are sorted, since their order
+    does not affect which index serves the query; inequality filters keep
+    their operator.
+    """
+    equality, array, inequality = set(), set(), set()
+    for spec in filters or []:
+        field, operator = spec.get('field'), spec.get('operator', '==')
+        if operator in EQUALITY_OPERATORS:
+            equality.add(field)
+        elif operator in ARRAY_OPERATORS:
+            array.add(field)
+        else:
+            inequality.add((field, operator))
+    return (collection, tuple(sorted(equality)), tuple(sorted(array)), tuple(sorted(inequality)), order_by or None)
+
+
+def describe(key: ShapeKey) -> str:
+    """Readable form of a shape, e.g. ``questions: exam_type == ? ORDER BY -created_at``"""
+    collection, equality, array, inequality, order_by = key
+    clauses = [f"{field} == ?" for field in equality]
+    clauses += [f"{field} array-contains ?" for field in array]
+    clauses += [f"{field} {operator} ?" for field, operator in inequality]
+    text = f"{collection}: " + (" AND ".join(clauses) or "(all documents)")
+    return text + (f" ORDER BY {order_by}" if order_by else "")
+
+
+class QueryShapeRegistry:
+    """Counts of each normalized query shape seen by the database layer"""
+
+    def __init__(self):
+        self._shapes: Dict[ShapeKey, Dict[str, Any]] = {}
+
+    def record(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        order_by: Optional[str] = None,
+        operation: str = "query"
+    ):
+        key = shape_key(collection, filters, order_by)
+        entry = self._shapes.get(key)
+        if entry is None:
+            entry = self._shapes[key] = {"count": 0, "operations": set(), "last_seen": 0.0}
+        entry["count"] += 1
+        entry["operations"].add(operation)
+        entry["last_seen"] = time.time()
+
+    def shapes(self) -> List[Dict[str, Any]]:
+        """Recorded shapes, most frequent first, in the serialized form"""
+        return [
+            {
+                "collection": key[0],
+                "equality": list(key[1]),
+                "array": list(key[2]),
+                "inequality": [{"field": field, "operator": operator} for field, operator in key[3]],
+                "order_by": key[4],
+                "count": entry["count"],
+                "operations": sorted(entry["operations"]),
+                "last_seen": entry["last_seen"]
+            }
+            for key, entry in sorted(self._shapes.items(), key=lambda item: -item[1]["count"])
+        ]
+
+    def merge(self, shapes: Iterable[Dict[str, Any]]):
+        """Add shapes in the serialized form (e.g. from another process)"""
+        for shape in shapes:
+            key = _key_from_dict(shape)
+            entry = self._shapes.get(key)
+            if entry is None:
+                entry = self._shapes[key] = {"count": 0, "operations": set(), "last_seen": 0.0}
+            entry["count"] += shape.get("count", 1)
+            entry["operations"].update(shape.get("operations", ()))
+            entry["last_seen"] = max(entry["last_seen"], shape.get("last_seen", 0.0))
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump({"shapes": self.shapes()}, f, indent=2)
+
+    def load(self, path: str):
+        """Merge shapes saved by :meth:`save`, if the file exists"""
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            self.merge(json.load(f).get("shapes", []))
+
+    def reset(self):
+        self._shapes.clear()
+
+
+def _key_from_dict(shape: Dict[str, Any]) -> ShapeKey:
+    return (
+        shape["collection"],
+        tuple(sorted(shape.get("equality", ()))),
+        tuple(sorted(shape.get("array", ()))),
+        tuple(sorted((spec["field"], spec["operator"]) for spec in shape.get("inequality", ()))),
+        shape.get("order_by")
+    )
+
+
+def _index_fields(equality: Iterable[str], suffix: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    return [{"fieldPath": field, "order": "ASCENDING"} for field in equality] + suffix
+
+
+def _suffix(array: Tuple[str, ...], inequality: Tuple[Tuple[str, str], ...], order_by: Optional[str]) -> List[Dict[str, str]]:
+    """Index fields after the equality fields: array, inequality, then ordering"""
+    order_field, descending = parse_order_by(order_by)
+    direction = "DESCENDING" if descending else "ASCENDING"
+    fields = [{"fieldPath": field, "arrayConfig": "CONTAINS"} for field in array]
+    # An inequality field sorts the results, so it comes first unless it is the order field
+    range_fields = sorted(sorted({field for field, _ in inequality}), key=lambda field: field != order_field)
+    for field in range_fields:
+        fields.append({"fieldPath": field, "order": direction if field == order_field else "ASCENDING"})
+    if order_field and order_field not in range_fields:
+        fields.append({"fieldPath": order_field, "order": direction})
+    return fields
+
+
+def _needs_composite(key: ShapeKey) -> bool:
+    _, equality, array, inequality, order_by = key
+    order_field, _ = parse_order_by(order_by)
+    fields = set(equality) | set(array) | {field for field, _ in inequality} | ({order_field} if order_field else set())
+    if len(fields) <= 1:
+        return False
+    # Equality-only queries are served by merging single-field indexes
+    return bool(array or inequality or order_field)
+
+
+def _scan_warnings(key: ShapeKey) -> List[str]:
+    """Reasons the shape reads more than it returns on some backend"""
+    from app.core.sqlite_database import INDEXED_FIELDS
+
+    collection, equality, array, inequality, _ = key
+    messages = []
+    if any(operator in NEGATION_OPERATORS for _, operator in inequality):
+        messages.append("!= and not-in match every index entry but one value; reads grow with the collection")
+    if equality or array or inequality:
+        if not set(equality) & set(settings.MEMORY_DB_INDEXES.get(collection, ())):
+            messages.append("no equality filter is in MEMORY_DB_INDEXES; the memory backend scans the collection")
+        if not set(equality) & set(INDEXED_FIELDS):
+            messages.append("no equality filter is an indexed SQLite column; the SQLite backend scans the collection")
+    return messages
+
+
+def build_manifest(shapes: Iterable[Dict[str, Any]], threshold: int = EXPLOSION_THRESHOLD) -> Dict[str, Any]:
+    """
+    Derive the composite indexes for ``shapes`` and flag problem shapes.
+
+    Shapes that differ only in which equality filters are present form a
+    family. A family with more than ``threshold`` members gets one index per
+    equality field (plus the shared ordering) instead of one per combination;
+    Firestore merges those at query time, trading some latency for far fewer
+    indexes. Families with array or inequality filters cannot be merged and
+    are only flagged.
+
+    Returns:
+        Dict with ``manifest`` (the ``firestore.indexes.json`` content) and
+        ``warnings`` (``level``, ``shape``, ``message``)
+    """
+    keys = [_key_from_dict(shape) for shape in shapes]
+    warnings: List[Dict[str, str]] = []
+    families: Dict[Tuple, List[ShapeKey]] = {}
+
+    for key in keys:
+        if len(key[2]) > 1:
+            warnings.append({
+                "level": "error", "shape": describe(key),
+                "message": "Firestore allows only one array-contains or array-contains-any filter per query"
+            })
+            continue
+        for message in _scan_warnings(key):
+            warnings.append({"level": "warning", "shape": describe(key), "message": message})
+        if _needs_composite(key):
+            families.setdefault((key[0], key[2], key[3], key[4]), []).append(key)
+
+    indexes: Dict[Tuple, Dict[str, Any]] = {}
+
+    def add(collection: str, fields: List[Dict[str, str]]):
+        identity = (collection, tuple(tuple(sorted(field.items())) for field in fields))
+        indexes.setdefault(identity, {"collectionGroup": collection, "queryScope": "COLLECTION", "fields": fields})
+
+    for (collection, array, inequality, order_by), members in sorted(families.items(), key=lambda item: str(item[0])):
+        suffix = _suffix(array, inequality, order_by)
+        mergeable = not array and not inequality
+        if len(members) > threshold:
+            every = set().union(*(key[1] for key in members))
+            common = set.intersection(*(set(key[1]) for key in members))
+            optional = sorted(every - common)
+            shape = describe((collection, tuple(sorted(common)), array, inequality, order_by))
+            if mergeable:
+                warnings.append({
+                    "level": "warning", "shape": shape,
+                    "message": (
+                        f"{len(members)} equality-filter combinations (optional: {', '.join(optional)}) would need "
+                        f"{len(members)} composite indexes; emitting one per field for index merging instead"
+                    )
+                })
+                for field in sorted(every):
+                    add(collection, _index_fields([field], list(suffix)))
+                continue
+            warnings.append({
+                "level": "warning", "shape": shape,
+                "message": (
+                    f"{len(members)} equality-filter combinations (optional: {', '.join(optional)}) each need a "
+                    "composite index; array and inequality filters cannot use index merging"
+                )
+            })
+        for key in members:
+            add(collection, _index_fields(key[1], list(suffix)))
+
+    if len(indexes) > FIRESTORE_COMPOSITE_INDEX_LIMIT:
+        warnings.append({
+            "level": "error", "shape": "(all)",
+            "message": f"{len(indexes)} composite indexes exceed Firestore's limit of {FIRESTORE_COMPOSITE_INDEX_LIMIT}"
+        })
+
+    return {
+        "manifest": {"indexes": list(indexes.values()), "fieldOverrides": []},
+        "warnings": warnings
+    }
+
+
+# Global registry, fed by the instrumented database primitives
+query_shapes = QueryShapeRegistry()
@@ -0,0 +1,231 @@
+"""
+Deadlines, retries and circuit breaking for database calls.
+
+* A request-wide deadline (see :func:`deadline_scope`) bounds the total time
+  spent in database calls, including retries and backoff sleeps, so slow
+  backends surface as fast 503s instead of piling up waiting coroutines.
+* Idempotent calls that fail with a transient error are retried with
+  full-jitter exponential backoff, but never past the deadline.
+* A :class:`CircuitBreaker` per backend opens after consecutive transient
+  failures and rejects calls outright until a probe succeeds, so an outage
+  does not tie up every worker thread on calls that will time out anyway.
+* A :class:`BoundedExecutor` runs the blocking calls and counts them until
+  their thread is done. A timeout only abandons the await, so calls that
+  outlive it stay counted, and new calls fail fast once too many are
+  outstanding instead of queueing behind orphaned ones.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple, Type, TypeVar
+import asyncio
+import functools
+import logging
+import threading
+import time
+from app.core.config import settings
+from app.core.db_utils import backoff_delay
+from app.core.exceptions import DatabaseUnavailableError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Absolute time.monotonic() by which the current request must be done
+_deadline: ContextVar[Optional[float]] = ContextVar("database_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """Limit database work in this context to ``seconds`` (nested scopes only shrink it)"""
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    ``closed`` lets calls through; ``failure_threshold`` transient failures in
+    a row open it. After ``reset_timeout`` seconds one probe call is let
+    through (``half_open``): success closes the circuit, failure reopens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.DB_BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout or settings.DB_BREAKER_RESET_SECONDS
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._counters = {"opened": 0, "rejected": 0}
+
+    def before_call(self):
+        """Raise ``DatabaseUnavailableError`` if the call must not be attempted"""
+        if self.state == "closed":
+            return
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return
+        self._counters["rejected"] += 1
+        raise DatabaseUnavailableError(f"{self.name} circuit is open; failing fast")
+
+    def record_success(self):
+        if self.state != "closed":
+            logger.info(f"{self.name} circuit closed")
+        self.state = "closed"
+        self._failures = 0
+        self._probing = False
+
+    def record_abandoned(self):
+        """A call ended without an answer either way (cancelled or never sent)"""
+        self._probing = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            if self.state != "open":
+                self._counters["opened"] += 1
+                logger.error(f"{self.name} circuit opened after {self._failures} consecutive failures")
+            self.state = "open"
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self._failures, **self._counters}
+
+
+class BoundedExecutor:
+    """
+    Thread pool that refuses work once too many calls are outstanding.
+
+    A call counts from submission until its worker thread finishes, whether or
+    not anyone still awaits it. Calls abandoned before a worker picked them up
+    are cancelled and stop counting at once.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queued: int):
+        self.name = name
+        self.limit = max_workers + max_queued
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self._rejected = 0
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a blocking call on the pool.
+
+        Raises:
+            DatabaseUnavailableError: If ``limit`` calls are already outstanding
+        """
+        with self._lock:
+            if self.in_flight >= self.limit:
+                self._rejected += 1
+                raise DatabaseUnavailableError(f"{self.name} worker pool is saturated; failing fast")
+            self.in_flight += 1
+        try:
+            future = self._executor.submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future: Optional[Future] = None):
+        with self._lock:
+            self.in_flight -= 1
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"in_flight": self.in_flight, "limit": self.limit, "rejected": self._rejected}
+
+
+async def call_with_resilience(
+    call: Callable[[], Awaitable[T]],
+    breaker: CircuitBreaker,
+    transient: Tuple[Type[BaseException], ...],
+    idempotent: bool = True,
+    max_retries: Optional[int] = None,
+    timeout: Optional[float] = None
+) -> T:
+    """
+    Run ``call`` under the breaker, the current deadline and a per-attempt timeout.
+
+    Args:
+        call: Zero-argument coroutine factory; invoked once per attempt
+        breaker: Circuit breaker of the backend being called
+        transient: Exception types worth retrying (timeouts always are)
+        idempotent: Whether repeating the call is safe; if not, a transient
+            failure is raised immediately
+        max_retries: Retries after the first attempt (default ``DB_MAX_RETRIES``)
+        timeout: Cap per attempt (default ``DB_CALL_TIMEOUT``)
+
+    Raises:
+        DatabaseUnavailableError: The circuit is open, the deadline passed or
+            transient failures outlasted the retries
+    """
+    max_retries = settings.DB_MAX_RETRIES if max_retries is None else max_retries
+    timeout = timeout or settings.DB_CALL_TIMEOUT
+    attempt = 0
+
+    while True:
+        breaker.before_call()
+        budget = remaining_time()
+        if budget is not None and budget <= 0:
+            raise DatabaseUnavailableError("Request deadline exceeded before the database call")
+
+        try:
+            result = await asyncio.wait_for(call(), timeout=timeout if budget is None else min(timeout, budget))
+        except (asyncio.TimeoutError, *transient) as e:
+            breaker.record_failure()
+            if not idempotent or attempt >= max_retries:
+                raise DatabaseUnavailableError(f"Database call failed: {e or type(e).__name__}") from e
+            delay = backoff_delay(attempt)
+            budget = remaining_time()
+            if budget is not None and delay >= budget:
+                raise DatabaseUnavailableError("Request deadline exceeded while retrying") from e
+            logger.warning(f"Transient database error ({e or type(e).__name__}), retry {attempt + 1} in {delay:.2f}s")
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+        except DatabaseUnavailableError:
+            # Refused locally (e.g. the worker pool is saturated); not retried
+            breaker.record_abandoned()
+            raise
+        except Exception:
+            # A non-transient error still proves the backend answered
+            breaker.record_success()
+            raise
+        except BaseException:
+            # Cancelled: says nothing about the backend's health
+            breaker.record_abandoned()
+            raise
+
+        breaker.record_success()
+        return result
@@ -0,0 +1,228 @@
+"""
+Sharded counters for hot documents.
+
+Firestore sustains roughly one write per second per document, which a popular
+question exceeds during mock-test windows if every attempt increments its
+``performance_stats``. :class:`ShardedCounter` spreads those increments over
+``num_shards`` small documents in a separate collection (``<parent>_<n>``);
+each increment goes to a random shard through the write-behind buffer, so a
+process writes each shard at most once per flush.
+
+Shards are cumulative and never reset: the totals for a document are the sum
+of its shards. The first shard is seeded with the counters the parent held
+before it was sharded, so no history is lost. A periodic roll-up writes the
+summed totals back onto the parent document (absolute values, so a retried or
+concurrent roll-up is harmless); readers that need up-to-the-moment values
+sum the shards with :meth:`ShardedCounter.with_totals` instead. The roll-up
+stamps ``stats_updated_at`` rather than ``updated_at``, so refreshing stats
+does not look like a content change to the question index's change poll or
+to caches keyed on ``updated_at``.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+import asyncio
+import logging
+import random
+
+from app.core.config import settings
+from app.core.database import db
+from app.core.db_base import BaseDatabase
+from app.core.write_behind import WriteBehindBuffer, write_buffer
+
+logger = logging.getLogger(__name__)
+
+Number = Union[int, float]
+
+
+class ShardedCounter:
+    """Counters of ``parent_collection`` documents kept in shard documents"""
+
+    def __init__(
+        self,
+        parent_collection: str,
+        field: str,
+        counters: Iterable[str],
+        shard_collection: Optional[str] = None,
+        num_shards: Optional[int] = None,
+        database: Optional[BaseDatabase] = None,
+        buffer: Optional[WriteBehindBuffer] = None,
+        rollup_interval: Optional[float] = None
+    ):
+        self.parent_collection = parent_collection
+        self.field = field
+        self.counters = list(counters)
+        self.shard_collection = shard_collection or f"{parent_collection}_counter_shards"
+        self.num_shards = num_shards or settings.COUNTER_SHARDS
+        self.database = database or db
+        self.write_buffer = buffer or write_buffer
+        self.rollup_interval = rollup_interval or settings.COUNTER_ROLLUP_SECONDS
+        self._sharded: Set[str] = set()
+        self._dirty: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def shard_ids(self, parent_id: str) -> List[str]:
+        return [f"{parent_id}_{shard}" for shard in range(self.num_shards)]
+
+    # Writes
+
+    async def _ensure_shards(self, parent_id: str):
+        """Create any missing shards, seeding the first from the parent"""
+        if parent_id in self._sharded:
+            return
+        shard_ids = self.shard_ids(parent_id)
+        existing = await self.database.get_documents(self.shard_collection, shard_ids)
+        missing = [shard_id for shard_id in shard_ids if existing[shard_id] is None]
+
+        if missing:
+            seed: Dict[str, Number] = {}
+            if shard_ids[0] in missing:
+                parent = await self.database.get_document(self.parent_collection, parent_id, fields=[self.field])
+                stats = (parent or {}).get(self.field) or {}
+                seed = {name: stats[name] for name in self.counters if isinstance(stats.get(name), (int, float))}
+
+            def create(counts: Dict[str, Number]):
+                # Only if absent: another process may have created it meanwhile
+                return lambda current: None if current is not None else {"parent_id": parent_id, "counts": counts}
+
+            await asyncio.gather(*(
+                self.database.transactional_update(
+                    self.shard_collection, shard_id, create(seed if shard_id == shard_ids[0] else {})
+                )
+                for shard_id in missing
+            ))
+        self._sharded.add(parent_id)
+
+    async def increment(self, parent_id: str, increments: Dict[str, Number]) -> bool:
+        """
+        Add to counters of one parent document.
+
+        Args:
+            parent_id: Parent document ID
+            increments: Counter names (from ``counters``) mapped to amounts
+
+        Returns:
+            Success status
+        """
+        await self._ensure_shards(parent_id)
+        shard_id = f"{parent_id}_{random.randrange(self.num_shards)}"
+        self._dirty.add(parent_id)
+        return await self.write_buffer.increment(
+            self.shard_collection,
+            shard_id,
+            {f"counts.{name}": amount for name, amount in increments.items()}
+        )
+
+    # Reads
+
+    async def totals(self, parent_ids: Iterable[str]) -> Dict[str, Dict[str, Number]]:
+        """
+        Current totals summed over the shards, in one multi-get.
+
+        Parents without shards are left out. Increments still waiting in the
+        write-behind buffer are not included.
+        """
+        parent_ids = list(dict.fromkeys(parent_ids))
+        keys = [(self.shard_collection, shard_id) for parent_id in parent_ids for shard_id in self.shard_ids(parent_id)]
+        shards = await self.database.get_many(keys)
+
+        totals: Dict[str, Dict[str, Number]] = {}
+        for (_, shard_id), shard in shards.items():
+            if shard is None:
+                continue
+            counts = totals.setdefault(shard["parent_id"], {})
+            for name, amount in (shard.get("counts") or {}).items():
+                counts[name] = counts.get(name, 0) + amount
+        return totals
+
+    async def with_totals(self, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Overwrite the counters of parent documents with live totals, in place"""
+        totals = await self.totals(document["id"] for document in documents)
+        for document in documents:
+            if document["id"] in totals:
+                stats = document.get(self.field)
+                stats = document[self.field] = dict(stats) if isinstance(stats, dict) else {}
+                stats.update(totals[document["id"]])
+        return documents
+
+    # Roll-up
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._roll_up_periodically())
+
+    async def stop(self):
+        """Stop the periodic roll-up and run a final one"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await self.roll_up()
+        except Exception as e:
+            logger.error(f"Final counter roll-up failed: {e}")
+
+    async def _roll_up_periodically(self):
+        while True:
+            await asyncio.sleep(self.rollup_interval)
+            try:
+                await self.roll_up()
+            except Exception as e:
+                logger.error(f"Counter roll-up failed: {e}")
+
+    async def roll_up(self, parent_ids: Optional[Iterable[str]] = None) -> int:
+        """
+        Write shard totals onto the parent documents.
+
+        Args:
+            parent_ids: Parents to roll up (default: those incremented by this
+                process since the last roll-up)
+
+        Returns:
+            Number of parent documents updated
+        """
+        if parent_ids is None:
+            parent_ids, self._dirty = self._dirty, set()
+        parent_ids = list(parent_ids)
+        if not parent_ids:
+            return 0
+
+        try:
+            totals = await self.totals(parent_ids)
+        except Exception:
+            self._dirty.update(parent_ids)
+            raise
+        now = datetime.utcnow()
+        operations = [
+            {
+                "type": "update",
+                "collection": self.parent_collection,
+                "document_id": parent_id,
+                "data": {
+                    **{f"{self.field}.{name}": amount for name, amount in counts.items()},
+                    "stats_updated_at": now
+                }
+            }
+            for parent_id, counts in totals.items()
+        ]
+        if not operations:
+            return 0
+
+        result = await self.database.bulk_write(operations)
+        for outcome in result["results"]:
+            # Deleted parents are dropped; anything else is retried next time
+            if not outcome["success"] and outcome["reason"] != "not_found":
+                self._dirty.add(outcome["document_id"])
+        return result["written"]
+
+
+# Global counters for question performance stats
+question_stats = ShardedCounter(
+    "questions",
+    "performance_stats",
+    ["total_attempts", "correct_attempts", "timed_attempts", "total_time"],
+    shard_collection="question_stat_shards"
+)
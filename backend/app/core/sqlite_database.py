@@ -0,0 +1,624 @@
+"""
+SQLite implementation of the database interface for single-node deployments.
+
+All collections share one ``documents`` table holding each document as a JSON
+text column. The hot question-bank filter fields are exposed as generated
+columns with their own indexes, so the practice and exam queries are index
+lookups rather than JSON scans. The database runs in WAL mode: readers never
+block the single writer, and each worker thread keeps its own connection.
+
+Values JSON cannot represent are encoded on the way in: datetimes become
+fixed-width UTC strings with a ``$dt:`` prefix, so they still compare and sort
+correctly inside SQL, and are returned as timezone-aware datetimes (as
+Firestore returns them). Booleans are stored as JSON ``true``/``false`` but
+compare equal to 1/0 in filters.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, TypeVar
+import asyncio
+import functools
+import json
+import logging
+import sqlite3
+import threading
+import uuid
+from app.core.config import settings
+from app.core.db_base import BaseDatabase, DocumentKey
+from app.core.db_metrics import instrumented
+from app.core.db_utils import (
+    aggregation_alias, apply_update, decode_page_token, page_token_for, parse_order_by, project, resolve_value
+)
+from app.core.exceptions import ValidationError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Fields materialized as indexed generated columns
+INDEXED_FIELDS = ["exam_type", "subject", "topic", "difficulty", "approval_status"]
+
+_DATETIME_PREFIX = "$dt:"
+_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+_COMPARISONS = {'==': '=', '!=': '!=', '<': '<', '<=': '<=', '>': '>', '>=': '>='}
+
+
+def _encode_datetime(value: datetime) -> str:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return _DATETIME_PREFIX + value.strftime(_DATETIME_FORMAT)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return _encode_datetime(value)
+    raise TypeError(f"Cannot store value of type {type(value).__name__}")
+
+
+def _dumps(document: Dict[str, Any]) -> str:
+    return json.dumps(document, default=_json_default, separators=(",", ":"))
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, str) and value.startswith(_DATETIME_PREFIX):
+        return datetime.strptime(value[len(_DATETIME_PREFIX):], _DATETIME_FORMAT).replace(tzinfo=timezone.utc)
+    if isinstance(value, dict):
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+def _loads(data: str) -> Dict[str, Any]:
+    return _decode(json.loads(data))
+
+
+def _param(value: Any) -> Any:
+    """Bind a filter value the way it is stored"""
+    if isinstance(value, datetime):
+        return _encode_datetime(value)
+    if isinstance(value, (dict, list)):
+        return _dumps(value)
+    return value
+
+
+def _json_path(field_path: str) -> str:
+    return "$" + "".join('."' + part.replace('"', '""') + '"' for part in field_path.split('.'))
+
+
+def _expression(field_path: str) -> Tuple[str, List[Any]]:
+    """SQL expression for a field, using its generated column when there is one"""
+    if field_path in INDEXED_FIELDS:
+        return field_path, []
+    return "json_extract(data, ?)", [_json_path(field_path)]
+
+
+class SQLiteDatabase(BaseDatabase):
+    """Document database stored in a single SQLite file"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        cache_enabled: Optional[bool] = None
+    ):
+        super().__init__(cache_enabled)
+        self.path = path or settings.SQLITE_PATH
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.SQLITE_MAX_WORKERS,
+            thread_name_prefix="sqlite"
+        )
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    # Connections
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        with self._schema_lock:
+            if not self._schema_ready:
+                self._create_schema(connection)
+                self._schema_ready = True
+        with self._connections_lock:
+            self._connections.append(connection)
+        return connection
+
+    @staticmethod
+    def _create_schema(connection: sqlite3.Connection):
+        columns = ",\n".join(
+            f"    {field} GENERATED ALWAYS AS (json_extract(data, '$.{field}')) VIRTUAL"
+            for field in INDEXED_FIELDS
+        )
+        connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS documents (
+                collection TEXT NOT NULL,
+                id TEXT NOT NULL,
+                data TEXT NOT NULL CHECK (json_valid(data)),
+            {columns},
+                PRIMARY KEY (collection, id)
+            ) WITHOUT ROWID
+        """)
+        for field in INDEXED_FIELDS:
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS documents_{field} ON documents (collection, {field})"
+            )
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Connection owned by the calling thread"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    async def _run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking SQLite call on the worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def _write(self, func: Callable[[sqlite3.Connection], T]) -> T:
+        """Run ``func`` in an immediate (write-locked) transaction"""
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = func(connection)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return result
+
+    def close(self):
+        """Release the worker pool and every connection"""
+        self._executor.shutdown(wait=True)
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+
+    # Row helpers
+
+    @staticmethod
+    def _load_row(connection: sqlite3.Connection, collection: str, document_id: str) -> Optional[Dict[str, Any]]:
+        row = connection.execute(
+            "SELECT data FROM documents WHERE collection = ? AND id = ?", (collection, document_id)
+        ).fetchone()
+        return _loads(row[0]) if row else None
+
+    @staticmethod
+    def _store_row(connection: sqlite3.Connection, collection: str, document_id: str, document: Dict[str, Any]):
+        connection.execute(
+            "INSERT OR REPLACE INTO documents (collection, id, data) VALUES (?, ?, ?)",
+            (collection, document_id, _dumps(document))
+        )
+
+    def _update_row(self, connection: sqlite3.Connection, collection: str, document_id: str, data: Dict[str, Any]):
+        document = self._load_row(connection, collection, document_id)
+        if document is None:
+            raise KeyError(f"No document to update: {collection}/{document_id}")
+        apply_update(document, data)
+        self._store_row(connection, collection, document_id, document)
+
+    @staticmethod
+    def _export(document_id: str, document: Dict[str, Any], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        data = project(document, fields) if fields else document
+        data['id'] = document_id
+        return data
+
+    @staticmethod
+    def _new_id() -> str:
+        return uuid.uuid4().hex[:20]
+
+    # Query building
+
+    @staticmethod
+    def _where(collection: str, filters: Optional[List[Dict[str, Any]]]) -> Tuple[str, List[Any]]:
+        clauses = ["collection = ?"]
+        params: List[Any] = [collection]
+
+        for filter_dict in filters or []:
+            field = filter_dict.get('field')
+            operator = filter_dict.get('operator', '==')
+            value = filter_dict.get('value')
+            expression, expression_params = _expression(field)
+
+            if value is None and operator in ('==', '!='):
+                negation = "!=" if operator == '!=' else "="
+                clauses.append(f"json_type(data, ?) {negation} 'null'")
+                params.append(_json_path(field))
+            elif operator in _COMPARISONS:
+                if operator == '!=':
+                    clauses.append(f"{expression} IS NOT NULL")
+                    params.extend(expression_params)
+                clauses.append(f"{expression} {_COMPARISONS[operator]} ?")
+                params.extend([*expression_params, _param(value)])
+            elif operator in ('in', 'not-in'):
+                if not value:
+                    raise ValidationError(f"'{operator}' filter on {field} needs at least one value")
+                placeholders = ", ".join("?" for _ in value)
+                negation = "NOT " if operator == 'not-in' else ""
+                clauses.append(f"{expression} {negation}IN ({placeholders})")
+                params.extend([*expression_params, *(_param(item) for item in value)])
+            elif operator in ('array-contains', 'array-contains-any'):
+                values = value if operator == 'array-contains-any' else [value]
+                placeholders = ", ".join("?" for _ in values)
+                clauses.append(
+                    f"EXISTS (SELECT 1 FROM json_each(data, ?) WHERE json_each.value IN ({placeholders}))"
+                )
+                params.extend([_json_path(field), *(_param(item) for item in values)])
+            else:
+                raise ValidationError(f"Unsupported filter operator: {operator}")
+
+        return " AND ".join(clauses), params
+
+    def _select_sql(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]],
+        order_by: Optional[str],
+        cursor: Optional[Tuple[List[Any], str]] = None
+    ) -> Tuple[str, List[Any]]:
+        """SELECT in query order, optionally resuming after ``cursor`` (order values, last ID)"""
+        where, params = self._where(collection, filters)
+        field, descending = parse_order_by(order_by)
+        direction, comparison = ("DESC", "<") if descending else ("ASC", ">")
+
+        if not field:
+            if cursor is not None:
+                where += f" AND id {comparison} ?"
+                params.append(cursor[1])
+            return f"SELECT id, data FROM documents WHERE {where} ORDER BY id {direction}", params
+
+        expression, expression_params = _expression(field)
+        # Like Firestore, ordering on a field skips documents that lack it
+        where += " AND json_type(data, ?) IS NOT NULL"
+        params.append(_json_path(field))
+        if cursor is not None:
+            where += f" AND ({expression}, id) {comparison} (?, ?)"
+            params.extend([*expression_params, _param(cursor[0][0]), cursor[1]])
+        sql = f"SELECT id, data FROM documents WHERE {where} ORDER BY {expression} {direction}, id {direction}"
+        return sql, [*params, *expression_params]
+
+    # Reads
+
+    def _get_sync(self, collection: str, document_id: str, fields: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+        document = self._load_row(self.connection, collection, document_id)
+        return self._export(document_id, document, fields) if document is not None else None
+
+    @instrumented("get")
+    async def _get_uncached(
+        self,
+        collection: str,
+        document_id: str,
+        fields: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        return await self._run(self._get_sync, collection, document_id, fields)
+
+    def _get_many_sync(
+        self,
+        keys: List[DocumentKey],
+        fields: Optional[List[str]]
+    ) -> Dict[DocumentKey, Optional[Dict[str, Any]]]:
+        documents: Dict[DocumentKey, Optional[Dict[str, Any]]] = dict.fromkeys(keys)
+        by_collection: Dict[str, List[str]] = {}
+        for collection, document_id in keys:
+            by_collection.setdefault(collection, []).append(document_id)
+
+        for collection, ids in by_collection.items():
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows = self.connection.execute(
+                    f"SELECT id, data FROM documents WHERE collection = ? AND id IN ({placeholders})",
+                    (collection, *chunk)
+                )
+                for document_id, data in rows:
+                    documents[(collection, document_id)] = self._export(document_id, _loads(data), fields)
+        return documents
+
+    @instrumented("get_many")
+    async def _get_many_uncached(
+        self,
+        keys: List[DocumentKey],
+        fields: Optional[List[str]] = None
+    ) -> Dict[DocumentKey, Optional[Dict[str, Any]]]:
+        try:
+            return await self._run(self._get_many_sync, keys, fields)
+        except Exception as e:
+            logger.error(f"Failed to get {len(keys)} documents: {e}")
+            raise
+
+    def _query_sync(self, sql: str, params: List[Any], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+        return [self._export(document_id, _loads(data), fields) for document_id, data in self.connection.execute(sql, params)]
+
+    @instrumented("query")
+    async def _query(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        sql, params = self._select_sql(collection, filters, order_by)
+        if limit or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit or -1, offset or 0])
+        return await self._run(self._query_sync, sql, params, fields)
+
+    @instrumented("aggregate")
+    async def aggregate(
+        self,
+        collection: str,
+        aggregations: List[Dict[str, str]],
+        filters: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Run count/sum/avg aggregations in a single SQL statement"""
+        columns: List[str] = []
+        column_params: List[Any] = []
+        aliases: List[str] = []
+        for spec in aggregations:
+            kind = spec.get('type')
+            if kind == 'count':
+                columns.append("COUNT(*)")
+            elif kind in ('sum', 'avg') and spec.get('field'):
+                expression, params = _expression(spec['field'])
+                # Only numeric values take part, as in Firestore
+                numeric = f"CASE WHEN json_type(data, ?) IN ('integer', 'real') THEN {expression} END"
+                columns.append(f"COALESCE(SUM({numeric}), 0)" if kind == 'sum' else f"AVG({numeric})")
+                column_params.extend([_json_path(spec['field']), *params])
+            else:
+                raise ValidationError(f"Invalid aggregation: {spec}")
+            aliases.append(spec.get('alias') or aggregation_alias(spec))
+
+        if not columns:
+            return {}
+
+        where, params = self._where(collection, filters)
+        sql = f"SELECT {', '.join(columns)} FROM documents WHERE {where}"
+        try:
+            row = await self._run(lambda: self.connection.execute(sql, [*column_params, *params]).fetchone())
+            return dict(zip(aliases, row))
+        except Exception as e:
+            logger.error(f"Failed to aggregate collection {collection}: {e}")
+            raise
+
+    @instrumented("page")
+    async def query_page(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        order_by: Optional[str] = None,
+        page_size: Optional[int] = None,
+        page_token: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Fetch one page of a query using a keyset cursor"""
+        page_size = min(page_size or settings.DEFAULT_PAGE_SIZE, settings.MAX_PAGE_SIZE)
+        field, _ = parse_order_by(order_by)
+        cursor = decode_page_token(page_token) if page_token else None
+        sql, params = self._select_sql(collection, filters, order_by, cursor)
+
+        try:
+            documents = await self._run(self._query_sync, f"{sql} LIMIT ?", [*params, page_size], None)
+        except Exception as e:
+            logger.error(f"Failed to page collection {collection}: {e}")
+            raise
+
+        next_token = page_token_for(documents[-1], field) if len(documents) == page_size else None
+        items = [project(document, fields) if fields else document for document in documents]
+        return {"items": items, "next_page_token": next_token}
+
+    @instrumented("stream")
+    async def query_iter(
+        self,
+        collection: str,
+        filters: Optional[List[Dict[str, Any]]] = None,
+        order_by: Optional[str] = None,
+        batch_size: int = 500,
+        fields: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream every document matching a query, ``batch_size`` rows per read"""
+        field, _ = parse_order_by(order_by)
+        cursor = None
+        while True:
+            sql, params = self._select_sql(collection, filters, order_by, cursor)
+            try:
+                documents = await self._run(self._query_sync, f"{sql} LIMIT ?", [*params, batch_size], None)
+            except Exception as e:
+                logger.error(f"Failed to stream collection {collection}: {e}")
+                raise
+
+            for document in documents:
+                yield project(document, fields) if fields else document
+
+            if len(documents) < batch_size:
+                return
+            last = documents[-1]
+            cursor = ([last.get(field)] if field else [], last["id"])
+
+    # Writes
+
+    @instrumented("create")
+    async def create_document(
+        self,
+        collection: str,
+        data: Dict[str, Any],
+        document_id: Optional[str] = None
+    ) -> str:
+        """Create (or overwrite) a document"""
+        document_id = document_id or self._new_id()
+        document = resolve_value(data)
+        try:
+            await self._run(self._write, lambda c: self._store_row(c, collection, document_id, document))
+            return document_id
+        except Exception as e:
+            logger.error(f"Failed to create document in {collection}: {e}")
+            raise
+        finally:
+            self._invalidate(collection, document_id)
+
+    @instrumented("update")
+    async def update_document(
+        self,
+        collection: str,
+        document_id: str,
+        data: Dict[str, Any]
+    ) -> bool:
+        """Update fields (dotted paths allowed) of an existing document; False if it is missing"""
+        try:
+            await self._run(self._write, lambda c: self._update_row(c, collection, document_id, data))
+            return True
+        except KeyError:
+            return False
+        except Exception as e:
+            logger.error(f"Failed to update document {document_id} in {collection}: {e}")
+            raise
+        finally:
+            self._invalidate(collection, document_id)
+
+    def _transactional_update_sync(
+        self,
+        connection: sqlite3.Connection,
+        collection: str,
+        document_id: str,
+        update_fn: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        document = self._load_row(connection, collection, document_id)
+        current = self._export(document_id, dict(document)) if document is not None else None
+        updates = update_fn(current)
+        if updates is None:
+            return None
+        if document is None:
+            self._store_row(connection, collection, document_id, resolve_value(updates))
+        else:
+            apply_update(document, updates)
+            self._store_row(connection, collection, document_id, document)
+        return updates
+
+    @instrumented("transaction")
+    async def transactional_update(
+        self,
+        collection: str,
+        document_id: str,
+        update_fn: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Read-modify-write a document under SQLite's write lock.
+
+        ``update_fn`` receives the current document (None if missing) and
+        returns the updates to apply, or None to write nothing.
+        """
+        try:
+            return await self._run(
+                self._write, lambda c: self._transactional_update_sync(c, collection, document_id, update_fn)
+            )
+        except Exception as e:
+            logger.error(f"Transaction on {collection}/{document_id} failed: {e}")
+            raise
+        finally:
+            self._invalidate(collection, document_id)
+
+    @instrumented("delete")
+    async def delete_document(self, collection: str, document_id: str) -> bool:
+        """Delete a document"""
+        try:
+            await self._run(
+                self._write,
+                lambda c: c.execute("DELETE FROM documents WHERE collection = ? AND id = ?", (collection, document_id))
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete document {document_id} from {collection}: {e}")
+            return False
+        finally:
+            self._invalidate(collection, document_id)
+
+    def _bulk_write_sync(self, connection: sqlite3.Connection, operations: List[Dict[str, Any]]) -> List[Optional[Exception]]:
+        errors: List[Optional[Exception]] = []
+        for op in operations:
+            # A savepoint per operation lets one bad write fail on its own
+            connection.execute("SAVEPOINT op")
+            try:
+                operation_type = op.get('type')
+                if operation_type == 'create':
+                    self._store_row(connection, op['collection'], op['document_id'], resolve_value(op.get('data', {})))
+                elif operation_type == 'update':
+                    self._update_row(connection, op['collection'], op['document_id'], op.get('data', {}))
+                elif operation_type == 'delete':
+                    connection.execute(
+                        "DELETE FROM documents WHERE collection = ? AND id = ?", (op['collection'], op['document_id'])
+                    )
+                else:
+                    raise ValueError(f"Unknown operation type: {operation_type}")
+                connection.execute("RELEASE op")
+                errors.append(None)
+            except Exception as e:
+                connection.execute("ROLLBACK TO op")
+                connection.execute("RELEASE op")
+                errors.append(e)
+        return errors
+
+    @instrumented("bulk_write")
+    async def bulk_write(
+        self,
+        operations: List[Dict[str, Any]],
+        max_concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Apply write operations in order, ``FIRESTORE_BATCH_SIZE`` per transaction.
+
+        Accepts and returns the same shapes as
+        :meth:`FirestoreClient.bulk_write`. SQLite has a single writer, so
+        ``max_concurrency`` is accepted for compatibility only.
+        """
+        operations = [dict(op) for op in operations]
+        for op in operations:
+            if op.get('type') == 'create' and not op.get('document_id'):
+                op['document_id'] = self._new_id()
+
+        errors: List[Optional[Exception]] = []
+        size = settings.FIRESTORE_BATCH_SIZE
+        try:
+            for start in range(0, len(operations), size):
+                chunk = operations[start:start + size]
+                errors.extend(await self._run(self._write, lambda c, chunk=chunk: self._bulk_write_sync(c, chunk)))
+            if len(operations) >= size:
+                # Without statistics the planner prefers the primary key over
+                # the generated-column indexes; bulk loads are when they go stale
+                await self._run(lambda: self.connection.execute("ANALYZE documents"))
+        finally:
+            for op in operations:
+                if op.get('collection') and op.get('document_id'):
+                    self._invalidate(op['collection'], op['document_id'])
+
+        results = [
+            {
+                "index": i,
+                "collection": op.get('collection'),
+                "document_id": op.get('document_id'),
+                "success": error is None,
+                "error": None if error is None else str(error),
+                "reason": None if error is None else self.failure_reason(error)
+            }
+            for i, (op, error) in enumerate(zip(operations, errors))
+        ]
+        failed = sum(1 for r in results if not r["success"])
+        if failed:
+            logger.error(f"Bulk write finished with {failed}/{len(operations)} failed operations")
+
+        return {
+            "success": failed == 0,
+            "written": len(operations) - failed,
+            "failed": failed,
+            "results": results
+        }
@@ -0,0 +1,265 @@
+"""
+Write-behind buffer for high-frequency field updates.
+
+Question stats, paper handout counts and device heartbeats change on nearly
+every request but are only read occasionally. (Usage counters that limits are
+enforced on are written at once, since a limit check must see them.) Instead of one write per action, the
+buffer merges every update to the same document made within
+``WRITE_BEHIND_FLUSH_INTERVAL`` seconds and sends the lot as one
+``bulk_write``. Increments add up (``+1`` five times is one ``+5`` write) and
+later plain values replace earlier ones, so the flushed write has the same
+effect as the individual writes applied in order.
+
+Buffered writes become visible to reads when they are flushed. The buffer is
+started and drained by the application lifespan; when it is not running (tests,
+scripts) every call writes through immediately.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, Union
+import asyncio
+import copy
+import logging
+from app.core.config import settings
+from app.core.database import db
+from app.core.db_base import BaseDatabase
+from app.core.db_utils import Increment, apply_update, resolve_value
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def merge_update(pending: Dict[str, Any], data: Dict[str, Any]):
+    """
+    Fold ``data`` into the pending update ``pending`` in place.
+
+    The result, written once, has the same effect as writing ``pending`` and
+    then ``data``. Field paths are dotted as in ``update_document``.
+    """
+    for path, value in data.items():
+        # Writing a field replaces whatever was pending underneath it
+        for key in [key for key in pending if key.startswith(path + '.')]:
+            del pending[key]
+
+        parent = next((key for key in pending if path.startswith(key + '.')), None)
+        if parent is not None:
+            # The parent's pending value is the field's whole new content
+            container = pending[parent]
+            container = copy.deepcopy(container) if isinstance(container, dict) else {}
+            apply_update(container, {path[len(parent) + 1:]: value})
+            pending[parent] = container
+            continue
+
+        current = pending.get(path, _MISSING)
+        if isinstance(value, Increment) and current is not _MISSING:
+            if isinstance(current, Increment):
+                value = Increment(current.amount + value.amount)
+            else:
+                value = resolve_value(value, current)
+        elif not isinstance(value, Increment):
+            value = copy.deepcopy(value)
+        pending[path] = value
+
+
+class _PendingWrite:
+    __slots__ = ("data", "fallback_collection")
+
+    def __init__(self, fallback_collection: Optional[str]):
+        self.data: Dict[str, Any] = {}
+        self.fallback_collection = fallback_collection
+
+
+class WriteBehindBuffer:
+    """Coalesces document updates and flushes them in batches"""
+
+    def __init__(
+        self,
+        database: BaseDatabase,
+        flush_interval: Optional[float] = None,
+        max_pending: Optional[int] = None
+    ):
+        self.database = database
+        self.flush_interval = flush_interval or settings.WRITE_BEHIND_FLUSH_INTERVAL
+        self.max_pending = max_pending or settings.WRITE_BEHIND_MAX_PENDING
+        self._pending: Dict[Tuple[str, str], _PendingWrite] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock = asyncio.Lock()
+        self._counters = {"updates": 0, "writes": 0, "flushes": 0, "failed": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        """Start the background flusher on the running event loop"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self):
+        """Stop the flusher and write out everything still buffered"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    async def _flush_periodically(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed: {e}")
+
+    async def update(
+        self,
+        collection: str,
+        document_id: str,
+        data: Dict[str, Any],
+        fallback_collection: Optional[str] = None
+    ) -> bool:
+        """
+        Queue a field update (dotted paths and ``Increment`` allowed).
+
+        Args:
+            collection: Collection name
+            document_id: Document ID (the document must exist)
+            data: Fields to update
+            fallback_collection: Collection to try if the document is not in
+                ``collection`` (e.g. ``anonymous_users`` for ``users``)
+
+        Returns:
+            True once queued; when writing through, the write's success
+        """
+        self._counters["updates"] += 1
+        if not self.running:
+            return await self._write_through(collection, document_id, data, fallback_collection)
+
+        entry = self._pending.get((collection, document_id))
+        if entry is None:
+            entry = self._pending[(collection, document_id)] = _PendingWrite(fallback_collection)
+        merge_update(entry.data, data)
+
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+        return True
+
+    async def increment(
+        self,
+        collection: str,
+        document_id: str,
+        increments: Dict[str, Union[int, float]],
+        data: Optional[Dict[str, Any]] = None,
+        fallback_collection: Optional[str] = None
+    ) -> bool:
+        """Queue increments, plus optional plain field updates"""
+        update = {**(data or {}), **{field: Increment(amount) for field, amount in increments.items()}}
+        return await self.update(collection, document_id, update, fallback_collection)
+
+    async def _write_through(
+        self,
+        collection: str,
+        document_id: str,
+        data: Dict[str, Any],
+        fallback_collection: Optional[str]
+    ) -> bool:
+        self._counters["writes"] += 1
+        # update_document returns False only for a missing document; other
+        # failures raise and must not be retried against the fallback
+        success = await self.database.update_document(collection, document_id, data)
+        if not success and fallback_collection:
+            success = await self.database.update_document(fallback_collection, document_id, data)
+        if not success:
+            self._counters["failed"] += 1
+        return success
+
+    async def flush(self) -> Dict[str, int]:
+        """
+        Write all buffered updates now.
+
+        Updates that fail because the document is missing are retried in the
+        fallback collection; updates the database was unavailable for are
+        requeued for the next flush.
+
+        Returns:
+            Dict with the number of documents ``written``, ``failed`` and
+            ``requeued``
+        """
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return {"written": 0, "failed": 0, "requeued": 0}
+
+            keys = list(pending)
+            try:
+                result = await self.database.bulk_write([
+                    {"type": "update", "collection": collection, "document_id": document_id, "data": pending[(collection, document_id)].data}
+                    for collection, document_id in keys
+                ])
+            except Exception:
+                self._requeue(pending)
+                raise
+
+            retries: List[Tuple[str, str, Dict[str, Any]]] = []
+            unavailable: Dict[Tuple[str, str], _PendingWrite] = {}
+            failed = 0
+            for (collection, document_id), outcome in zip(keys, result["results"]):
+                if outcome["success"]:
+                    continue
+                entry = pending[(collection, document_id)]
+                if outcome.get("reason") == "unavailable":
+                    # Keep it for the next flush rather than lose it to an outage
+                    unavailable[(collection, document_id)] = entry
+                elif outcome.get("reason") == "not_found" and entry.fallback_collection:
+                    retries.append((entry.fallback_collection, document_id, entry.data))
+                else:
+                    failed += 1
+                    logger.error(f"Dropped buffered update to {collection}/{document_id}: {outcome['error']}")
+
+            if retries:
+                retry_result = await self.database.bulk_write([
+                    {"type": "update", "collection": collection, "document_id": document_id, "data": data}
+                    for collection, document_id, data in retries
+                ])
+                for (collection, document_id, data), outcome in zip(retries, retry_result["results"]):
+                    if outcome.get("reason") == "unavailable":
+                        entry = _PendingWrite(None)
+                        entry.data = data
+                        unavailable[(collection, document_id)] = entry
+                    elif not outcome["success"]:
+                        failed += 1
+                        logger.error(f"Dropped buffered update to {collection}/{document_id}: {outcome['error']}")
+
+            if unavailable:
+                logger.warning(f"Database unavailable, keeping {len(unavailable)} buffered updates for the next flush")
+                self._requeue(unavailable)
+
+            self._counters["flushes"] += 1
+            self._counters["writes"] += len(keys) + len(retries)
+            self._counters["failed"] += failed
+            return {"written": len(keys) - failed - len(unavailable), "failed": failed, "requeued": len(unavailable)}
+
+    def _requeue(self, pending: Dict[Tuple[str, str], _PendingWrite]):
+        """Put back updates from a flush that never reached the database"""
+        for key, entry in pending.items():
+            newer = self._pending.get(key)
+            if newer is not None:
+                merge_update(entry.data, newer.data)
+            self._pending[key] = entry
+
+    def stats(self) -> Dict[str, Any]:
+        """Queued documents and write counters"""
+        return {"pending": len(self._pending), "running": self.running, **self._counters}
+
+
+# Global write-behind buffer
+write_buffer = WriteBehindBuffer(db)
@@ -7,10 +7,18 @@ import time
 import logging
 
 from app.core.config import settings
+from app.core.database import db
+from app.core.query_shapes import query_shapes
+from app.core.sharded_counter import question_stats
+from app.core.write_behind import write_buffer
+from app.services.attempt_ingestion import attempt_queue
+from app.services.exam_paper_pool import exam_paper_pool
+from app.services.question_index import question_index
 from app.api.v1.api import api_router
 from app.middleware.auth_middleware import AuthMiddleware
 from app.middleware.rate_limiter import RateLimitMiddleware
-from app.core.exceptions import ValidationError, AuthenticationError, AuthorizationError
+from app.middleware.request_context import RequestContextMiddleware
+from app.core.exceptions import ValidationError, AuthenticationError, AuthorizationError, DatabaseUnavailableError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,9 +30,30 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 EntryTestGuru API starting up...")
     logger.info(f"Environment: {settings.ENVIRONMENT}")
     logger.info(f"Debug mode: {settings.DEBUG}")
+    if settings.WRITE_BEHIND_ENABLED:
+        write_buffer.start()
+    await question_stats.start()
+    if settings.ATTEMPT_INGESTION_ENABLED:
+        attempt_queue.start()
+    if settings.QUERY_SHAPES_PATH:
+        query_shapes.load(settings.QUERY_SHAPES_PATH)
+    if settings.QUESTION_INDEX_ENABLED:
+        await question_index.start()
+    if settings.EXAM_PAPER_POOL_ENABLED:
+        await exam_paper_pool.start()
     yield
     # Shutdown
     logger.info("🛑 EntryTestGuru API shutting down...")
+    await exam_paper_pool.stop()
+    await question_index.stop()
+    # Drained before the buffer, which carries the stats it adds
+    await attempt_queue.stop()
+    await write_buffer.stop()
+    # After the buffer has flushed, so the final roll-up sees every increment
+    await question_stats.stop()
+    db.close()
+    if settings.QUERY_SHAPES_PATH:
+        query_shapes.save(settings.QUERY_SHAPES_PATH)
 
 app = FastAPI(
     title="EntryTestGuru API",
@@ -62,6 +91,7 @@ app.add_middleware(
 # Custom middleware
 app.add_middleware(AuthMiddleware)
 app.add_middleware(RateLimitMiddleware)
+app.add_middleware(RequestContextMiddleware)
 
 # Request timing middleware
 @app.middleware("http")
@@ -94,6 +124,14 @@ async def authorization_exception_handler(request: Request, exc: AuthorizationEr
         content={"detail": "Not authorized to access this resource"},
     )
 
+@app.exception_handler(DatabaseUnavailableError)
+async def database_unavailable_exception_handler(request: Request, exc: DatabaseUnavailableError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service temporarily unavailable, please retry"},
+        headers={"Retry-After": str(int(settings.DB_BREAKER_RESET_SECONDS))},
+    )
+
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
@@ -0,0 +1,45 @@
+from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import Request
+from typing import Any, Dict
+import logging
+
+from app.core.config import settings
+from app.core.dataloader import batching_scope
+from app.core.db_metrics import db_metrics, request_scope
+from app.core.resilience import deadline_scope
+
+logger = logging.getLogger(__name__)
+
+# Route path templates by endpoint function, filled lazily
+_route_paths: Dict[Any, str] = {}
+
+class RequestContextMiddleware(BaseHTTPMiddleware):
+    """Sets up per-request context used by the data layer"""
+    
+    async def dispatch(self, request: Request, call_next):
+        # Coalesce document reads issued concurrently while handling this request,
+        # attribute every database call to it and bound their total time
+        with batching_scope(), request_scope() as db_stats, deadline_scope(settings.DB_REQUEST_DEADLINE):
+            response = await call_next(request)
+        
+        db_metrics.record_request(f"{request.method} {self._route_path(request)}", db_stats)
+        response.headers["X-DB-Calls"] = str(db_stats.calls)
+        response.headers["X-DB-Reads"] = str(db_stats.reads)
+        response.headers["X-DB-Writes"] = str(db_stats.writes)
+        response.headers["X-DB-Time"] = f"{db_stats.seconds * 1000:.3f}"
+        return response
+    
+    @staticmethod
+    def _route_path(request: Request) -> str:
+        """Path template of the matched route (``/api/v1/questions/{question_id}``)"""
+        endpoint = request.scope.get("endpoint")
+        if endpoint is None:
+            return "(unmatched)"
+        path = _route_paths.get(endpoint)
+        if path is None:
+            path = next(
+                (route.path for route in request.app.routes if getattr(route, "endpoint", None) is endpoint),
+                request.url.path
+            )
+            _route_paths[endpoint] = path
+        return path
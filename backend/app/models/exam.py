@@ -0,0 +1,25 @@
+from pydantic import BaseModel, validator
+from typing import List, Optional
+
+
+class ExamAnswer(BaseModel):
+    question_id: str
+    selected_answer: Optional[str] = None  # None = left unanswered
+    time_taken: float = 0.0
+    
+    @validator('time_taken')
+    def validate_time_taken(cls, v):
+        if v < 0:
+            raise ValueError('Time taken cannot be negative')
+        return v
+
+class ExamSubmissionRequest(BaseModel):
+    exam_id: str  # session ID returned when the exam was started; the paper is read from it
+    exam_type: str
+    answers: List[ExamAnswer]
+    
+    @validator('answers')
+    def validate_answers(cls, v):
+        if len(v) > 500:
+            raise ValueError('An exam cannot have more than 500 answers')
+        return v
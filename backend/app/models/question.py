@@ -73,6 +73,27 @@ class QuestionResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class DeliveredOption(BaseModel):
+    option_id: str
+    text: str
+
+class QuestionDeliveryResponse(BaseModel):
+    """A question as served for practice and exams: no answer data"""
+    id: str
+    question_text: str
+    options: List[DeliveredOption]
+    exam_type: str
+    subject: str
+    topic: str
+    difficulty: str
+    arde_probability: str
+    historical_frequency: int
+    created_at: datetime
+    performance_stats: Dict[str, Any] = {}
+    
+    class Config:
+        from_attributes = True
+
 class QuestionExplanationResponse(BaseModel):
     question_id: str
     explanation: Dict[str, Any]
@@ -93,6 +114,25 @@ class QuestionAttemptRequest(BaseModel):
             raise ValueError('Time taken cannot exceed 1 hour')
         return v
 
+class QuestionAttemptBatchItem(QuestionAttemptRequest):
+    attempted_at: Optional[datetime] = None  # client clock; defaults to receipt time
+
+class QuestionAttemptBatchRequest(BaseModel):
+    idempotency_key: str
+    attempts: List[QuestionAttemptBatchItem]
+    
+    @validator('idempotency_key')
+    def validate_idempotency_key(cls, v):
+        if not 8 <= len(v) <= 128:
+            raise ValueError('Idempotency key must be 8-128 characters')
+        return v
+    
+    @validator('attempts')
+    def validate_attempts(cls, v):
+        if not 1 <= len(v) <= 500:
+            raise ValueError('A batch must have between 1 and 500 attempts')
+        return v
+
 class QuestionFilterRequest(BaseModel):
     exam_type: str
     subject: Optional[str] = None
@@ -0,0 +1,101 @@
+"""
+In-memory answer keys for server-side checking.
+
+Questions are delivered to clients without their answers (see
+``QuestionDeliveryResponse``), so attempts and exam submissions are checked
+on the server. :class:`AnswerKeyStore` maps each servable question's ID to
+the little that checking needs: the correct answer, subject and topic.
+
+The store is filled and kept fresh by the question index, which reads these
+fields along with the rest of each question when it builds and polls, and
+swaps them in alongside its own contents. Questions that are not in the store
+(the index is not ready or disabled, or the question was retired) are read
+from the database in one multi-get.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+
+from app.core.database import db
+from app.core.db_base import BaseDatabase
+
+logger = logging.getLogger(__name__)
+
+# What checking an answer needs from each question
+ANSWER_KEY_FIELDS = ["correct_answer", "subject", "topic", "is_active", "approval_status"]
+
+
+def is_gradable(entry: Optional[Dict[str, Any]]) -> bool:
+    """Whether practice attempts on a question may be graded (and its answer shown)"""
+    return entry is not None and entry.get("is_active", True) and entry.get("approval_status") == "approved"
+
+
+class AnswerKeyStore:
+    """Question ID -> answer key entry, with a database fallback"""
+
+    def __init__(self, database: Optional[BaseDatabase] = None):
+        self.database = database or db
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self.fallback_reads = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, question_id: str) -> bool:
+        return question_id in self._keys
+
+    def apply(self, question: Dict[str, Any]):
+        """Store the answer key of a servable question"""
+        self._keys[question["id"]] = {field: question[field] for field in ANSWER_KEY_FIELDS if field in question}
+
+    def discard(self, question_id: str):
+        self._keys.pop(question_id, None)
+
+    def replace(self, other: "AnswerKeyStore"):
+        """Take over the contents of a freshly built store in one step"""
+        self._keys = other._keys
+
+    async def get_many(self, question_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Answer key entries for the questions that exist, by ID.
+
+        Entries have ``correct_answer``, ``subject``, ``topic``,
+        ``is_active`` and ``approval_status``; they must not be modified.
+        """
+        found: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+        for question_id in question_ids:
+            entry = self._keys.get(question_id)
+            if entry is None:
+                missing.append(question_id)
+            else:
+                found[question_id] = entry
+
+        if missing:
+            self.fallback_reads += len(missing)
+            documents = await self.database.get_documents("questions", missing, fields=ANSWER_KEY_FIELDS)
+            found.update({question_id: document for question_id, document in documents.items() if document})
+        return found
+
+    async def check(self, question_id: str, selected_answer: str) -> Optional[Dict[str, Any]]:
+        """
+        Check one answer.
+
+        Returns:
+            Dict with ``is_correct`` and ``correct_answer``, or None if the
+            question does not exist, is inactive or is not approved
+        """
+        entry = (await self.get_many([question_id])).get(question_id)
+        if not is_gradable(entry):
+            return None
+        return {
+            "is_correct": selected_answer == entry.get("correct_answer"),
+            "correct_answer": entry.get("correct_answer")
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"answer_keys": len(self), "fallback_reads": self.fallback_reads}
+
+
+# Global answer key store, fed by the global question index
+answer_key_store = AnswerKeyStore()
@@ -0,0 +1,233 @@
+"""
+Buffered ingestion of question attempts.
+
+Recording an answer used to create its ``question_attempts`` document and
+update the question's stats before the response went out. :class:`AttemptQueue`
+accepts an attempt as soon as it is queued; a background consumer takes
+batches of up to ``ATTEMPT_BATCH_SIZE`` attempts (or whatever arrived within
+``ATTEMPT_BATCH_SECONDS`` of the first), creates them in one ``bulk_write`` and
+then adds each question's stats for the whole batch in a single increment.
+
+When ``ATTEMPT_QUEUE_MAX`` attempts are waiting, producers wait for room
+(backpressure) and the wait is counted in :meth:`AttemptQueue.stats`. Attempts
+the database was unavailable for are put back for a later batch. The queue is
+started and drained by the application lifespan; when it is not running
+(tests, scripts) every attempt is written through immediately.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from app.core.config import settings
+from app.core.database import db
+from app.core.db_base import BaseDatabase
+from app.core.sharded_counter import ShardedCounter, question_stats
+
+logger = logging.getLogger(__name__)
+
+ATTEMPTS_COLLECTION = "question_attempts"
+
+# (document ID or None, attempt data)
+QueuedAttempt = Tuple[Optional[str], Dict[str, Any]]
+
+_STOP = object()
+
+
+class AttemptQueue:
+    """Batches attempt writes and the question stats they imply"""
+
+    def __init__(
+        self,
+        database: Optional[BaseDatabase] = None,
+        counter: Optional[ShardedCounter] = None,
+        batch_size: Optional[int] = None,
+        batch_interval: Optional[float] = None,
+        max_queued: Optional[int] = None
+    ):
+        self.database = database or db
+        self.counter = counter or question_stats
+        self.batch_size = batch_size or settings.ATTEMPT_BATCH_SIZE
+        self.batch_interval = batch_interval or settings.ATTEMPT_BATCH_SECONDS
+        self.max_queued = max_queued or settings.ATTEMPT_QUEUE_MAX
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._counters = {
+            "accepted": 0, "written": 0, "failed": 0, "requeued": 0,
+            "batches": 0, "blocked": 0, "max_depth": 0, "last_batch_seconds": 0.0
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        """Start the background consumer on the running event loop"""
+        if self._task is None:
+            self._queue = asyncio.Queue(self.max_queued)
+            self._task = asyncio.create_task(self._consume())
+
+    async def stop(self):
+        """Stop accepting into the queue and write out everything in it"""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        # The consumer finishes its current batch and everything queued before the marker
+        await self._queue.put(_STOP)
+        await task
+        leftover = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                leftover.append(item)
+        for start in range(0, len(leftover), self.batch_size):
+            await self._write(leftover[start:start + self.batch_size])
+
+    async def submit(self, attempt: Dict[str, Any], attempt_id: Optional[str] = None) -> bool:
+        """
+        Accept an attempt for writing.
+
+        Args:
+            attempt: ``question_attempts`` document (``question_id``,
+                ``is_correct`` and ``time_taken`` feed the question stats)
+            attempt_id: Document ID; generated when omitted
+
+        Returns:
+            True once queued; when writing through, the write's success
+        """
+        self._counters["accepted"] += 1
+        if not self.running:
+            return await self._write([(attempt_id, attempt)]) == 1
+
+        if self._queue.full():
+            self._counters["blocked"] += 1
+        await self._queue.put((attempt_id, attempt))
+        self._counters["max_depth"] = max(self._counters["max_depth"], self._queue.qsize())
+        return True
+
+    async def write_now(self, attempts: List[QueuedAttempt], add_stats: bool = True) -> int:
+        """
+        Write attempts in one bulk write without queueing them.
+
+        For callers that report the outcome to the client (batch sync).
+        Attempts are written as whole documents, so writing the same IDs again
+        overwrites them. With ``add_stats=False`` the caller adds the stats
+        with :meth:`add_stats` once it knows the attempts count, e.g. after
+        the whole batch has been written.
+
+        Returns:
+            Number of attempts written
+        """
+        self._counters["accepted"] += len(attempts)
+        return await self._write(attempts, add_stats=add_stats)
+
+    async def _next_batch(self) -> Tuple[List[QueuedAttempt], bool]:
+        """Wait for an attempt, then collect a batch; True once the stop marker is seen"""
+        first = await self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.batch_interval
+        while len(batch) < self.batch_size:
+            if self._queue.empty():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self._queue.get_nowait()
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _consume(self):
+        while True:
+            batch, stopping = await self._next_batch()
+            if batch:
+                try:
+                    requeued = len(batch) - await self._write(batch, requeue=not stopping)
+                except Exception as e:
+                    requeued = 0
+                    logger.error(f"Attempt batch failed: {e}")
+                if requeued and not stopping:
+                    # The database is unavailable; give it a moment
+                    await asyncio.sleep(self.batch_interval)
+            if stopping:
+                return
+
+    async def _write(self, batch: List[QueuedAttempt], requeue: bool = False, add_stats: bool = True) -> int:
+        """
+        Create a batch of attempts and (unless ``add_stats`` is False) add their stats.
+
+        Returns:
+            Number of attempts written
+        """
+        started = time.perf_counter()
+        try:
+            result = await self.database.bulk_write([
+                {"type": "create", "collection": ATTEMPTS_COLLECTION, "document_id": attempt_id, "data": attempt}
+                for attempt_id, attempt in batch
+            ])
+            outcomes = result["results"]
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} attempts: {e}")
+            outcomes = [{"success": False, "reason": self.database.failure_reason(e)} for _ in batch]
+
+        written: List[Dict[str, Any]] = []
+        for (attempt_id, attempt), outcome in zip(batch, outcomes):
+            if outcome["success"]:
+                written.append(attempt)
+            elif requeue and outcome.get("reason") == "unavailable" and not self._queue.full():
+                self._queue.put_nowait((outcome.get("document_id") or attempt_id, attempt))
+                self._counters["requeued"] += 1
+            else:
+                self._counters["failed"] += 1
+
+        if add_stats:
+            await self.add_stats(written)
+
+        self._counters["batches"] += 1
+        self._counters["written"] += len(written)
+        self._counters["last_batch_seconds"] = time.perf_counter() - started
+        return len(written)
+
+    async def add_stats(self, attempts: List[Dict[str, Any]]):
+        """Add written attempts to their questions' stats, one increment per question"""
+        stats: Dict[str, Dict[str, float]] = {}
+        for attempt in attempts:
+            if attempt.get("verified") is False:
+                # Graded by the client; stored, but not trusted for stats
+                continue
+            counts = stats.setdefault(
+                attempt["question_id"],
+                {"total_attempts": 0, "correct_attempts": 0, "timed_attempts": 0, "total_time": 0.0}
+            )
+            counts["total_attempts"] += 1
+            counts["correct_attempts"] += 1 if attempt.get("is_correct") else 0
+            counts["timed_attempts"] += 1
+            counts["total_time"] += attempt.get("time_taken", 0.0)
+        results = await asyncio.gather(
+            *(self.counter.increment(question_id, counts) for question_id, counts in stats.items()),
+            return_exceptions=True
+        )
+        for question_id, outcome in zip(stats, results):
+            if isinstance(outcome, Exception):
+                logger.error(f"Failed to add attempt stats for question {question_id}: {outcome}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, backpressure and write counters"""
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "capacity": self.max_queued,
+            "running": self.running,
+            **self._counters
+        }
+
+
+# Global attempt ingestion queue
+attempt_queue = AttemptQueue()
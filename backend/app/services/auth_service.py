@@ -1,9 +1,12 @@
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
+import asyncio
 import logging
 import firebase_admin
 from firebase_admin import auth as firebase_auth
 from app.core.database import db
+from app.core.dataloader import in_batching_scope
+from app.core.write_behind import write_buffer
 from app.core.security import (
     create_access_token,
     create_refresh_token,
@@ -13,7 +16,7 @@ from app.core.security import (
     verify_refresh_token,
     generate_device_fingerprint
 )
-from app.core.exceptions import AuthenticationError, ValidationError, ConflictError
+from app.core.exceptions import AuthenticationError, ConflictError, DatabaseUnavailableError, ValidationError
 
 logger = logging.getLogger(__name__)
 
@@ -103,6 +106,8 @@ class AuthService:
             
             return user
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Authentication failed: {e}")
             return None
@@ -181,15 +186,22 @@ class AuthService:
         if not user_id:
             return None
         
-        # Try to get regular user first
-        user = await db.get_document("users", user_id)
+        # Within a request both collections are read at once, coalesced into
+        # one batched RPC; elsewhere anonymous users are read only on a miss.
+        # Regular users take precedence.
+        if in_batching_scope():
+            user, anonymous_user = await asyncio.gather(
+                db.get_document("users", user_id),
+                db.get_document("anonymous_users", user_id)
+            )
+        else:
+            user = await db.get_document("users", user_id)
+            anonymous_user = None if user else await db.get_document("anonymous_users", user_id)
         if user:
             user.pop("password_hash", None)
             return user
         
-        # Try anonymous user
-        user = await db.get_document("anonymous_users", user_id)
-        return user
+        return anonymous_user
     
     async def register_device(
         self,
@@ -199,28 +211,35 @@ class AuthService:
     ) -> bool:
         """Register a device for a user"""
         try:
-            # Check existing devices for this user
+            # Check if this device is already registered for the user
             existing_devices = await db.query_collection(
+                "user_devices",
+                filters=[
+                    {"field": "user_id", "operator": "==", "value": user_id},
+                    {"field": "device_fingerprint", "operator": "==", "value": device_fingerprint}
+                ],
+                limit=1
+            )
+            
+            if existing_devices:
+                # Heartbeat the existing device; repeated logins coalesce
+                await write_buffer.update(
+                    "user_devices",
+                    existing_devices[0]["id"],
+                    {
+                        "last_active": datetime.utcnow(),
+                        "device_info": device_info
+                    }
+                )
+                return True
+            
+            # Check device limit (3 devices max) without reading the devices
+            device_count = await db.count(
                 "user_devices",
                 filters=[{"field": "user_id", "operator": "==", "value": user_id}]
             )
             
-            # Check device limit (3 devices max)
-            if len(existing_devices) >= 3:
-                # Check if this device already exists
-                for device in existing_devices:
-                    if device["device_fingerprint"] == device_fingerprint:
-                        # Update existing device
-                        await db.update_document(
-                            "user_devices",
-                            device["id"],
-                            {
-                                "last_active": datetime.utcnow(),
-                                "device_info": device_info
-                            }
-                        )
-                        return True
-                
+            if device_count >= 3:
                 # Device limit exceeded
                 raise ValidationError("Device limit exceeded (3 devices maximum)")
             
@@ -339,6 +358,8 @@ class AuthService:
             
         except firebase_auth.InvalidIdTokenError:
             raise AuthenticationError("Invalid Google ID token")
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Google authentication failed: {e}")
             raise AuthenticationError("Google authentication failed")
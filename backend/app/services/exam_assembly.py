@@ -0,0 +1,112 @@
+"""
+Blueprint-driven assembly of simulated exam papers.
+
+A blueprint (see :mod:`app.core.exam_blueprints`) is expanded into strata,
+one per subject x topic x difficulty x ARDE cell, and every stratum is
+sampled at the same time. Strata the bank cannot fill are backfilled from
+neighbouring strata by relaxing their criteria step by step; each step is
+again one concurrent round for all strata still short, repeated only while
+concurrent draws collided on the same question.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Set
+import asyncio
+import logging
+import random
+
+from app.core.exam_blueprints import DIFFICULTIES, expand_blueprint
+from app.services.question_service import QuestionService, question_service
+
+logger = logging.getLogger(__name__)
+
+
+def _adjacent_difficulties(difficulty: Optional[str]) -> Optional[List[str]]:
+    if difficulty not in DIFFICULTIES:
+        return None
+    position = DIFFICULTIES.index(difficulty)
+    return DIFFICULTIES[max(position - 1, 0):position + 2]
+
+
+# Backfill steps, nearest neighbours first: any ARDE probability, then an
+# adjacent difficulty, then any question of the subject, then of the exam
+RELAXATIONS: List[Callable[[Dict[str, Any]], Dict[str, Any]]] = [
+    lambda criteria: {**criteria, "arde_probability": None},
+    lambda criteria: {**criteria, "arde_probability": None, "difficulty": _adjacent_difficulties(criteria["difficulty"])},
+    lambda criteria: {**criteria, "arde_probability": None, "difficulty": None, "topic": None},
+    lambda criteria: {"exam_type": criteria["exam_type"]},
+]
+
+
+class ExamAssembler:
+    """Fills blueprint strata concurrently from the question bank"""
+
+    def __init__(self, questions: Optional[QuestionService] = None):
+        self.questions = questions or question_service
+
+    async def assemble(self, exam_type: str, blueprint: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Assemble one paper for a validated blueprint.
+
+        Returns:
+            Dict with ``questions`` (grouped by section, shuffled within each
+            section, ready for delivery), per-stratum ``strata`` stats and the
+            overall ``shortfall``
+        """
+        strata = expand_blueprint(exam_type, blueprint)
+        picked: List[List[Dict[str, Any]]] = [[] for _ in strata]
+        chosen: Set[str] = set()
+        backfilled = [0] * len(strata)
+
+        async def fill(positions: List[int], criteria_for: Callable[[Dict[str, Any]], Dict[str, Any]], level: int):
+            wanted = {position: strata[position]["quota"] - len(picked[position]) for position in positions}
+            exclude = set(chosen)
+            results = await asyncio.gather(*(
+                self.questions.sample_questions(criteria_for(strata[position]["criteria"]), wanted[position], exclude)
+                for position in positions
+            ))
+            # Strata sampled in the same round may draw the same question;
+            # it is kept once and the gap retried
+            for position, questions in zip(positions, results):
+                for question in questions:
+                    if len(picked[position]) < strata[position]["quota"] and question["id"] not in chosen:
+                        chosen.add(question["id"])
+                        picked[position].append(question)
+                        if level:
+                            backfilled[position] += 1
+
+        await fill(list(range(len(strata))), lambda criteria: criteria, 0)
+        for level, relax in enumerate(RELAXATIONS, start=1):
+            # Repeat a level while it still finds questions
+            while True:
+                short = [position for position, stratum in enumerate(strata) if len(picked[position]) < stratum["quota"]]
+                before = len(chosen)
+                if short:
+                    await fill(short, relax, level)
+                if len(chosen) == before:
+                    break
+
+        sections: Dict[int, List[Dict[str, Any]]] = {}
+        for stratum, questions in zip(strata, picked):
+            sections.setdefault(stratum["section"], []).extend(questions)
+        paper: List[Dict[str, Any]] = []
+        for position in sorted(sections):
+            random.shuffle(sections[position])
+            paper += sections[position]
+        self.questions.prepare_for_delivery(paper)
+
+        shortfall = sum(stratum["quota"] for stratum in strata) - len(paper)
+        if shortfall:
+            logger.warning(f"{exam_type} paper is {shortfall} questions short of its blueprint")
+        return {
+            "questions": paper,
+            "strata": [
+                {**stratum["criteria"], "section": stratum["section"], "quota": stratum["quota"],
+                 "filled": len(questions), "backfilled": count}
+                for stratum, questions, count in zip(strata, picked, backfilled)
+            ],
+            "shortfall": shortfall
+        }
+
+
+# Global exam assembler
+exam_assembler = ExamAssembler()
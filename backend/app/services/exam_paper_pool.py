@@ -0,0 +1,272 @@
+"""
+Pool of pre-assembled simulated real exam (SRE) papers.
+
+Assembling a full paper samples hundreds of questions, so a background task
+assembles papers ahead of time from the official blueprints and stores each
+one in ``exam_papers`` as a compact list of question IDs. Handing out a paper
+is then one history read-modify-write plus an ID lookup in the question index.
+
+- Refill: when fewer than ``EXAM_PAPER_POOL_MIN`` papers of an exam type
+  remain, the pool is topped back up to ``EXAM_PAPER_POOL_SIZE``, first with
+  stored papers other workers assembled and then with new ones.
+- Rotation: a paper is retired after ``EXAM_PAPER_MAX_USES`` handouts. Each
+  worker counts its own handouts and adds them to the stored ``uses`` field
+  through the write-behind buffer, so the ~20 papers of an exam type are not
+  contended by a transaction per handout. Maintenance reads the stored counts
+  back and retires papers other workers used up, so with several workers a
+  paper can go a few handouts over the budget before it is retired.
+- No repeats: the last ``EXAM_PAPER_HISTORY`` papers given to each user are
+  kept in ``user_exam_papers`` and are not handed to that user again.
+- Retired questions: papers that reference a question no longer in the
+  index (deactivated, rejected or deleted) are dropped and replaced.
+
+Custom blueprints, and exam types whose pool is empty or exhausted for a
+user, are assembled on demand by the caller.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import random
+
+from app.core.config import settings
+from app.core.database import db
+from app.core.db_base import BaseDatabase
+from app.core.exam_blueprints import EXAM_BLUEPRINTS, get_blueprint
+from app.core.write_behind import WriteBehindBuffer, write_buffer
+from app.services.exam_assembly import ExamAssembler, exam_assembler
+from app.services.question_index import QUESTION_DELIVERY_FIELDS, QuestionIndex, question_index
+
+logger = logging.getLogger(__name__)
+
+PAPERS_COLLECTION = "exam_papers"
+HISTORY_COLLECTION = "user_exam_papers"
+
+
+class ExamPaperPool:
+    """Per exam type pool of pre-assembled papers"""
+
+    def __init__(
+        self,
+        database: Optional[BaseDatabase] = None,
+        assembler: Optional[ExamAssembler] = None,
+        index: Optional[QuestionIndex] = None,
+        buffer: Optional[WriteBehindBuffer] = None
+    ):
+        self.database = database or db
+        self.write_buffer = buffer or write_buffer
+        self.assembler = assembler or exam_assembler
+        self.index = index if index is not None else question_index
+        self.papers: Dict[str, List[Dict[str, Any]]] = {exam_type: [] for exam_type in EXAM_BLUEPRINTS}
+        self._counters = {"served": 0, "misses": 0, "assembled": 0, "dropped": 0, "rotated": 0}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    # Maintenance
+
+    async def start(self):
+        """Load stored papers and keep the pool filled in the background"""
+        try:
+            await self.load()
+        except Exception as e:
+            logger.error(f"Failed to load exam paper pool: {e}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._maintain_periodically())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _maintain_periodically(self):
+        while True:
+            try:
+                await self.maintain()
+            except Exception as e:
+                logger.error(f"Exam paper pool maintenance failed: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.EXAM_PAPER_CHECK_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def load(self):
+        """Replace the in-memory pool with up to a full pool of stored papers per exam type"""
+        self.papers = {exam_type: [] for exam_type in EXAM_BLUEPRINTS}
+        for exam_type in self.papers:
+            await self._adopt_stored(exam_type)
+
+    async def _adopt_stored(self, exam_type: str) -> int:
+        """
+        Add stored papers this worker does not hold yet, up to the pool size.
+
+        Returns:
+            Number of papers added
+        """
+        papers = self.papers[exam_type]
+        if len(papers) >= settings.EXAM_PAPER_POOL_SIZE:
+            return 0
+        # One page of the pool size bounds the read however many papers are stored
+        page = await self.database.query_page(
+            PAPERS_COLLECTION,
+            filters=[{"field": "exam_type", "operator": "==", "value": exam_type}],
+            page_size=settings.EXAM_PAPER_POOL_SIZE
+        )
+        held = {paper["id"] for paper in papers}
+        added = 0
+        for paper in page["items"]:
+            if len(papers) >= settings.EXAM_PAPER_POOL_SIZE:
+                break
+            if paper["id"] not in held and paper.get("uses", 0) < settings.EXAM_PAPER_MAX_USES:
+                papers.append(paper)
+                added += 1
+        return added
+
+    async def maintain(self):
+        """Sync handout counts, drop papers with retired questions, then refill short pools"""
+        await self.sync_uses()
+        if not self.index.ready:
+            # Without the index neither retirement checks nor cheap assembly are possible
+            return
+        for exam_type, papers in self.papers.items():
+            for paper in [paper for paper in papers if not all(question_id in self.index for question_id in paper["question_ids"])]:
+                await self._discard(paper, "dropped")
+            if len(papers) < settings.EXAM_PAPER_POOL_MIN:
+                await self.refill(exam_type)
+
+    async def refill(self, exam_type: str) -> int:
+        """
+        Assemble papers until the pool for ``exam_type`` is full.
+
+        Returns:
+            Number of papers added
+        """
+        blueprint = get_blueprint(exam_type)
+        added = await self._adopt_stored(exam_type)
+        # Bounded so a bank too small for the blueprint does not spin
+        for _ in range(2 * settings.EXAM_PAPER_POOL_SIZE):
+            if len(self.papers[exam_type]) >= settings.EXAM_PAPER_POOL_SIZE:
+                break
+            assembly = await self.assembler.assemble(exam_type, blueprint)
+            if assembly["shortfall"]:
+                logger.warning(f"Question bank cannot fill a full {exam_type} paper; pool not refilled")
+                break
+            paper = {
+                "exam_type": exam_type,
+                "question_ids": [question["id"] for question in assembly["questions"]],
+                "uses": 0,
+                "created_at": datetime.utcnow()
+            }
+            paper["id"] = await self.database.create_document(PAPERS_COLLECTION, paper)
+            self.papers[exam_type].append(paper)
+            self._counters["assembled"] += 1
+            added += 1
+        return added
+
+    async def sync_uses(self):
+        """Take in handouts by other workers, retiring papers they used up or removed"""
+        for papers in self.papers.values():
+            if not papers:
+                continue
+            stored = await self.database.get_documents(PAPERS_COLLECTION, [paper["id"] for paper in papers], fields=["uses"])
+            for paper in list(papers):
+                current = stored.get(paper["id"])
+                # Own handouts still in the write buffer are not stored yet, so never count down
+                paper["uses"] = max(paper.get("uses", 0), current.get("uses", 0) if current else settings.EXAM_PAPER_MAX_USES)
+                if paper["uses"] >= settings.EXAM_PAPER_MAX_USES:
+                    await self._discard(paper, "rotated")
+
+    async def _discard(self, paper: Dict[str, Any], reason: str):
+        papers = self.papers.get(paper["exam_type"], [])
+        paper["discarded"] = True
+        remaining = [other for other in papers if other["id"] != paper["id"]]
+        if len(remaining) < len(papers):
+            papers[:] = remaining
+            self._counters[reason] += 1
+            await self.database.delete_document(PAPERS_COLLECTION, paper["id"])
+        if len(papers) < settings.EXAM_PAPER_POOL_MIN:
+            self._wakeup.set()
+
+    # Handout
+
+    async def _questions_for(self, paper: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """The paper's questions in order, or None if any has been retired"""
+        question_ids = paper["question_ids"]
+        if self.index.ready:
+            found = self.index.get_many(question_ids)
+        else:
+            documents = await self.database.get_documents(
+                "questions", question_ids, fields=QUESTION_DELIVERY_FIELDS + ["is_active", "approval_status"]
+            )
+            found = {
+                question_id: document for question_id, document in documents.items()
+                if document and document.get("is_active", True) and document.get("approval_status") == "approved"
+            }
+        if len(found) < len(question_ids):
+            return None
+        return [found[question_id] for question_id in question_ids]
+
+    async def checkout(self, exam_type: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Hand a user a pooled paper they have not had recently.
+
+        Returns:
+            Dict with ``paper_id`` and ``questions`` (ready for delivery), or
+            None if the pool has no suitable paper
+        """
+        papers = self.papers.get(exam_type)
+        if not papers:
+            self._counters["misses"] += 1
+            self._wakeup.set()
+            return None
+
+        history = await self.database.get_document(HISTORY_COLLECTION, user_id)
+        seen = set(history.get("paper_ids", [])) if history else set()
+        # Start at a random paper so concurrent users spread over the pool
+        start = random.randrange(len(papers))
+        for paper in papers[start:] + papers[:start]:
+            # Another request may have dropped the paper while this one awaited
+            if paper["id"] in seen or paper.get("discarded"):
+                continue
+            questions = await self._questions_for(paper)
+            if questions is None:
+                await self._discard(paper, "dropped")
+                continue
+            await self._count_use(paper)
+            await self._record_use(paper, user_id)
+            self.assembler.questions.prepare_for_delivery(questions)
+            self._counters["served"] += 1
+            return {"paper_id": paper["id"], "questions": questions}
+
+        self._counters["misses"] += 1
+        return None
+
+    async def _count_use(self, paper: Dict[str, Any]):
+        """Count a handout, retiring the paper at ``EXAM_PAPER_MAX_USES``"""
+        paper["uses"] = paper.get("uses", 0) + 1
+        if paper["uses"] >= settings.EXAM_PAPER_MAX_USES:
+            await self._discard(paper, "rotated")
+        else:
+            await self.write_buffer.increment(PAPERS_COLLECTION, paper["id"], {"uses": 1})
+
+    async def _record_use(self, paper: Dict[str, Any], user_id: str):
+        def remember(current: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            paper_ids = (current or {}).get("paper_ids", []) + [paper["id"]]
+            return {"paper_ids": paper_ids[-settings.EXAM_PAPER_HISTORY:], "updated_at": datetime.utcnow()}
+
+        await self.database.transactional_update(HISTORY_COLLECTION, user_id, remember)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "papers": {exam_type: len(papers) for exam_type, papers in self.papers.items()}
+        }
+
+
+# Global exam paper pool
+exam_paper_pool = ExamPaperPool()
@@ -0,0 +1,252 @@
+"""
+Server-side exam sessions.
+
+Starting an exam records the selected question IDs, their order and the
+deadline once, in ``exam_sessions``, under a generated session ID. The client
+then fetches questions a page at a time (or one by position) and can resume
+after a dropped connection from the session alone; pages are served from the
+question index when it is ready. Submitting grades against the session's own
+question list and closes the session.
+
+A submission first claims the session (``active`` -> ``grading``) in a
+transaction, so concurrent submits cannot both grade it, and is rejected
+once ``EXAM_SUBMIT_GRACE_SECONDS`` have passed since the deadline. The result
+is then attached (``grading`` -> ``submitted``); if grading fails the claim
+is released. A claim whose worker died can be taken over after
+``EXAM_GRADING_CLAIM_SECONDS``.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+import logging
+import uuid
+
+from app.core.config import settings
+from app.core.database import db
+from app.core.db_base import BaseDatabase
+from app.core.db_utils import utc_naive
+from app.core.exceptions import ConflictError, NotFoundError, ValidationError
+from app.services.question_index import QUESTION_DELIVERY_FIELDS, QuestionIndex, question_index
+from app.services.question_service import QuestionService
+
+logger = logging.getLogger(__name__)
+
+SESSIONS_COLLECTION = "exam_sessions"
+
+
+class ExamSessionService:
+    """Creates exam sessions and serves their questions in pages"""
+
+    def __init__(self, database: Optional[BaseDatabase] = None, index: Optional[QuestionIndex] = None):
+        self.database = database or db
+        self.index = index if index is not None else question_index
+
+    async def create_session(
+        self,
+        user_id: str,
+        kind: str,
+        exam_type: str,
+        question_ids: List[str],
+        time_minutes: float,
+        paper_id: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Record a new exam session.
+
+        Args:
+            user_id: Exam taker
+            kind: ``sprint`` or ``sre``
+            exam_type: Exam type
+            question_ids: The paper, in delivery order
+            time_minutes: Time allowed
+            paper_id: Pooled paper the questions came from, if any
+            details: Extra fields to keep (e.g. the exam pattern)
+
+        Returns:
+            The session, with its ``id``
+        """
+        started_at = datetime.utcnow()
+        session = {
+            "user_id": user_id,
+            "kind": kind,
+            "exam_type": exam_type,
+            "question_ids": question_ids,
+            "question_count": len(question_ids),
+            "paper_id": paper_id,
+            "started_at": started_at,
+            "deadline": started_at + timedelta(minutes=time_minutes),
+            "status": "active",
+            **(details or {})
+        }
+        session["id"] = await self.database.create_document(SESSIONS_COLLECTION, dict(session))
+        return session
+
+    async def get_session(self, session_id: str, user_id: str) -> Dict[str, Any]:
+        """
+        Get one of a user's sessions.
+
+        Raises:
+            NotFoundError: If it does not exist or belongs to another user
+        """
+        session = await self.database.get_document(SESSIONS_COLLECTION, session_id)
+        if not session or session.get("user_id") != user_id:
+            raise NotFoundError("Exam session not found")
+        return session
+
+    async def active_question_ids(self, user_id: str) -> Set[str]:
+        """
+        Questions on the user's exams still in progress.
+
+        Practice grading must not reveal answers to these, or a student could
+        collect the answer key of the exam they are sitting.
+        """
+        sessions = await self.database.query_collection(
+            SESSIONS_COLLECTION,
+            filters=[
+                {"field": "user_id", "operator": "==", "value": user_id},
+                {"field": "status", "operator": "in", "value": ["active", "grading"]}
+            ],
+            fields=["question_ids", "deadline"]
+        )
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.EXAM_SUBMIT_GRACE_SECONDS)
+        return {
+            question_id
+            for session in sessions if utc_naive(session["deadline"]) > cutoff
+            for question_id in session.get("question_ids", [])
+        }
+
+    @staticmethod
+    def summary(session: Dict[str, Any]) -> Dict[str, Any]:
+        """Session fields for clients: everything but the question list"""
+        remaining = (utc_naive(session["deadline"]) - datetime.utcnow()).total_seconds()
+        return {
+            **{field: value for field, value in session.items() if field not in ("question_ids", "user_id")},
+            "remaining_seconds": max(0, int(remaining))
+        }
+
+    async def _load_questions(self, question_ids: List[str]) -> List[Dict[str, Any]]:
+        if self.index.ready:
+            found = self.index.get_many(question_ids)
+        else:
+            documents = await self.database.get_documents("questions", question_ids, fields=QUESTION_DELIVERY_FIELDS)
+            found = {question_id: document for question_id, document in documents.items() if document}
+        # Questions retired mid-exam are skipped rather than failing the page
+        questions = [found[question_id] for question_id in question_ids if question_id in found]
+        QuestionService.prepare_for_delivery(questions)
+        return questions
+
+    async def get_questions(
+        self,
+        session_id: str,
+        user_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        One page of a session's questions, in paper order.
+
+        Returns:
+            Dict with ``items`` (each with its ``position``), ``offset``,
+            ``next_offset`` (None on the last page) and ``total``
+
+        Raises:
+            NotFoundError: If the session is not the user's
+            ValidationError: If the session is over or ``offset`` is out of range
+        """
+        return await self.page(await self.get_session(session_id, user_id), offset, limit)
+
+    async def page(self, session: Dict[str, Any], offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Page of an already loaded session (see :meth:`get_questions`)"""
+        if session["status"] != "active" or datetime.utcnow() > utc_naive(session["deadline"]):
+            raise ValidationError("Exam session has ended")
+        total = len(session["question_ids"])
+        if offset < 0 or offset >= max(total, 1):
+            raise ValidationError("Question offset out of range")
+
+        limit = min(limit or settings.DEFAULT_PAGE_SIZE, settings.MAX_PAGE_SIZE)
+        page_ids = session["question_ids"][offset:offset + limit]
+        positions = {question_id: offset + i for i, question_id in enumerate(page_ids)}
+        items = await self._load_questions(page_ids)
+        for question in items:
+            question["position"] = positions[question["id"]]
+
+        next_offset = offset + len(page_ids)
+        return {
+            "items": items,
+            "offset": offset,
+            "next_offset": next_offset if next_offset < total else None,
+            "total": total
+        }
+
+    async def begin_grading(self, session_id: str, user_id: str) -> Dict[str, Any]:
+        """
+        Claim an active session for grading its submission.
+
+        Returns:
+            The session, with the ``grading_claim`` to pass to
+            :meth:`complete` or :meth:`release`
+
+        Raises:
+            NotFoundError: If the session is not the user's
+            ConflictError: If it was already submitted or is being graded
+            ValidationError: If the submission arrived after the deadline
+        """
+        now = datetime.utcnow()
+        claim = uuid.uuid4().hex
+        outcome: Dict[str, Any] = {}
+
+        def begin(current: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            outcome.clear()
+            if current is None or current.get("user_id") != user_id:
+                outcome["error"] = NotFoundError("Exam session not found")
+                return None
+            submitted_at = now
+            if current.get("status") == "grading":
+                started = current.get("grading_started_at")
+                if started and now - utc_naive(started) < timedelta(seconds=settings.EXAM_GRADING_CLAIM_SECONDS):
+                    outcome["error"] = ConflictError("Exam session is already being graded")
+                    return None
+                # Taking over from a worker that died: keep the original submission time
+                submitted_at = utc_naive(started) if started else now
+            elif current.get("status") != "active":
+                outcome["error"] = ConflictError("Exam session was already submitted")
+                return None
+            if submitted_at > utc_naive(current["deadline"]) + timedelta(seconds=settings.EXAM_SUBMIT_GRACE_SECONDS):
+                outcome["error"] = ValidationError("Exam time is over; the submission was too late")
+                return {"status": "expired"}
+            outcome["session"] = {**current, "status": "grading", "grading_claim": claim, "grading_started_at": submitted_at}
+            return {"status": "grading", "grading_claim": claim, "grading_started_at": submitted_at}
+
+        await self.database.transactional_update(SESSIONS_COLLECTION, session_id, begin)
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["session"]
+
+    async def complete(self, session_id: str, claim: str, result_id: str):
+        """
+        Attach the graded result and close the session.
+
+        Raises:
+            ConflictError: If the grading claim was lost to another worker
+        """
+        def close(current: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            if current is None or current.get("status") != "grading" or current.get("grading_claim") != claim:
+                return None
+            return {"status": "submitted", "result_id": result_id, "submitted_at": datetime.utcnow()}
+
+        if await self.database.transactional_update(SESSIONS_COLLECTION, session_id, close) is None:
+            raise ConflictError("Exam session was already submitted")
+
+    async def release(self, session_id: str, claim: str):
+        """Return a session to ``active`` after its grading failed"""
+        def reopen(current: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            if current is None or current.get("status") != "grading" or current.get("grading_claim") != claim:
+                return None
+            return {"status": "active", "grading_claim": None}
+
+        await self.database.transactional_update(SESSIONS_COLLECTION, session_id, reopen)
+
+
+# Global exam session service instance
+exam_session_service = ExamSessionService()
@@ -0,0 +1,159 @@
+"""
+Server-side exam grading.
+
+A submission is graded against the answer key of every question on the
+paper, taken from the in-memory answer key store (with one multi-get for any
+it does not hold). Scoring is a single pass that turns the paper
+into an outcome string (``c`` correct, ``i`` incorrect, ``u`` unanswered,
+``x`` ungraded because the question no longer exists); totals and the
+per-subject and per-topic breakdowns are then counted from that string with
+C-level ``str.count`` and ``Counter`` rather than per-question Python logic.
+
+Each graded submission is stored in ``exam_results`` as a compact record: the
+paper's question IDs with the aligned outcome string, plus the totals and
+breakdowns.
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import logging
+
+from app.core.database import db
+from app.core.db_base import BaseDatabase
+from app.core.exam_blueprints import get_marking
+from app.core.exceptions import ValidationError
+from app.services.answer_key_store import AnswerKeyStore, answer_key_store
+
+logger = logging.getLogger(__name__)
+
+RESULTS_COLLECTION = "exam_results"
+
+OUTCOMES = {"c": "correct", "i": "incorrect", "u": "unanswered", "x": "ungraded"}
+
+
+def _tally(counts: Dict[str, int], marking: Dict[str, float]) -> Dict[str, Any]:
+    """Named counts and score from outcome-code counts"""
+    tally = {name: counts.get(code, 0) for code, name in OUTCOMES.items()}
+    tally["total"] = sum(tally.values())
+    tally["score"] = sum(tally[name] * marking[name] for name in ("correct", "incorrect", "unanswered"))
+    return tally
+
+
+class GradingService:
+    """Grades exam submissions against stored answer keys"""
+
+    def __init__(self, database: Optional[BaseDatabase] = None, answer_keys: Optional[AnswerKeyStore] = None):
+        self.database = database or db
+        self.answer_keys = answer_keys if answer_keys is not None else answer_key_store
+
+    async def load_answer_key(self, question_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Answer key entries for the questions that exist"""
+        return await self.answer_keys.get_many(question_ids)
+
+    @staticmethod
+    def score(
+        question_ids: List[str],
+        answers: Dict[str, Optional[str]],
+        answer_key: Dict[str, Dict[str, Any]],
+        marking: Dict[str, float]
+    ) -> Dict[str, Any]:
+        """
+        Score a paper.
+
+        Args:
+            question_ids: The paper, in order
+            answers: Question ID -> selected answer (missing or None = unanswered)
+            answer_key: Question ID -> ``correct_answer``, ``subject``, ``topic``
+            marking: Marks for ``correct``, ``incorrect`` and ``unanswered``
+
+        Returns:
+            Dict with ``outcomes`` (one code per question), overall counts and
+            ``score``, ``max_score``, ``percentage``, ``by_subject`` and
+            ``by_topic`` (subject -> topic -> counts)
+        """
+        entries = [answer_key.get(question_id) for question_id in question_ids]
+        selected = [answers.get(question_id) for question_id in question_ids]
+        outcomes = "".join(
+            "x" if entry is None else "u" if choice is None else "c" if choice == entry.get("correct_answer") else "i"
+            for entry, choice in zip(entries, selected)
+        )
+        subjects = [entry.get("subject") if entry else None for entry in entries]
+        topics = [entry.get("topic") if entry else None for entry in entries]
+
+        result = _tally({code: outcomes.count(code) for code in OUTCOMES}, marking)
+        graded = result["total"] - result["ungraded"]
+        result["max_score"] = graded * marking["correct"]
+        result["percentage"] = round(100 * result["score"] / result["max_score"], 2) if result["max_score"] else 0.0
+
+        by_subject: Dict[str, Dict[str, int]] = {}
+        for (subject, code), count in Counter(zip(subjects, outcomes)).items():
+            if subject is not None:
+                by_subject.setdefault(subject, {})[code] = count
+        by_topic: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for (subject, topic, code), count in Counter(zip(subjects, topics, outcomes)).items():
+            if subject is not None and topic is not None:
+                by_topic.setdefault(subject, {}).setdefault(topic, {})[code] = count
+
+        result["by_subject"] = {subject: _tally(counts, marking) for subject, counts in by_subject.items()}
+        result["by_topic"] = {
+            subject: {topic: _tally(counts, marking) for topic, counts in topic_counts.items()}
+            for subject, topic_counts in by_topic.items()
+        }
+        result["outcomes"] = outcomes
+        return result
+
+    async def grade_submission(self, user_id: str, submission: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Grade a submission and store the result.
+
+        Args:
+            user_id: Submitting user
+            submission: ``exam_id``, ``exam_type``, ``answers`` (dicts with
+                ``question_id``, ``selected_answer``, ``time_taken``) and
+                ``question_ids``, the paper of the exam session
+
+        Returns:
+            The stored result, with its ``id``
+
+        Raises:
+            ValidationError: If the paper is missing, or answers are
+                duplicated or not on the paper
+        """
+        answers = submission["answers"]
+        answered = [answer["question_id"] for answer in answers]
+        if len(set(answered)) < len(answered):
+            raise ValidationError("Each question can be answered only once")
+
+        question_ids = submission.get("question_ids")
+        if not question_ids:
+            raise ValidationError("The paper to grade is required")
+        if len(set(question_ids)) < len(question_ids):
+            raise ValidationError("The paper lists a question more than once")
+        off_paper = set(answered) - set(question_ids)
+        if off_paper:
+            raise ValidationError(f"{len(off_paper)} answers are for questions not on the paper")
+
+        answer_key = await self.load_answer_key(question_ids)
+        result = self.score(
+            question_ids,
+            {answer["question_id"]: answer.get("selected_answer") for answer in answers},
+            answer_key,
+            get_marking(submission.get("exam_type"))
+        )
+
+        record = {
+            "user_id": user_id,
+            "exam_id": submission.get("exam_id"),
+            "exam_type": submission.get("exam_type"),
+            "question_ids": question_ids,
+            "time_taken": sum(answer.get("time_taken", 0.0) for answer in answers),
+            "submitted_at": datetime.utcnow(),
+            **result
+        }
+        record["id"] = await self.database.create_document(RESULTS_COLLECTION, dict(record))
+        return record
+
+
+# Global grading service instance
+grading_service = GradingService()
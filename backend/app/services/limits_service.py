@@ -5,13 +5,16 @@ Handles limit validation, usage tracking, and enforcement logic.
 
 from typing import Dict, Any, Optional, Tuple, Union
 from datetime import datetime, timedelta
+import asyncio
 import logging
 from app.core.database import db
+from app.core.dataloader import in_batching_scope
+from app.core.db_utils import Increment
 from app.core.limits_config import (
     get_tier_config, get_daily_limit, get_total_limit,
     get_rate_limit, is_unlimited, get_trial_period_days,
     get_max_devices, supports_device_sync, ERROR_MESSAGES,
-    GRACE_PERIODS, USAGE_FIELDS
+    GRACE_PERIODS, USAGE_FIELDS, FEATURE_USAGE_FIELDS
 )
 from app.core.exceptions import ValidationError
 
@@ -194,12 +197,13 @@ class LimitsService:
             Tuple of (is_allowed: bool, validation_info: dict)
         """
         try:
-            # Get current user data
-            user_data = await self._get_user_data(user_id)
+            # Limits are enforced on the stored counts, not the cached user
+            user_data = await self._get_user_data(user_id, cached=False)
             if not user_data:
                 return False, {"error": "User not found"}
 
-            current_usage = user_data.get("usage_stats", {}).get(feature, 0)
+            usage_field = FEATURE_USAGE_FIELDS.get(usage_type, {}).get(feature, feature)
+            current_usage = user_data.get("usage_stats", {}).get(usage_field, 0)
 
             if usage_type == "daily":
                 return await self.check_daily_limit(user_id, tier, feature, current_usage)
@@ -242,16 +246,13 @@ class LimitsService:
                 logger.warning(f"Unknown feature for usage tracking: {feature}")
                 return False
 
-            # Update usage in database
-            update_data = {
-                field_path: amount,  # This will increment the field
-                "updated_at": datetime.utcnow()
-            }
-
-            # Try regular users first, then anonymous users
-            success = await db.update_document("users", user_id, update_data)
+            # Counters are incremented server-side, and written at once rather
+            # than through the write-behind buffer so the next limit check
+            # sees them; regular users first, then anonymous users
+            update = {field_path: Increment(amount), "updated_at": datetime.utcnow()}
+            success = await self.db.update_document("users", user_id, update)
             if not success:
-                success = await db.update_document("anonymous_users", user_id, update_data)
+                success = await self.db.update_document("anonymous_users", user_id, update)
 
             if success:
                 logger.info(f"Recorded usage for user {user_id}: {feature} +{amount}")
@@ -325,8 +326,8 @@ class LimitsService:
             }
 
             # Get daily limits and usage
-            for feature in USAGE_FIELDS["daily"]:
-                current_usage = usage_stats.get(feature, 0)
+            for feature, usage_field in FEATURE_USAGE_FIELDS["daily"].items():
+                current_usage = usage_stats.get(usage_field, 0)
                 _, limit_info = await self.check_daily_limit(user_id, tier, feature, current_usage)
                 summary["daily_usage"][feature] = {
                     "current": current_usage,
@@ -336,8 +337,8 @@ class LimitsService:
                 }
 
             # Get total limits and usage
-            for feature in USAGE_FIELDS["total"]:
-                current_usage = usage_stats.get(feature, 0)
+            for feature, usage_field in FEATURE_USAGE_FIELDS["total"].items():
+                current_usage = usage_stats.get(usage_field, 0)
                 _, limit_info = await self.check_total_limit(user_id, tier, feature, current_usage)
                 summary["total_usage"][feature] = {
                     "current": current_usage,
@@ -356,17 +357,22 @@ class LimitsService:
             logger.error(f"Error getting usage summary for user {user_id}: {e}")
             return {"error": str(e)}
 
-    async def _get_user_data(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get user data from database."""
+    async def _get_user_data(self, user_id: str, cached: bool = True) -> Optional[Dict[str, Any]]:
+        """Get user data from database (``cached=False`` skips the read-through cache)."""
         try:
-            # Try regular users first
-            user_data = await db.get_document("users", user_id)
-            if user_data:
-                return user_data
-
-            # Try anonymous users
-            user_data = await db.get_document("anonymous_users", user_id)
-            return user_data
+            # Inside a request both collections are read concurrently (one
+            # batched RPC); elsewhere anonymous users are read only on a miss.
+            # Regular users take precedence over anonymous ones.
+            if in_batching_scope():
+                user_data, anonymous_data = await asyncio.gather(
+                    db.get_document("users", user_id, cached=cached),
+                    db.get_document("anonymous_users", user_id, cached=cached)
+                )
+                return user_data or anonymous_data
+            return (
+                await db.get_document("users", user_id, cached=cached)
+                or await db.get_document("anonymous_users", user_id, cached=cached)
+            )
 
         except Exception as e:
             logger.error(f"Error getting user data for {user_id}: {e}")
@@ -375,11 +381,10 @@ class LimitsService:
     async def _get_device_count(self, user_id: str) -> int:
         """Get count of devices registered for a user."""
         try:
-            devices = await db.query_collection(
+            return await db.count(
                 "user_devices",
                 filters=[{"field": "user_id", "operator": "==", "value": user_id}]
             )
-            return len(devices)
         except Exception as e:
             logger.error(f"Error getting device count for user {user_id}: {e}")
             return 0
@@ -0,0 +1,382 @@
+"""
+Process-local index of the approved question bank.
+
+Practice and exam requests filter the same small, rarely changing set of
+approved questions by ``exam_type``, ``subject``, ``topic``, ``difficulty``
+and ``arde_probability``. :class:`QuestionIndex` keeps that set in memory,
+with one posting list per field value sorted newest first, so those requests
+are answered without a database round-trip.
+
+The index is built when the application starts and kept fresh by polling
+for questions whose ``updated_at`` is at or past the newest one seen (the
+watermark); every content or approval change to a question sets
+``updated_at``. Stat roll-ups only set ``stats_updated_at``, so they are
+picked up by the periodic full rebuild rather than by every poll. The poll is backend-independent and reads only
+changed documents. A periodic full rebuild also drops questions that were
+deleted outright, which the poll cannot see.
+
+Until the index is ready (or when it is disabled), callers fall back to
+querying the database.
+
+The index serves questions without answer data. Answer keys read with each
+question go to a separate :class:`AnswerKeyStore`, which is built and swapped
+together with the index.
+"""
+
+from bisect import bisect_right, insort
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import logging
+import random
+import time
+from app.core.config import settings
+from app.core.database import db
+from app.core.db_base import BaseDatabase
+from app.core.db_utils import decode_page_token, page_token_for
+from app.models.question import QuestionDeliveryResponse
+from app.services.answer_key_store import ANSWER_KEY_FIELDS, AnswerKeyStore, answer_key_store
+
+logger = logging.getLogger(__name__)
+
+# Fields served to practice/exam clients; explanation, references, variations
+# and ARDE context are only needed by the explanation endpoint, and answers
+# are checked on the server
+QUESTION_DELIVERY_FIELDS = [name for name in QuestionDeliveryResponse.model_fields if name != "id"]
+
+# Fields with posting lists
+INDEXED_FIELDS = ("exam_type", "subject", "topic", "difficulty", "arde_probability")
+
+# Read from the database: what is served, the answer key, and what decides
+# membership and freshness
+_PROJECTION = list(dict.fromkeys(
+    QUESTION_DELIVERY_FIELDS + ANSWER_KEY_FIELDS + ["is_active", "approval_status", "updated_at", "stats_updated_at"]
+))
+
+_SERVABLE = [
+    {"field": "is_active", "operator": "==", "value": True},
+    {"field": "approval_status", "operator": "==", "value": "approved"}
+]
+
+SortKey = Tuple[float, str]
+
+
+def _timestamp(value: Any) -> float:
+    if not isinstance(value, datetime):
+        return 0.0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _copy(question: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy safe for callers to modify (stats are derived in place)"""
+    result = dict(question)
+    if isinstance(result.get("performance_stats"), dict):
+        result["performance_stats"] = dict(result["performance_stats"])
+    return result
+
+
+def strip_answers(question: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop ``correct_answer`` and per-option ``is_correct``, in place"""
+    question.pop("correct_answer", None)
+    options = question.get("options")
+    if isinstance(options, list):
+        question["options"] = [
+            {key: value for key, value in option.items() if key != "is_correct"} if isinstance(option, dict) else option
+            for option in options
+        ]
+    return question
+
+
+class QuestionIndex:
+    """In-memory posting lists over approved, active questions"""
+
+    def __init__(
+        self,
+        database: Optional[BaseDatabase] = None,
+        refresh_interval: Optional[float] = None,
+        rebuild_interval: Optional[float] = None,
+        answer_keys: Optional[AnswerKeyStore] = None
+    ):
+        self.database = database or db
+        self.answer_keys = answer_keys if answer_keys is not None else AnswerKeyStore(self.database)
+        self.refresh_interval = refresh_interval or settings.QUESTION_INDEX_REFRESH_SECONDS
+        self.rebuild_interval = rebuild_interval or settings.QUESTION_INDEX_REBUILD_SECONDS
+        self._questions: Dict[str, Dict[str, Any]] = {}
+        self._sort_keys: Dict[str, SortKey] = {}
+        self._postings: Dict[Tuple[str, Any], List[SortKey]] = {}
+        # (updated_at, stats_updated_at) of each indexed question, for caches of derived data
+        self._versions: Dict[str, Any] = {}
+        self._watermark: Any = None
+        # Moves whenever the indexed set or any indexed question changes
+        self.generation = 0
+        self._built_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def __contains__(self, question_id: str) -> bool:
+        return question_id in self._questions
+
+    # Maintenance
+
+    async def start(self):
+        """Build the index and start refreshing it in the background"""
+        try:
+            await self.build()
+        except Exception as e:
+            # Requests fall back to the database; the refresher retries the build
+            logger.error(f"Failed to build question index: {e}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _refresh_periodically(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                if not self.ready or time.monotonic() - self._built_at >= self.rebuild_interval:
+                    await self.build()
+                else:
+                    await self.refresh()
+            except Exception as e:
+                logger.error(f"Question index refresh failed: {e}")
+
+    async def build(self):
+        """Load every servable question, replacing the current contents"""
+        started = time.perf_counter()
+        fresh = QuestionIndex(self.database, answer_keys=AnswerKeyStore(self.database))
+        async for question in self.database.query_iter("questions", filters=_SERVABLE, fields=_PROJECTION):
+            fresh.apply(question)
+
+        # Swap in one step so concurrent readers never see a partial index
+        self._questions, self._sort_keys, self._postings = fresh._questions, fresh._sort_keys, fresh._postings
+        self._versions = fresh._versions
+        self._watermark = fresh._watermark
+        self.answer_keys.replace(fresh.answer_keys)
+        self.generation += 1
+        self._built_at = time.monotonic()
+        self.ready = True
+        logger.info(f"Question index built: {len(self)} questions in {time.perf_counter() - started:.2f}s")
+
+    async def refresh(self) -> int:
+        """
+        Apply questions changed since the watermark.
+
+        Returns:
+            Number of changed questions read
+        """
+        if self._watermark is None:
+            await self.build()
+            return len(self)
+
+        changed = 0
+        async for question in self.database.query_iter(
+            "questions",
+            # >= rather than > so writes sharing the watermark's timestamp are not
+            # missed; re-applying an unchanged question is harmless
+            filters=[{"field": "updated_at", "operator": ">=", "value": self._watermark}],
+            order_by="updated_at",
+            fields=_PROJECTION
+        ):
+            self.apply(question)
+            changed += 1
+        return changed
+
+    def apply(self, question: Dict[str, Any]):
+        """Insert, replace or drop one question according to its current state"""
+        question_id = question["id"]
+        updated_at = question.get("updated_at")
+        if updated_at is not None and (self._watermark is None or _timestamp(updated_at) > _timestamp(self._watermark)):
+            self._watermark = updated_at
+
+        version = (updated_at, question.get("stats_updated_at"))
+        servable = question.get("approval_status") == "approved" and question.get("is_active", True)
+        # Polls re-read the question at the watermark; that alone is not a change
+        if not (servable and updated_at is not None and self._versions.get(question_id) == version):
+            self.generation += 1
+
+        self._remove(question_id)
+        self.answer_keys.discard(question_id)
+        if not servable:
+            return
+
+        self.answer_keys.apply(question)
+        entry = strip_answers({field: question[field] for field in QUESTION_DELIVERY_FIELDS if field in question})
+        entry["id"] = question_id
+        key = (-_timestamp(entry.get("created_at")), question_id)
+        self._questions[question_id] = entry
+        self._sort_keys[question_id] = key
+        self._versions[question_id] = version
+        for field in INDEXED_FIELDS:
+            value = entry.get(field)
+            if value is not None:
+                insort(self._postings.setdefault((field, value), []), key)
+
+    def _remove(self, question_id: str):
+        entry = self._questions.pop(question_id, None)
+        if entry is None:
+            return
+        key = self._sort_keys.pop(question_id)
+        self._versions.pop(question_id, None)
+        for field in INDEXED_FIELDS:
+            postings = self._postings.get((field, entry.get(field)))
+            if postings:
+                position = bisect_right(postings, key) - 1
+                if position >= 0 and postings[position] == key:
+                    del postings[position]
+
+    # Lookups
+
+    @staticmethod
+    def _matches(question: Dict[str, Any], criteria: Dict[str, Any]) -> bool:
+        return all(
+            question.get(field) in value if isinstance(value, (list, tuple, set)) else question.get(field) == value
+            for field, value in criteria.items()
+        )
+
+    def _candidates(self, criteria: Dict[str, Any]) -> Tuple[Dict[str, Any], List[SortKey]]:
+        """
+        Normalized criteria and the shortest posting list covering them.
+
+        ``criteria`` maps fields to a value, or to a list/tuple/set of
+        accepted values; None values are ignored.
+        """
+        criteria = {field: value for field, value in criteria.items() if value is not None}
+        single = [
+            self._postings.get((field, value), [])
+            for field, value in criteria.items()
+            if field in INDEXED_FIELDS and not isinstance(value, (list, tuple, set))
+        ]
+        postings = min(single, key=len) if single else sorted(self._sort_keys.values())
+        return criteria, postings
+
+    def _scan(self, criteria: Dict[str, Any], after: Optional[SortKey] = None) -> Iterable[Dict[str, Any]]:
+        """Matching questions, newest first (after ``after`` if given)"""
+        criteria, postings = self._candidates(criteria)
+        start = bisect_right(postings, after) if after is not None else 0
+
+        for key in postings[start:]:
+            question = self._questions[key[1]]
+            if self._matches(question, criteria):
+                yield question
+
+    def query(self, criteria: Dict[str, Any], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Up to ``limit`` matching questions, newest first, as copies"""
+        results = []
+        for question in self._scan(criteria):
+            if limit is not None and len(results) >= limit:
+                break
+            results.append(_copy(question))
+        return results
+
+    def page(
+        self,
+        criteria: Dict[str, Any],
+        page_size: Optional[int] = None,
+        page_token: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        One page of matching questions, newest first.
+
+        Tokens have the same format as those of ``query_page`` ordered by
+        ``-created_at``.
+        """
+        page_size = min(page_size or settings.DEFAULT_PAGE_SIZE, settings.MAX_PAGE_SIZE)
+        after = None
+        if page_token:
+            values, last_id = decode_page_token(page_token)
+            after = (-_timestamp(values[0] if values else None), last_id)
+
+        items = []
+        for question in self._scan(criteria, after):
+            items.append(_copy(question))
+            if len(items) == page_size:
+                break
+        next_token = page_token_for(items[-1], "created_at") if len(items) == page_size else None
+        return {"items": items, "next_page_token": next_token}
+
+    def sample(
+        self,
+        criteria: Dict[str, Any],
+        k: int,
+        rng: Optional[random.Random] = None,
+        exclude: Optional[Set[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        ``k`` distinct matching questions chosen uniformly at random, as copies.
+
+        Visits random positions of the shortest posting list without
+        replacement and keeps the matches; the first ``k`` matches of a random
+        order are a uniform sample. That costs O(k) when the other criteria
+        are not very selective. When they are, it falls back to one pass over
+        the posting list. Fewer than ``k`` questions are returned only if
+        fewer match. Questions whose ID is in ``exclude`` never match.
+        """
+        rng = rng or random
+        exclude = exclude or set()
+        criteria, postings = self._candidates(criteria)
+        size = len(postings)
+        if k <= 0 or size == 0:
+            return []
+
+        picked: List[Dict[str, Any]] = []
+        if k < size:
+            visited = set()
+            budget = 4 * k + 16
+            while len(picked) < k and budget > 0:
+                budget -= 1
+                position = rng.randrange(size)
+                if position in visited:
+                    continue
+                visited.add(position)
+                question = self._questions[postings[position][1]]
+                if question["id"] not in exclude and self._matches(question, criteria):
+                    picked.append(question)
+
+        if len(picked) < k:
+            matches = [
+                self._questions[key[1]] for key in postings
+                if key[1] not in exclude and self._matches(self._questions[key[1]], criteria)
+            ]
+            picked = rng.sample(matches, min(k, len(matches)))
+        return [_copy(question) for question in picked]
+
+    def get_many(self, question_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Copies of the indexed questions among ``question_ids``, by ID"""
+        return {
+            question_id: _copy(self._questions[question_id])
+            for question_id in question_ids if question_id in self._questions
+        }
+
+    def versions(self, question_ids: Iterable[str]) -> Dict[str, Any]:
+        """Version of the indexed questions among ``question_ids``, by ID"""
+        return {question_id: self._versions[question_id] for question_id in question_ids if question_id in self._versions}
+
+    def count(self, criteria: Dict[str, Any]) -> int:
+        return sum(1 for _ in self._scan(criteria))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "questions": len(self),
+            "posting_lists": len(self._postings),
+            "answer_keys": len(self.answer_keys),
+            "generation": self.generation,
+            "watermark": self._watermark.isoformat() if isinstance(self._watermark, datetime) else self._watermark
+        }
+
+
+# Global question index
+question_index = QuestionIndex(answer_keys=answer_key_store)
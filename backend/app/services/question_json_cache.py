@@ -0,0 +1,157 @@
+"""
+Pre-encoded JSON for delivered questions.
+
+Approved questions change rarely, yet every practice request used to build a
+pydantic ``QuestionDeliveryResponse`` per question and serialize it again.
+:class:`QuestionJsonCache` keeps each question's delivery JSON as bytes,
+tagged with the question's version in the index (its ``updated_at`` and
+``stats_updated_at``); a fragment whose tag no longer matches is re-encoded.
+Whole practice pages are cached too, tagged with the question index's
+generation, which moves whenever the index sees a question change.
+
+A response body is assembled by joining cached fragments, so no per-question
+model is built. Encoding uses ``orjson`` when it is installed and the
+standard ``json`` module otherwise; both produce the same JSON as the
+pydantic model for the fields it declares.
+"""
+
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+import json
+import logging
+
+from app.core.config import settings
+from app.models.question import QuestionDeliveryResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Top-level fields of a delivered question, in response order
+DELIVERY_FIELDS = list(QuestionDeliveryResponse.model_fields)
+OPTION_FIELDS = ("option_id", "text")
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        if value.tzinfo is not None and value.utcoffset() == timezone.utc.utcoffset(None):
+            # Same as pydantic: UTC as "Z"
+            return value.replace(tzinfo=None).isoformat() + "Z"
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """Compact JSON bytes"""
+    if orjson is not None:
+        # Datetimes (including Firestore's subclass) go through _default so
+        # both encoders format them like pydantic
+        return orjson.dumps(value, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(value, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def delivery_shape(question: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields of ``QuestionDeliveryResponse``, in order, from a prepared question"""
+    shaped = {field: question.get(field) for field in DELIVERY_FIELDS}
+    shaped["options"] = [
+        {field: option.get(field) for field in OPTION_FIELDS} for option in question.get("options") or []
+    ]
+    if shaped["performance_stats"] is None:
+        shaped["performance_stats"] = {}
+    return shaped
+
+
+def encode_question(question: Dict[str, Any]) -> bytes:
+    """Delivery JSON of one prepared question"""
+    return dumps(delivery_shape(question))
+
+
+def join_array(fragments: Iterable[bytes]) -> bytes:
+    """A JSON array from encoded elements"""
+    return b"[" + b",".join(fragments) + b"]"
+
+
+class QuestionJsonCache:
+    """LRU caches of question fragments and whole practice pages"""
+
+    def __init__(self, max_questions: Optional[int] = None, max_results: Optional[int] = None):
+        self.max_questions = max_questions or settings.QUESTION_JSON_CACHE_QUESTIONS
+        self.max_results = max_results or settings.QUESTION_JSON_CACHE_RESULTS
+        self._fragments: "OrderedDict[str, Tuple[Any, bytes]]" = OrderedDict()
+        self._results: "OrderedDict[Hashable, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self._counters = {"fragment_hits": 0, "fragment_misses": 0, "result_hits": 0, "result_misses": 0}
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def fragment(self, question_id: str, version: Any) -> Optional[bytes]:
+        """Cached JSON of a question, if it was encoded at ``version``"""
+        entry = self._fragments.get(question_id)
+        if entry is None or entry[0] != version:
+            self._counters["fragment_misses"] += 1
+            return None
+        self._fragments.move_to_end(question_id)
+        self._counters["fragment_hits"] += 1
+        return entry[1]
+
+    def store_fragment(self, question_id: str, version: Any, encoded: bytes):
+        self._fragments[question_id] = (version, encoded)
+        self._fragments.move_to_end(question_id)
+        while len(self._fragments) > self.max_questions:
+            self._fragments.popitem(last=False)
+
+    def encode_many(self, questions: List[Dict[str, Any]], versions: Dict[str, Any], prepare) -> List[bytes]:
+        """
+        Fragments for prepared-on-demand questions.
+
+        Args:
+            questions: Raw question copies, in order
+            versions: Question ID -> version from :meth:`QuestionIndex.versions`
+            prepare: Called with the list of questions that must be encoded,
+                to derive stats and drop internal fields in place
+        """
+        fragments: List[Optional[bytes]] = [
+            self.fragment(question["id"], versions.get(question["id"])) for question in questions
+        ]
+        stale = [question for question, fragment in zip(questions, fragments) if fragment is None]
+        if stale:
+            prepare(stale)
+            encoded = iter([encode_question(question) for question in stale])
+            for position, fragment in enumerate(fragments):
+                if fragment is None:
+                    question_id = questions[position]["id"]
+                    fragments[position] = next(encoded)
+                    self.store_fragment(question_id, versions.get(question_id), fragments[position])
+        return fragments
+
+    def result(self, key: Hashable, generation: int) -> Optional[Dict[str, Any]]:
+        """Cached page for ``key``, if it was built at index ``generation``"""
+        entry = self._results.get(key)
+        if entry is None or entry[0] != generation:
+            self._counters["result_misses"] += 1
+            return None
+        self._results.move_to_end(key)
+        self._counters["result_hits"] += 1
+        return entry[1]
+
+    def store_result(self, key: Hashable, generation: int, page: Dict[str, Any]):
+        self._results[key] = (generation, page)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "encoder": "orjson" if orjson is not None else "json",
+            "fragments": len(self._fragments),
+            "results": len(self._results),
+            **self._counters
+        }
@@ -1,13 +1,62 @@
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, Optional, Set
+from datetime import datetime, timedelta
+import asyncio
 import logging
+import random
+import uuid
+from app.core.config import settings
 from app.core.database import db
-from app.core.exceptions import NotFoundError, ValidationError
+from app.core.db_utils import utc_naive
+from app.services.answer_key_store import is_gradable
+from app.services.attempt_ingestion import attempt_queue
+from app.core.exceptions import ConflictError, DatabaseUnavailableError, NotFoundError, ValidationError
+from app.services.question_index import QUESTION_DELIVERY_FIELDS, question_index, strip_answers
+from app.services.question_json_cache import QuestionJsonCache, encode_question, join_array
 
 logger = logging.getLogger(__name__)
 
+# Rounds of random_key probes before settling for fewer questions than asked
+RANDOM_PROBE_ROUNDS = 3
+
+# Accepted range of client timestamps on synced attempts
+ATTEMPT_CLOCK_SKEW = timedelta(minutes=5)
+ATTEMPT_MAX_AGE = timedelta(days=30)
+
+
+def with_derived_stats(question: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fill in ``average_time`` and ``difficulty_score`` from the stat counters.
+
+    Attempts only increment counters, so the ratios are computed on read.
+    Questions whose stats predate the counters carry a stored average for
+    the untimed attempts, which is folded in so the result stays exact.
+    """
+    stats = question.get("performance_stats")
+    if not isinstance(stats, dict) or not stats.get("total_attempts"):
+        return question
+    
+    total_attempts = stats["total_attempts"]
+    timed_attempts = stats.get("timed_attempts", 0)
+    legacy_attempts = total_attempts - timed_attempts
+    legacy_time = stats.get("average_time", 0.0) * legacy_attempts if legacy_attempts > 0 else 0.0
+    
+    stats["average_time"] = (legacy_time + stats.get("total_time", 0.0)) / total_attempts
+    stats["difficulty_score"] = (stats.get("correct_attempts", 0) / total_attempts) * 100
+    return question
+
+
 class QuestionService:
-    """Question bank management service"""
+    """Question bank management service
+    
+    Practice and exam selections are answered from ``question_index`` once it
+    is ready, and from database queries otherwise. Answers are checked
+    against the index's answer key store.
+    """
+    
+    def __init__(self, index=None):
+        self.index = index if index is not None else question_index
+        self.answer_keys = self.index.answer_keys
+        self.json_cache = QuestionJsonCache()
     
     async def create_question(
         self,
@@ -35,10 +84,13 @@ class QuestionService:
                 "is_active": True,
                 "approval_status": "pending",
                 "arde_probability": question_data.get("arde_probability", "medium"),
+                "random_key": random.random(),
                 "historical_frequency": question_data.get("historical_frequency", 0),
                 "performance_stats": {
                     "total_attempts": 0,
                     "correct_attempts": 0,
+                    "timed_attempts": 0,
+                    "total_time": 0.0,
                     "average_time": 0.0,
                     "difficulty_score": 0.0
                 },
@@ -55,63 +107,140 @@ class QuestionService:
             raise
     
     async def get_question(self, question_id: str) -> Optional[Dict[str, Any]]:
-        """Get a question by ID"""
+        """Get a question by ID
+        
+        Stats are the document's rolled-up totals, as on every other read
+        path; they lag live attempts by up to one roll-up interval.
+        """
         try:
             question = await db.get_document("questions", question_id)
             
             if not question or not question.get("is_active", True):
                 return None
             
-            return question
+            return with_derived_stats(question)
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Failed to get question {question_id}: {e}")
             return None
     
-    async def get_questions_for_practice(
+    def _practice_filters(
         self,
         exam_type: str,
         subject: Optional[str] = None,
         topic: Optional[str] = None,
         difficulty: Optional[str] = None,
-        arde_probability: Optional[str] = None,
-        limit: int = 20
+        arde_probability: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Get questions for practice session"""
-        try:
-            filters = [
-                {"field": "exam_type", "operator": "==", "value": exam_type},
-                {"field": "is_active", "operator": "==", "value": True},
-                {"field": "approval_status", "operator": "==", "value": "approved"}
-            ]
-            
-            # Add optional filters
-            if subject:
-                filters.append({"field": "subject", "operator": "==", "value": subject})
-            if topic:
-                filters.append({"field": "topic", "operator": "==", "value": topic})
-            if difficulty:
-                filters.append({"field": "difficulty", "operator": "==", "value": difficulty})
-            if arde_probability:
-                filters.append({"field": "arde_probability", "operator": "==", "value": arde_probability})
-            
-            questions = await db.query_collection(
+        """Build the filter list shared by the practice queries"""
+        filters = [
+            {"field": "exam_type", "operator": "==", "value": exam_type},
+            {"field": "is_active", "operator": "==", "value": True},
+            {"field": "approval_status", "operator": "==", "value": "approved"}
+        ]
+        
+        # Add optional filters
+        if subject:
+            filters.append({"field": "subject", "operator": "==", "value": subject})
+        if topic:
+            filters.append({"field": "topic", "operator": "==", "value": topic})
+        if difficulty:
+            filters.append({"field": "difficulty", "operator": "==", "value": difficulty})
+        if arde_probability:
+            filters.append({"field": "arde_probability", "operator": "==", "value": arde_probability})
+        
+        return filters
+    
+    @staticmethod
+    def _practice_criteria(
+        exam_type: str,
+        subject: Optional[str] = None,
+        topic: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        arde_probability: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """The practice filters as question index criteria (approval is implied)"""
+        return {
+            "exam_type": exam_type,
+            "subject": subject,
+            "topic": topic,
+            "difficulty": difficulty,
+            "arde_probability": arde_probability
+        }
+    
+    async def get_practice_questions_page(
+        self,
+        exam_type: str,
+        subject: Optional[str] = None,
+        topic: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        arde_probability: Optional[str] = None,
+        limit: int = 20,
+        page_token: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Get one cursor-paginated page of practice questions"""
+        if self.index.ready:
+            page = self.index.page(
+                self._practice_criteria(exam_type, subject, topic, difficulty, arde_probability), limit, page_token
+            )
+        else:
+            page = await db.query_page(
                 "questions",
-                filters=filters,
-                limit=limit,
-                order_by="-created_at"
+                filters=self._practice_filters(exam_type, subject, topic, difficulty, arde_probability),
+                order_by="-created_at",
+                page_size=limit,
+                page_token=page_token,
+                fields=QUESTION_DELIVERY_FIELDS
             )
-            
-            # Remove sensitive information for practice
-            for question in questions:
-                question.pop("created_by", None)
-                question.pop("approval_status", None)
-            
-            return questions
-            
-        except Exception as e:
-            logger.error(f"Failed to get practice questions: {e}")
-            return []
+        
+        # Remove sensitive information for practice
+        self.prepare_for_delivery(page["items"])
+        
+        return page
+    
+    async def get_practice_questions_json(
+        self,
+        exam_type: str,
+        subject: Optional[str] = None,
+        topic: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        arde_probability: Optional[str] = None,
+        limit: int = 20,
+        page_token: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        One page of practice questions, already encoded.
+        
+        While the index is ready, pages and the questions in them are served
+        from ``json_cache``, re-encoding only questions whose index version
+        (``updated_at`` or ``stats_updated_at``) moved.
+        
+        Returns:
+            Dict with ``body`` (the JSON array, as bytes) and ``next_page_token``
+        """
+        if not self.index.ready:
+            page = await self.get_practice_questions_page(
+                exam_type, subject, topic, difficulty, arde_probability, limit, page_token
+            )
+            body = join_array(encode_question(question) for question in page["items"])
+            return {"body": body, "next_page_token": page["next_page_token"]}
+        
+        key = (exam_type, subject, topic, difficulty, arde_probability, limit, page_token)
+        generation = self.index.generation
+        cached = self.json_cache.result(key, generation)
+        if cached is not None:
+            return cached
+        
+        page = self.index.page(
+            self._practice_criteria(exam_type, subject, topic, difficulty, arde_probability), limit, page_token
+        )
+        versions = self.index.versions(question["id"] for question in page["items"])
+        fragments = self.json_cache.encode_many(page["items"], versions, self.prepare_for_delivery)
+        result = {"body": join_array(fragments), "next_page_token": page["next_page_token"]}
+        self.json_cache.store_result(key, generation, result)
+        return result
     
     async def get_questions_for_exam(
         self,
@@ -119,66 +248,219 @@ class QuestionService:
         question_count: int,
         arde_priority: bool = True
     ) -> List[Dict[str, Any]]:
-        """Get questions for simulated exam"""
+        """
+        Get a random set of questions for a simulated exam.
+
+        Questions are drawn uniformly at random without repeats, from the
+        question index when it is ready and with ``random_key`` probes
+        otherwise. With ``arde_priority`` half the paper comes from high-ARDE
+        questions and the rest from medium/low ones. The paper is shuffled.
+        """
         try:
-            filters = [
-                {"field": "exam_type", "operator": "==", "value": exam_type},
-                {"field": "is_active", "operator": "==", "value": True},
-                {"field": "approval_status", "operator": "==", "value": "approved"}
-            ]
-            
             if arde_priority:
-                # Prioritize high ARDE probability questions
-                filters.append({"field": "arde_probability", "operator": "==", "value": "high"})
-                
-                high_arde_questions = await db.query_collection(
-                    "questions",
-                    filters=filters,
-                    limit=question_count // 2
-                )
-                
-                # Get remaining questions from medium/low ARDE
-                remaining_count = question_count - len(high_arde_questions)
-                
-                if remaining_count > 0:
-                    filters[-1] = {"field": "arde_probability", "operator": "in", "value": ["medium", "low"]}
-                    other_questions = await db.query_collection(
-                        "questions",
-                        filters=filters,
-                        limit=remaining_count
-                    )
-                    questions = high_arde_questions + other_questions
-                else:
-                    questions = high_arde_questions
+                strata = [("high", question_count // 2), (["medium", "low"], None)]
             else:
-                # Random selection
-                questions = await db.query_collection(
-                    "questions",
-                    filters=filters,
-                    limit=question_count
+                strata = [(None, question_count)]
+            
+            questions: List[Dict[str, Any]] = []
+            for arde_probability, count in strata:
+                count = question_count - len(questions) if count is None else count
+                if count <= 0:
+                    continue
+                questions += await self.sample_questions(
+                    {"exam_type": exam_type, "arde_probability": arde_probability}, count
                 )
             
-            # Remove sensitive information
-            for question in questions:
-                question.pop("created_by", None)
-                question.pop("approval_status", None)
+            random.shuffle(questions)
+            self.prepare_for_delivery(questions)
             
             return questions[:question_count]  # Ensure exact count
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Failed to get exam questions: {e}")
             return []
     
+    @staticmethod
+    def prepare_for_delivery(questions: List[Dict[str, Any]]):
+        """Derive stats and drop internal fields and answer data, in place"""
+        for question in questions:
+            with_derived_stats(question)
+            strip_answers(question)
+            question.pop("created_by", None)
+            question.pop("approval_status", None)
+            question.pop("random_key", None)
+    
+    async def sample_questions(
+        self,
+        criteria: Dict[str, Any],
+        count: int,
+        exclude: Optional[Set[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Up to ``count`` distinct approved questions chosen at random.
+        
+        From the index, and when few more than ``count`` questions match, the
+        choice is uniform. Otherwise it probes ``random_key`` (see
+        :meth:`_probe`), which is only approximately uniform.
+        
+        Args:
+            criteria: Field -> value, or list of accepted values (None = any);
+                must include ``exam_type``
+            count: Questions wanted
+            exclude: IDs that must not be returned (already on the paper)
+        """
+        exclude = exclude or set()
+        if self.index.ready:
+            return self.index.sample(criteria, count, exclude=exclude)
+        
+        filters = [
+            {"field": "is_active", "operator": "==", "value": True},
+            {"field": "approval_status", "operator": "==", "value": "approved"}
+        ]
+        for field, value in criteria.items():
+            if value is not None:
+                operator = "in" if isinstance(value, list) else "=="
+                filters.append({"field": field, "operator": operator, "value": value})
+        
+        available = await db.count("questions", filters=filters)
+        if available - count <= len(exclude):
+            # Hardly more than wanted; read them all instead of probing
+            questions = await db.query_collection("questions", filters=filters, fields=QUESTION_DELIVERY_FIELDS)
+            questions = [question for question in questions if question["id"] not in exclude]
+            return random.sample(questions, min(count, len(questions)))
+        
+        # Each probe reads the question next to a random point of random_key,
+        # wrapping around at the ends. Collisions are re-drawn, so the paper
+        # costs about ``count`` reads and writes nothing.
+        found: Dict[str, Dict[str, Any]] = {}
+        for _ in range(RANDOM_PROBE_ROUNDS):
+            missing = count - len(found)
+            if missing <= 0:
+                break
+            drawn = await asyncio.gather(*(
+                self._probe(filters, random.random(), descending=random.random() < 0.5) for _ in range(missing)
+            ))
+            for question in drawn:
+                if question is not None and question["id"] not in exclude:
+                    found.setdefault(question["id"], question)
+        
+        if len(found) < count:
+            # Probes kept colliding; take a run of neighbouring keys instead
+            run = await self._key_run(filters, random.random(), count + len(exclude))
+            for question in run:
+                if len(found) >= count:
+                    break
+                if question["id"] not in exclude:
+                    found.setdefault(question["id"], question)
+        return list(found.values())
+    
+    async def _probe(self, filters: List[Dict[str, Any]], point: float, descending: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        The question with the nearest ``random_key`` at or after ``point``
+        (at or before it if ``descending``), wrapping around at the ends.
+        
+        A question is hit with probability equal to the gap between its key
+        and its neighbour's in the probe direction. Probing both directions
+        evens this out to the mean of the gaps on either side; re-keying all
+        questions now and then (``tools/backfill_random_keys.py --redraw``)
+        keeps the remaining bias from sticking to the same questions.
+        """
+        run = await self._key_run(filters, point, 1, descending)
+        return run[0] if run else None
+    
+    async def _key_run(
+        self,
+        filters: List[Dict[str, Any]],
+        point: float,
+        size: int,
+        descending: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Up to ``size`` questions in ``random_key`` order from ``point``, wrapping around at the end"""
+        operator, order_by, wrap = ("<=", "-random_key", 1.0) if descending else (">=", "random_key", 0.0)
+        run: Dict[str, Dict[str, Any]] = {}
+        for start in (point, wrap):
+            # query_page rather than query_collection: one-off probes would only fill the query cache
+            page = await db.query_page(
+                "questions",
+                filters=filters + [{"field": "random_key", "operator": operator, "value": start}],
+                order_by=order_by,
+                page_size=size - len(run),
+                fields=QUESTION_DELIVERY_FIELDS
+            )
+            for question in page["items"]:
+                run.setdefault(question["id"], question)
+            if len(run) >= size:
+                break
+        return list(run.values())
+    
+    async def assign_missing_random_keys(self, redraw: bool = False) -> int:
+        """
+        Give every question without a ``random_key`` one, for exam sampling.
+
+        Args:
+            redraw: Give every question a fresh key, not only those without one
+
+        Returns:
+            Number of questions updated
+        """
+        operations = []
+        async for question in db.query_iter("questions", fields=["random_key"]):
+            if redraw or not isinstance(question.get("random_key"), float):
+                operations.append({
+                    "type": "update",
+                    "collection": "questions",
+                    "document_id": question["id"],
+                    "data": {"random_key": random.random()}
+                })
+        if operations:
+            result = await db.bulk_write(operations)
+            logger.info(f"Assigned random keys to {result['written']} questions")
+            return result["written"]
+        return 0
+    
+    async def get_question_bank_facets(self, exam_type: str) -> Dict[str, Any]:
+        """Count approved questions per difficulty and ARDE probability"""
+        base_filters = [
+            {"field": "exam_type", "operator": "==", "value": exam_type},
+            {"field": "is_active", "operator": "==", "value": True},
+            {"field": "approval_status", "operator": "==", "value": "approved"}
+        ]
+        facets = {
+            "difficulty": ["easy", "medium", "hard"],
+            "arde_probability": ["low", "medium", "high"]
+        }
+        buckets = [(field, value) for field, values in facets.items() for value in values]
+        
+        # One aggregation query per bucket, all in flight at once
+        total, *counts = await asyncio.gather(
+            db.count("questions", filters=base_filters),
+            *(
+                db.count("questions", filters=base_filters + [{"field": field, "operator": "==", "value": value}])
+                for field, value in buckets
+            )
+        )
+        
+        result: Dict[str, Any] = {"exam_type": exam_type, "total": total}
+        for (field, value), count in zip(buckets, counts):
+            result.setdefault(field, {})[value] = count
+        return result
+    
     async def record_question_attempt(
         self,
         question_id: str,
         user_id: str,
         is_correct: bool,
-        time_taken: float
+        time_taken: float,
+        verified: bool = True
     ) -> bool:
-        """Record a question attempt for analytics"""
+        """Record a question attempt for analytics
+        
+        Unverified attempts (graded by the client) are stored but kept out of
+        the question stats.
+        """
         try:
-            # Record individual attempt
             attempt_data = {
                 "question_id": question_id,
                 "user_id": user_id,
@@ -186,38 +468,141 @@ class QuestionService:
                 "time_taken": time_taken,
                 "attempted_at": datetime.utcnow()
             }
+            if not verified:
+                attempt_data["verified"] = False
             
-            await db.create_document("question_attempts", attempt_data)
-            
-            # Update question performance stats
-            question = await self.get_question(question_id)
-            if question:
-                stats = question.get("performance_stats", {})
-                
-                total_attempts = stats.get("total_attempts", 0) + 1
-                correct_attempts = stats.get("correct_attempts", 0) + (1 if is_correct else 0)
-                current_avg_time = stats.get("average_time", 0.0)
-                
-                # Calculate new average time
-                new_avg_time = (current_avg_time * (total_attempts - 1) + time_taken) / total_attempts
-                
-                # Update stats
-                updated_stats = {
-                    "performance_stats.total_attempts": total_attempts,
-                    "performance_stats.correct_attempts": correct_attempts,
-                    "performance_stats.average_time": new_avg_time,
-                    "performance_stats.difficulty_score": (correct_attempts / total_attempts) * 100,
-                    "updated_at": datetime.utcnow()
-                }
-                
-                await db.update_document("questions", question_id, updated_stats)
-            
-            return True
+            # The attempt is written in a batch with others, and the batch adds
+            # each question's performance stats in one sharded-counter
+            # increment; averages are derived from the counters on read.
+            return await attempt_queue.submit(attempt_data)
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Failed to record question attempt: {e}")
             return False
     
+    async def is_gradable(self, question_id: str) -> bool:
+        """Whether the question exists, is active and is approved"""
+        return is_gradable((await self.answer_keys.get_many([question_id])).get(question_id))
+    
+    async def check_answer(self, question_id: str, selected_answer: str) -> Optional[Dict[str, Any]]:
+        """
+        Check an answer against the stored answer key.
+        
+        Returns:
+            Dict with ``is_correct`` and ``correct_answer``, or None if the
+            question does not exist, is inactive or is not approved
+        """
+        return await self.answer_keys.check(question_id, selected_answer)
+    
+    async def record_question_attempts(
+        self,
+        user_id: str,
+        attempts: List[Dict[str, Any]],
+        idempotency_key: str
+    ) -> Dict[str, Any]:
+        """
+        Record a batch of attempts (e.g. an offline session) in one bulk write.
+        
+        The batch is validated as a whole and graded against the stored
+        answers. Retrying with the same ``idempotency_key`` returns the first
+        result without writing again. Attempts are written under IDs derived
+        from the key, so a retry after a partial write overwrites them, and
+        question stats are added only once the whole batch has been written
+        and marked completed. A claim still ``processing`` after
+        ``ATTEMPT_BATCH_CLAIM_SECONDS`` (its worker died) is taken over.
+        
+        Args:
+            user_id: User who made the attempts
+            attempts: Dicts with ``question_id``, ``selected_answer``,
+                ``time_taken`` and optional ``attempted_at``
+            idempotency_key: Client-chosen key, unique per batch
+        
+        Returns:
+            Dict with ``accepted``, ``correct``, per-attempt ``results`` and
+            ``replayed``
+        
+        Raises:
+            ValidationError: If any attempt is invalid (nothing is written)
+            ConflictError: If the same key is still being processed
+        """
+        batch_id = f"{user_id}_{idempotency_key}"
+        token = uuid.uuid4().hex
+        now = datetime.utcnow()
+        
+        def claim(current: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            if current is not None and current.get("status") != "failed":
+                if current.get("status") != "processing" or not current.get("created_at"):
+                    return None
+                if now - utc_naive(current["created_at"]) < timedelta(seconds=settings.ATTEMPT_BATCH_CLAIM_SECONDS):
+                    return None
+            return {"user_id": user_id, "status": "processing", "claim": token, "created_at": now}
+        
+        def owned(updates: Dict[str, Any]):
+            # Only the worker holding the claim may finish or release it
+            return lambda current: updates if current is not None and current.get("claim") == token else None
+        
+        if await db.transactional_update("attempt_batches", batch_id, claim) is None:
+            previous = await db.get_document("attempt_batches", batch_id)
+            if not previous or previous.get("status") != "completed":
+                raise ConflictError("A batch with this idempotency key is already being processed")
+            return {**previous["response"], "replayed": True}
+        
+        try:
+            question_ids = list(dict.fromkeys(attempt["question_id"] for attempt in attempts))
+            questions = await self.answer_keys.get_many(question_ids)
+            
+            errors = []
+            queued = []
+            results = []
+            for position, attempt in enumerate(attempts):
+                question = questions.get(attempt["question_id"])
+                attempted_at = utc_naive(attempt.get("attempted_at") or now)
+                
+                if not is_gradable(question):
+                    errors.append(f"attempts[{position}]: unknown question {attempt['question_id']}")
+                    continue
+                if not now - ATTEMPT_MAX_AGE <= attempted_at <= now + ATTEMPT_CLOCK_SKEW:
+                    errors.append(f"attempts[{position}]: attempted_at is out of range")
+                    continue
+                
+                is_correct = attempt["selected_answer"] == question.get("correct_answer")
+                queued.append((f"{batch_id}_{position}", {
+                    "question_id": attempt["question_id"],
+                    "user_id": user_id,
+                    "is_correct": is_correct,
+                    "time_taken": attempt["time_taken"],
+                    "attempted_at": attempted_at,
+                    "received_at": now,
+                    "batch_id": batch_id
+                }))
+                results.append({"question_id": attempt["question_id"], "is_correct": is_correct})
+            
+            if errors:
+                raise ValidationError("; ".join(errors))
+            
+            written = await attempt_queue.write_now(queued, add_stats=False)
+            if written < len(queued):
+                raise Exception(f"Only {written} of {len(queued)} attempts were written")
+            
+            response = {
+                "accepted": written,
+                "correct": sum(1 for result in results if result["is_correct"]),
+                "results": results
+            }
+            if await db.transactional_update("attempt_batches", batch_id, owned({"status": "completed", "response": response})) is None:
+                raise ConflictError("A batch with this idempotency key is already being processed")
+        
+        except Exception:
+            # Release the key so the client can retry
+            await db.transactional_update("attempt_batches", batch_id, owned({"status": "failed"}))
+            raise
+        
+        # Counted once, by the worker that completed the batch
+        await attempt_queue.add_stats([attempt for _, attempt in queued])
+        return {**response, "replayed": False}
+    
     async def get_question_explanation(
         self,
         question_id: str,
@@ -253,6 +638,8 @@ class QuestionService:
                 "arde_context": question.get("arde_context")
             }
             
+        except DatabaseUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Failed to get question explanation: {e}")
             return None
@@ -0,0 +1 @@
+# Benchmarks for backend data-access paths
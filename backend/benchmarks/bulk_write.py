@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Bulk write throughput: serial batch commits versus concurrent commits.
+
+Simulates a nightly usage reset over N user documents against
+``FirestoreStandIn`` and times ``FirestoreClient.bulk_write`` with one batch
+in flight at a time and with the configured parallelism.
+
+Usage:
+    python -m benchmarks.bulk_write [--documents 20000] [--concurrency 8] [--latency-ms 50]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.database import FirestoreClient  # noqa: E402
+from benchmarks.firestore_standin import FirestoreStandIn  # noqa: E402
+
+
+def run(documents: int, concurrency: int, latency_ms: float):
+    print(f"{documents} updates, {latency_ms}ms commit RTT")
+    print("-" * 60)
+    for label, parallel in (("serial", 1), (f"concurrency={concurrency}", concurrency)):
+        standin = FirestoreStandIn(latency_ms=latency_ms)
+        standin.data["users"] = {f"user_{i}": {"usage_stats": {}} for i in range(documents)}
+        client = FirestoreClient(client=standin, max_workers=max(parallel, 1), cache_enabled=False)
+        operations = [
+            {
+                "type": "update",
+                "collection": "users",
+                "document_id": f"user_{i}",
+                "data": {"usage_stats.practice_mcqs_today": 0}
+            }
+            for i in range(documents)
+        ]
+
+        start = time.perf_counter()
+        result = asyncio.run(client.bulk_write(operations, max_concurrency=parallel))
+        elapsed = time.perf_counter() - start
+        client.close()
+        print(f"{label:<16} {elapsed:7.2f}s  {result['written']} written, {result['failed']} failed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    run(args.documents, args.concurrency, args.latency_ms)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Concurrent-request throughput of FirestoreClient, before and after moving
+blocking RPCs off the event loop.
+
+"inline" reproduces the previous behaviour (sync client called directly from
+``async def``); "executor" is the current bounded thread-pool bridge. Both run
+against ``FirestoreStandIn`` with the same simulated round-trip time.
+
+Usage:
+    python -m benchmarks.firestore_concurrency [--requests 200] [--concurrency 50] [--latency-ms 20]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.database import FirestoreClient  # noqa: E402
+from benchmarks.firestore_standin import FirestoreStandIn  # noqa: E402
+
+
+class InlineFirestoreClient(FirestoreClient):
+    """FirestoreClient with the old behaviour: RPCs block the event loop."""
+
+    async def _run(self, func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+
+async def _simulate_requests(client: FirestoreClient, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def handle(i: int):
+        async with semaphore:
+            # A typical authenticated request: load the user, then a profile read.
+            await client.get_document("users", f"user_{i % 100}")
+            await client.get_document("questions", f"q_{i % 500}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(handle(i) for i in range(requests)))
+    return time.perf_counter() - start
+
+
+def run(requests: int, concurrency: int, latency_ms: float, workers: int):
+    print(f"{requests} requests, concurrency {concurrency}, {latency_ms}ms simulated RTT, {workers} workers")
+    print("-" * 60)
+    for label, cls in (("inline (before)", InlineFirestoreClient), ("executor (after)", FirestoreClient)):
+        standin = FirestoreStandIn(latency_ms=latency_ms)
+        for i in range(100):
+            standin.data.setdefault("users", {})[f"user_{i}"] = {"tier": "free"}
+        # Cache off so every read really reaches the stand-in
+        client = cls(client=standin, max_workers=workers, cache_enabled=False)
+        elapsed = asyncio.run(_simulate_requests(client, requests, concurrency))
+        client.close()
+        print(f"{label:<18} {elapsed:8.2f}s  {requests / elapsed:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+    run(args.requests, args.concurrency, args.latency_ms, args.workers)
@@ -0,0 +1,281 @@
+"""
+Latency-injecting stand-in for the synchronous google-cloud-firestore client.
+
+Mimics the subset of the client API used by ``FirestoreClient`` and blocks the
+calling thread for a fixed round-trip time, which is how the real client (or a
+local emulator) behaves from the event loop's point of view.
+"""
+
+import itertools
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from google.api_core import exceptions as gcp_exceptions
+
+
+def _mask(data: Optional[Dict[str, Any]], field_paths: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+    if data is None or not field_paths:
+        return data
+    return {key: value for key, value in data.items() if key in field_paths}
+
+
+def _apply_update(document: Dict[str, Any], data: Dict[str, Any]):
+    """Apply an ``update()`` payload: dotted paths and ``Increment`` transforms."""
+    for field_path, value in data.items():
+        *parents, leaf = field_path.split('.')
+        target = document
+        for part in parents:
+            target = target.setdefault(part, {})
+        if hasattr(value, "value") and type(value).__name__ == "Increment":
+            value = target.get(leaf, 0) + value.value
+        target[leaf] = value
+
+
+class StandInSnapshot:
+    def __init__(self, doc_id: str, data: Optional[Dict[str, Any]], reference: Any = None):
+        self.id = doc_id
+        self._data = data
+        self.reference = reference
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return dict(self._data) if self._data is not None else None
+
+
+class StandInDocument:
+    def __init__(self, store: "FirestoreStandIn", collection: str, doc_id: str):
+        self._store = store
+        self._collection = collection
+        self.id = doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self._collection}/{self.id}"
+
+    def snapshot(self, field_paths: Optional[List[str]] = None) -> "StandInSnapshot":
+        data = self._store.data.get(self._collection, {}).get(self.id)
+        return StandInSnapshot(self.id, _mask(data, field_paths), self)
+
+    def get(self, field_paths: Optional[List[str]] = None, **kwargs) -> StandInSnapshot:
+        self._store.round_trip()
+        return self.snapshot(field_paths)
+
+    def set(self, data: Dict[str, Any], **kwargs):
+        self._store.round_trip()
+        self._store.data.setdefault(self._collection, {})[self.id] = dict(data)
+
+    def update(self, data: Dict[str, Any], **kwargs):
+        self._store.round_trip()
+        document = self._store.data.get(self._collection, {}).get(self.id)
+        if document is None:
+            raise gcp_exceptions.NotFound(f"No document to update: {self.path}")
+        _apply_update(document, data)
+
+    def delete(self, **kwargs):
+        self._store.round_trip()
+        self._store.data.get(self._collection, {}).pop(self.id, None)
+
+
+class StandInQuery:
+    def __init__(self, store: "FirestoreStandIn", collection: str):
+        self._store = store
+        self._collection = collection
+        self._filters: List[tuple] = []
+        self._limit: Optional[int] = None
+        self._fields: Optional[List[str]] = None
+
+    def select(self, field_paths: List[str]) -> "StandInQuery":
+        self._fields = list(field_paths)
+        return self
+
+    def where(self, field: str, operator: str, value: Any) -> "StandInQuery":
+        self._filters.append((field, value))
+        return self
+
+    def order_by(self, field: str, direction: str = "ASCENDING") -> "StandInQuery":
+        return self
+
+    def offset(self, count: int) -> "StandInQuery":
+        return self
+
+    def limit(self, count: int) -> "StandInQuery":
+        self._limit = count
+        return self
+
+    def count(self, alias: str) -> "StandInAggregation":
+        return StandInAggregation(self).count(alias)
+
+    def sum(self, field: str, alias: str) -> "StandInAggregation":
+        return StandInAggregation(self).sum(field, alias)
+
+    def avg(self, field: str, alias: str) -> "StandInAggregation":
+        return StandInAggregation(self).avg(field, alias)
+
+    def get(self, **kwargs) -> List[StandInSnapshot]:
+        self._store.round_trip()
+        docs = [
+            StandInSnapshot(doc_id, _mask(data, self._fields))
+            for doc_id, data in self._store.data.get(self._collection, {}).items()
+            if all(data.get(field) == value for field, value in self._filters)
+        ]
+        return docs[: self._limit] if self._limit else docs
+
+
+class StandInAggregationResult:
+    def __init__(self, alias: str, value: Any):
+        self.alias = alias
+        self.value = value
+
+
+class StandInAggregation:
+    def __init__(self, query: StandInQuery):
+        self._query = query
+        self._specs: List[tuple] = []
+
+    def count(self, alias: str) -> "StandInAggregation":
+        self._specs.append(("count", None, alias))
+        return self
+
+    def sum(self, field: str, alias: str) -> "StandInAggregation":
+        self._specs.append(("sum", field, alias))
+        return self
+
+    def avg(self, field: str, alias: str) -> "StandInAggregation":
+        self._specs.append(("avg", field, alias))
+        return self
+
+    def get(self, **kwargs) -> List[List[StandInAggregationResult]]:
+        docs = [doc.to_dict() for doc in self._query.get()]
+        results = []
+        for kind, field, alias in self._specs:
+            values = [doc[field] for doc in docs if isinstance(doc.get(field), (int, float))]
+            if kind == "count":
+                value = len(docs)
+            elif kind == "sum":
+                value = sum(values)
+            else:
+                value = sum(values) / len(values) if values else None
+            results.append(StandInAggregationResult(alias, value))
+        return [results]
+
+
+class StandInCollection(StandInQuery):
+    def document(self, doc_id: Optional[str] = None) -> StandInDocument:
+        return StandInDocument(self._store, self._collection, doc_id or f"auto_{next(self._store.ids)}")
+
+    def add(self, data: Dict[str, Any]):
+        doc = self.document()
+        doc.set(data)
+        return None, doc
+
+
+class StandInBatch:
+    """Collects writes and applies them in one simulated commit round-trip."""
+
+    def __init__(self, store: "FirestoreStandIn"):
+        self._store = store
+        self._writes: List[tuple] = []
+
+    def set(self, ref: StandInDocument, data: Dict[str, Any]):
+        self._writes.append(("set", ref, data))
+
+    def update(self, ref: StandInDocument, data: Dict[str, Any]):
+        self._writes.append(("update", ref, data))
+
+    def delete(self, ref: StandInDocument):
+        self._writes.append(("delete", ref, None))
+
+    def commit(self):
+        if len(self._writes) > 500:
+            raise ValueError("maximum 500 writes allowed per request")
+        # Server-side cost grows with the number of writes in the commit
+        time.sleep(self._store.latency + len(self._writes) * self._store.per_write)
+        collections = self._store.data
+        for kind, ref, _ in self._writes:
+            # The whole commit fails, as in Firestore, if an update has no target
+            if kind == "update" and ref.id not in collections.get(ref._collection, {}):
+                raise gcp_exceptions.NotFound(f"No document to update: {ref.path}")
+        for kind, ref, data in self._writes:
+            docs = collections.setdefault(ref._collection, {})
+            if kind == "set":
+                docs[ref.id] = dict(data)
+            elif kind == "update":
+                _apply_update(docs[ref.id], data)
+            else:
+                docs.pop(ref.id, None)
+
+
+class StandInTransaction(StandInBatch):
+    """
+    Enough of ``firestore.Transaction`` for ``@firestore.transactional``.
+
+    Transactions are serialized on a store-wide lock, the way server client
+    libraries hold pessimistic locks on the documents they read.
+    """
+
+    _read_only = False
+    _max_attempts = 5
+
+    def __init__(self, store: "FirestoreStandIn"):
+        super().__init__(store)
+        self._id = None
+        self._locked = False
+
+    def _clean_up(self):
+        self._writes = []
+        self._id = None
+
+    def _begin(self, retry_id: Any = None):
+        self._store.lock.acquire()
+        self._locked = True
+        self._id = next(self._store.ids)
+
+    def _release(self):
+        if self._locked:
+            self._locked = False
+            self._store.lock.release()
+
+    def _commit(self):
+        try:
+            self.commit()
+        finally:
+            self._release()
+
+    def _rollback(self):
+        self._clean_up()
+        self._release()
+
+
+class FirestoreStandIn:
+    """Blocking in-memory Firestore double with a configurable round-trip time."""
+
+    def __init__(self, latency_ms: float = 20.0, per_write_ms: float = 0.2):
+        self.latency = latency_ms / 1000.0
+        self.per_write = per_write_ms / 1000.0
+        self.data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.ids = itertools.count()
+        self.round_trips = 0
+        self.lock = threading.Lock()
+
+    def round_trip(self):
+        self.round_trips += 1
+        time.sleep(self.latency)
+
+    def collection(self, name: str) -> StandInCollection:
+        return StandInCollection(self, name)
+
+    def batch(self) -> StandInBatch:
+        return StandInBatch(self)
+
+    def transaction(self, **kwargs) -> StandInTransaction:
+        return StandInTransaction(self)
+
+    def get_all(self, references: List[StandInDocument], field_paths: Optional[List[str]] = None, **kwargs):
+        self.round_trip()
+        return [ref.snapshot(field_paths) for ref in reversed(references)]
+
+    def close(self):
+        pass
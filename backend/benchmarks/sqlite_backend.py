@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+SQLite backend versus the Firestore path on the same workload.
+
+Seeds a question bank, then times concurrent document reads, filtered
+practice-question queries and a bulk usage update on ``SQLiteDatabase``
+(a temporary file in WAL mode) and on ``FirestoreClient`` against
+``FirestoreStandIn`` with a simulated round-trip time.
+
+Usage:
+    python -m benchmarks.sqlite_backend [--questions 20000] [--requests 2000] [--latency-ms 20]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.database import FirestoreClient  # noqa: E402
+from app.core.sqlite_database import SQLiteDatabase  # noqa: E402
+from benchmarks.firestore_standin import FirestoreStandIn  # noqa: E402
+
+EXAM_TYPES = ["ECAT", "MCAT", "CCAT", "GMAT", "GRE", "SAT"]
+
+
+def _question(i: int) -> dict:
+    return {
+        "exam_type": EXAM_TYPES[i % len(EXAM_TYPES)],
+        "subject": f"subject_{i % 12}",
+        "topic": f"topic_{i % 60}",
+        "difficulty": ["easy", "medium", "hard"][i % 3],
+        "approval_status": "approved",
+        "is_active": True,
+        "question_text": f"Question {i}?",
+        "options": ["A", "B", "C", "D"],
+        "performance_stats": {"total_attempts": 0}
+    }
+
+
+async def _timed(label: str, count: int, make, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await make(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22} {elapsed:8.2f}s  {count / elapsed:10.1f} ops/s")
+
+
+async def _workload(database, questions: int, requests: int, concurrency: int):
+    start = time.perf_counter()
+    await database.bulk_write([
+        {"type": "create", "collection": "questions", "document_id": f"q_{i}", "data": _question(i)}
+        for i in range(questions)
+    ])
+    print(f"  {'seed ' + str(questions):<22} {time.perf_counter() - start:8.2f}s")
+
+    await _timed("get_document", requests, lambda i: database.get_document("questions", f"q_{i % questions}"), concurrency)
+    await _timed("practice query", requests // 10, lambda i: database.query_collection("questions", filters=[
+        {"field": "exam_type", "operator": "==", "value": EXAM_TYPES[i % len(EXAM_TYPES)]},
+        {"field": "subject", "operator": "==", "value": f"subject_{i % 12}"},
+        {"field": "approval_status", "operator": "==", "value": "approved"}
+    ], limit=20), concurrency)
+
+    start = time.perf_counter()
+    await database.bulk_write([
+        {"type": "update", "collection": "questions", "document_id": f"q_{i}", "data": {"performance_stats.total_attempts": 1}}
+        for i in range(questions)
+    ])
+    print(f"  {'bulk update ' + str(questions):<22} {time.perf_counter() - start:8.2f}s")
+
+
+def run(questions: int, requests: int, concurrency: int, latency_ms: float):
+    print(f"{questions} questions, {requests} reads, concurrency {concurrency}")
+    print("-" * 60)
+
+    print(f"firestore path ({latency_ms}ms simulated RTT)")
+    standin = FirestoreStandIn(latency_ms=latency_ms)
+    client = FirestoreClient(client=standin, cache_enabled=False)
+    asyncio.run(_workload(client, questions, requests, concurrency))
+    client.close()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print("sqlite (WAL)")
+        database = SQLiteDatabase(path=os.path.join(directory, "bench.db"), cache_enabled=False)
+        asyncio.run(_workload(database, questions, requests, concurrency))
+        database.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--questions", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    run(args.questions, args.requests, args.concurrency, args.latency_ms)
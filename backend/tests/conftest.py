@@ -9,6 +9,11 @@ import os
 # Add the app directory to the Python path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
 
+# Run the app against the in-memory database unless a test opts into another
+os.environ.setdefault("DATABASE_BACKEND", "memory")
+
+from app.core.memory_database import MemoryDatabase  # noqa: E402
+
 # Test configuration
 @pytest.fixture(scope="session")
 def test_config():
@@ -21,42 +26,8 @@ def test_config():
 
 @pytest.fixture
 def mock_db():
-    """Mock database fixture for testing."""
-    class MockDB:
-        def __init__(self):
-            self.data = {}
-
-        async def get_document(self, collection, doc_id):
-            return self.data.get(collection, {}).get(doc_id)
-
-        async def create_document(self, collection, data):
-            if collection not in self.data:
-                self.data[collection] = {}
-            doc_id = data.get('id', f"mock_{len(self.data[collection])}")
-            self.data[collection][doc_id] = data
-            return doc_id
-
-        async def update_document(self, collection, doc_id, data):
-            if collection in self.data and doc_id in self.data[collection]:
-                self.data[collection][doc_id].update(data)
-                return True
-            return False
-
-        async def query_collection(self, collection, filters=None):
-            if collection not in self.data:
-                return []
-            docs = list(self.data[collection].values())
-            if filters:
-                # Simple filter implementation for testing
-                for filter_item in filters:
-                    field = filter_item.get('field')
-                    operator = filter_item.get('operator')
-                    value = filter_item.get('value')
-                    if operator == '==':
-                        docs = [doc for doc in docs if doc.get(field) == value]
-            return docs
-
-    return MockDB()
+    """In-memory database with real filtering, ordering and paging."""
+    return MemoryDatabase()
 
 @pytest.fixture
 def sample_user_data():
@@ -0,0 +1,125 @@
+"""
+Unit tests for answer-free delivery and the answer key store.
+"""
+
+import asyncio
+from datetime import datetime
+import pytest
+from app.core.memory_database import MemoryDatabase
+from app.models.question import QuestionDeliveryResponse
+from app.services import question_service as question_service_module
+from app.services.grading_service import GradingService
+from app.services.question_index import QuestionIndex
+from app.services.question_service import QuestionService
+
+
+def question(n, **overrides):
+    return {
+        "question_text": f"Question {n}?",
+        "options": [
+            {"option_id": "A", "text": "one", "is_correct": n % 2 == 0},
+            {"option_id": "B", "text": "two", "is_correct": n % 2 == 1}
+        ],
+        "correct_answer": "A" if n % 2 == 0 else "B",
+        "exam_type": "ECAT",
+        "subject": "physics",
+        "topic": "optics",
+        "difficulty": "easy",
+        "arde_probability": "high",
+        "historical_frequency": 0,
+        "created_at": datetime(2024, 1, 1),
+        "updated_at": datetime(2024, 1, 1),
+        "is_active": True,
+        "approval_status": "approved",
+        **overrides
+    }
+
+
+@pytest.fixture
+def database():
+    """Memory database with four approved questions."""
+    database = MemoryDatabase()
+    database.load("questions", {f"q{n}": question(n) for n in range(4)})
+    return database
+
+
+@pytest.fixture
+def index(database):
+    """Index built over ``database``, with its own answer key store."""
+    index = QuestionIndex(database)
+    asyncio.run(index.build())
+    return index
+
+
+class TestAnswerFreeDelivery:
+    """Test cases for serving questions without answer data."""
+
+    @pytest.mark.asyncio
+    async def test_practice_payloads_have_no_answers(self, index, monkeypatch):
+        """Test both the index and the database path of practice delivery."""
+        monkeypatch.setattr(question_service_module, "db", index.database)
+        for service in (QuestionService(index=index), QuestionService(index=QuestionIndex(index.database))):
+            page = await service.get_practice_questions_page(exam_type="ECAT")
+
+            assert len(page["items"]) == 4
+            for item in page["items"]:
+                assert "correct_answer" not in item
+                assert all("is_correct" not in option for option in item["options"])
+                QuestionDeliveryResponse(**item)
+
+    def test_index_entries_are_answer_free(self, index):
+        """Test that indexed copies never carry answers, while the store does."""
+        entry = index.get_many(["q1"])["q1"]
+
+        assert "correct_answer" not in entry and "is_correct" not in entry["options"][0]
+        assert len(index.answer_keys) == 4 and "q1" in index.answer_keys
+
+
+class TestAnswerKeyStore:
+    """Test cases for checking answers from memory."""
+
+    @pytest.mark.asyncio
+    async def test_check_uses_memory_then_database(self, index, database):
+        """Test checks served from the store, and retired questions from the database."""
+        store = index.answer_keys
+
+        assert await store.check("q1", "B") == {"is_correct": True, "correct_answer": "B"}
+        assert (await store.check("q2", "B"))["is_correct"] is False
+        assert store.fallback_reads == 0
+
+        await database.update_document("questions", "q3", {"is_active": False, "updated_at": datetime(2024, 1, 2)})
+        await index.refresh()
+        assert "q3" not in store
+        assert await store.check("q3", "B") is None
+        assert await store.check("missing", "A") is None
+        assert store.fallback_reads == 2
+
+    @pytest.mark.asyncio
+    async def test_rebuild_replaces_the_keys(self, index, database):
+        """Test that a rebuild picks up changed answers and drops deleted questions."""
+        await database.update_document("questions", "q0", {"correct_answer": "B"})
+        await database.delete_document("questions", "q1")
+
+        await index.build()
+
+        assert len(index.answer_keys) == 3
+        assert (await index.answer_keys.check("q0", "B"))["is_correct"] is True
+
+    @pytest.mark.asyncio
+    async def test_grading_reads_no_documents(self, index):
+        """Test that grading a paper of indexed questions is answered from memory."""
+        service = GradingService(index.database, index.answer_keys)
+        submission = {
+            "exam_id": "e1",
+            "exam_type": "MCAT",
+            "question_ids": ["q0", "q1", "q2"],
+            "answers": [
+                {"question_id": "q0", "selected_answer": "A", "time_taken": 1.0},
+                {"question_id": "q1", "selected_answer": "A", "time_taken": 1.0}
+            ]
+        }
+
+        result = await service.grade_submission("u1", submission)
+
+        assert result["outcomes"] == "ciu"
+        assert index.answer_keys.fallback_reads == 0
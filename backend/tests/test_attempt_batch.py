@@ -0,0 +1,152 @@
+"""
+Unit tests for batch attempt submission.
+"""
+
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.core.exceptions import ConflictError, ValidationError
+from app.core.memory_database import MemoryDatabase
+from app.core.sharded_counter import ShardedCounter
+from app.core.write_behind import WriteBehindBuffer
+from app.models.question import QuestionAttemptBatchRequest
+from app.services import question_service as question_service_module
+from app.services.attempt_ingestion import AttemptQueue
+from app.services.question_index import QuestionIndex
+from app.services.question_service import QuestionService
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """Memory database with two approved questions and a draft, used by the service and its attempt queue."""
+    database = MemoryDatabase()
+    database.load("questions", {
+        "q1": {"exam_type": "ECAT", "correct_answer": "A", "is_active": True, "approval_status": "approved"},
+        "q2": {"exam_type": "ECAT", "correct_answer": "C", "is_active": True, "approval_status": "approved"},
+        "draft": {"exam_type": "ECAT", "correct_answer": "B", "is_active": True, "approval_status": "pending"}
+    })
+    counter = ShardedCounter(
+        "questions", "performance_stats", ["total_attempts", "correct_attempts", "timed_attempts", "total_time"],
+        num_shards=2, database=database, buffer=WriteBehindBuffer(database)
+    )
+    monkeypatch.setattr(question_service_module, "db", database)
+    monkeypatch.setattr(question_service_module, "attempt_queue", AttemptQueue(database, counter))
+    return database
+
+
+@pytest.fixture
+def service(database):
+    return QuestionService(index=QuestionIndex(database))
+
+
+def attempts(*answers, **overrides):
+    return [
+        {"question_id": question_id, "selected_answer": answer, "time_taken": 3.0, "attempted_at": None, **overrides}
+        for question_id, answer in answers
+    ]
+
+
+class TestAttemptBatch:
+    """Test cases for validating, grading and deduplicating attempt batches."""
+
+    @pytest.mark.asyncio
+    async def test_batch_is_graded_and_written_once(self, service, database):
+        """Test that a batch is graded server-side and a retry is not written again."""
+        batch = attempts(("q1", "A"), ("q2", "B"), ("q1", "A"))
+
+        first = await service.record_question_attempts("u1", batch, "session-0001")
+        retry = await service.record_question_attempts("u1", batch, "session-0001")
+
+        assert (first["accepted"], first["correct"], first["replayed"]) == (3, 2, False)
+        assert [r["is_correct"] for r in first["results"]] == [True, False, True]
+        assert retry == {**first, "replayed": True}
+        assert await database.count("question_attempts") == 3
+        assert (await question_service_module.attempt_queue.counter.totals(["q1"]))["q1"]["total_attempts"] == 2
+
+    @pytest.mark.asyncio
+    async def test_invalid_batch_writes_nothing(self, service, database):
+        """Test that one bad attempt rejects the batch and frees its key."""
+        batch = attempts(("q1", "A"), ("missing", "A"))
+
+        with pytest.raises(ValidationError, match=r"attempts\[1\]"):
+            await service.record_question_attempts("u1", batch, "session-0002")
+
+        assert await database.count("question_attempts") == 0
+        assert (await database.get_document("attempt_batches", "u1_session-0002"))["status"] == "failed"
+        assert (await service.record_question_attempts("u1", batch[:1], "session-0002"))["accepted"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unapproved_questions_are_not_graded(self, service):
+        """Test that attempts on a draft question are rejected rather than graded."""
+        with pytest.raises(ValidationError, match="unknown question draft"):
+            await service.record_question_attempts("u1", attempts(("draft", "B")), "session-0010")
+        assert await service.check_answer("draft", "B") is None
+
+    @pytest.mark.asyncio
+    async def test_client_timestamps_are_checked(self, service):
+        """Test that future and stale client timestamps are rejected, aware ones normalized."""
+        future = datetime.now(timezone.utc) + timedelta(hours=1)
+        stale = datetime.utcnow() - timedelta(days=60)
+        recent = datetime.now(timezone.utc) - timedelta(minutes=10)
+
+        with pytest.raises(ValidationError):
+            await service.record_question_attempts("u1", attempts(("q1", "A"), attempted_at=future), "session-0003")
+        with pytest.raises(ValidationError):
+            await service.record_question_attempts("u1", attempts(("q1", "A"), attempted_at=stale), "session-0004")
+        result = await service.record_question_attempts("u1", attempts(("q1", "A"), attempted_at=recent), "session-0005")
+        assert result["accepted"] == 1
+
+    @pytest.mark.asyncio
+    async def test_key_in_progress_conflicts(self, service, database):
+        """Test that a key still being processed is reported as a conflict."""
+        await database.create_document("attempt_batches", {"user_id": "u1", "status": "processing"}, "u1_session-0006")
+
+        with pytest.raises(ConflictError):
+            await service.record_question_attempts("u1", attempts(("q1", "A")), "session-0006")
+
+    @pytest.mark.asyncio
+    async def test_stale_claim_is_taken_over(self, service, database):
+        """Test that a claim left processing by a dead worker stops blocking the key."""
+        stale = datetime.utcnow() - timedelta(hours=1)
+        await database.create_document(
+            "attempt_batches", {"user_id": "u1", "status": "processing", "created_at": stale}, "u1_session-0008"
+        )
+
+        result = await service.record_question_attempts("u1", attempts(("q1", "A")), "session-0008")
+
+        assert result["accepted"] == 1
+        assert (await database.get_document("attempt_batches", "u1_session-0008"))["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_partial_write_retry_counts_stats_once(self, service, database):
+        """Test that attempts written before a failure are overwritten on retry and counted once."""
+        queue = question_service_module.attempt_queue
+        bulk_write = database.bulk_write
+
+        async def second_write_fails(operations, max_concurrency=None):
+            result = await bulk_write(operations[:1])
+            result["results"].append({"index": 1, "success": False, "error": "down", "reason": "unavailable"})
+            return {**result, "success": False, "failed": 1}
+
+        batch = attempts(("q1", "A"), ("q2", "C"))
+        database.bulk_write = second_write_fails
+        with pytest.raises(Exception, match="Only 1 of 2"):
+            await service.record_question_attempts("u1", batch, "session-0009")
+        database.bulk_write = bulk_write
+
+        assert await queue.counter.totals(["q1"]) == {}
+        result = await service.record_question_attempts("u1", batch, "session-0009")
+
+        assert result["accepted"] == 2
+        assert await database.count("question_attempts") == 2
+        totals = await queue.counter.totals(["q1", "q2"])
+        assert totals["q1"]["total_attempts"] == 1 and totals["q2"]["total_attempts"] == 1
+
+    def test_request_model_limits(self):
+        """Test the request model's key and size limits."""
+        item = {"question_id": "q1", "selected_answer": "A", "time_taken": 1.0}
+
+        with pytest.raises(ValueError):
+            QuestionAttemptBatchRequest(idempotency_key="short", attempts=[item])
+        with pytest.raises(ValueError):
+            QuestionAttemptBatchRequest(idempotency_key="session-0007", attempts=[])
+        assert QuestionAttemptBatchRequest(idempotency_key="session-0007", attempts=[item]).attempts[0].attempted_at is None
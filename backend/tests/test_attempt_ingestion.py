@@ -0,0 +1,105 @@
+"""
+Unit tests for the buffered question attempt queue.
+"""
+
+import asyncio
+import pytest
+from app.core.exceptions import DatabaseUnavailableError
+from app.core.memory_database import MemoryDatabase
+from app.core.sharded_counter import ShardedCounter
+from app.core.write_behind import WriteBehindBuffer
+from app.services.attempt_ingestion import AttemptQueue
+
+
+@pytest.fixture
+def database():
+    """Memory database with two questions."""
+    database = MemoryDatabase()
+    database.load("questions", {"q1": {"exam_type": "ECAT"}, "q2": {"exam_type": "ECAT"}})
+    return database
+
+
+def make_queue(database, **options):
+    """Queue over ``database`` whose stats write straight to two-shard counters."""
+    counter = ShardedCounter(
+        "questions", "performance_stats", ["total_attempts", "correct_attempts", "timed_attempts", "total_time"],
+        num_shards=2, database=database, buffer=WriteBehindBuffer(database)
+    )
+    return AttemptQueue(database, counter, **{"batch_size": 10, "batch_interval": 0.01, **options})
+
+
+def attempt(n):
+    return {"question_id": f"q{n % 2 + 1}", "user_id": "u1", "is_correct": n % 4 == 0, "time_taken": 2.0}
+
+
+class TestAttemptQueue:
+    """Test cases for batching, draining and backpressure."""
+
+    @pytest.mark.asyncio
+    async def test_writes_through_when_not_running(self, database):
+        """Test that an unstarted queue writes each attempt immediately."""
+        queue = make_queue(database)
+
+        assert await queue.submit(attempt(0), attempt_id="a0") is True
+        assert (await database.get_document("question_attempts", "a0"))["question_id"] == "q1"
+        assert (await queue.counter.totals(["q1"]))["q1"]["total_attempts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_batches_attempts_and_stats(self, database):
+        """Test that attempts are written in batches with one stats increment per question."""
+        queue = make_queue(database)
+        queue.start()
+        for n in range(25):
+            assert await queue.submit(attempt(n)) is True
+        await queue.stop()
+
+        assert await database.count("question_attempts") == 25
+        assert queue.stats()["batches"] == 3 and queue.stats()["written"] == 25
+        totals = await queue.counter.totals(["q1", "q2"])
+        assert totals["q1"] == {"total_attempts": 13, "correct_attempts": 7, "timed_attempts": 13, "total_time": 26.0}
+        assert totals["q2"]["total_attempts"] == 12 and totals["q2"]["correct_attempts"] == 0
+
+    @pytest.mark.asyncio
+    async def test_full_queue_makes_submitters_wait(self, database):
+        """Test backpressure while the database is slow."""
+        queue = make_queue(database, max_queued=2, batch_size=1)
+        gate = asyncio.Event()
+        bulk_write = database.bulk_write
+
+        async def slow_bulk_write(operations, max_concurrency=None):
+            await gate.wait()
+            return await bulk_write(operations, max_concurrency)
+
+        database.bulk_write = slow_bulk_write
+        queue.start()
+        submitters = asyncio.gather(*(queue.submit(attempt(n)) for n in range(6)))
+        await asyncio.sleep(0.05)
+
+        assert queue.stats()["blocked"] > 0 and queue.stats()["queued"] == 2
+        gate.set()
+        await submitters
+        await queue.stop()
+        assert await database.count("question_attempts") == 6
+
+    @pytest.mark.asyncio
+    async def test_unavailable_attempts_are_requeued(self, database):
+        """Test that a batch lost to an outage is written by a later batch."""
+        queue = make_queue(database)
+        bulk_write = database.bulk_write
+        calls = []
+
+        async def flaky_bulk_write(operations, max_concurrency=None):
+            calls.append(len(operations))
+            if len(calls) == 1:
+                raise DatabaseUnavailableError("down")
+            return await bulk_write(operations, max_concurrency)
+
+        database.bulk_write = flaky_bulk_write
+        queue.start()
+        for n in range(3):
+            await queue.submit(attempt(n))
+        await asyncio.sleep(0.1)
+        await queue.stop()
+
+        assert await database.count("question_attempts") == 3
+        assert queue.stats()["requeued"] == 3 and queue.stats()["failed"] == 0
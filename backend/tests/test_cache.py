@@ -0,0 +1,83 @@
+"""
+Unit tests for the in-process document cache.
+"""
+
+import pytest
+from app.core.cache import DocumentCache
+
+
+class TestDocumentCache:
+    """Test cases for TTL, LRU eviction and invalidation."""
+
+    @pytest.fixture
+    def cache(self):
+        """Small cache with one cached collection."""
+        return DocumentCache({"users": 60}, max_entries=2)
+
+    def test_miss_then_hit(self, cache):
+        """Test that a stored document is returned on the next lookup."""
+        assert cache.get_document("users", "u1") == (False, None)
+
+        cache.set_document("users", "u1", {"tier": "free"})
+
+        assert cache.get_document("users", "u1") == (True, {"tier": "free"})
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_missing_documents_are_cached(self, cache):
+        """Test that a known-missing document is a hit returning None."""
+        cache.set_document("users", "ghost", None)
+
+        assert cache.get_document("users", "ghost") == (True, None)
+
+    def test_returned_values_are_copies(self, cache):
+        """Test that mutating a returned document does not corrupt the cache."""
+        cache.set_document("users", "u1", {"tier": "free"})
+        _, user = cache.get_document("users", "u1")
+        user["tier"] = "paid"
+
+        assert cache.get_document("users", "u1")[1]["tier"] == "free"
+
+    def test_ttl_expiry(self, cache, monkeypatch):
+        """Test that entries expire after their collection TTL."""
+        now = [1000.0]
+        monkeypatch.setattr("app.core.cache.time.monotonic", lambda: now[0])
+        cache.set_document("users", "u1", {})
+        now[0] += 61
+
+        assert cache.get_document("users", "u1") == (False, None)
+
+    def test_lru_eviction(self, cache):
+        """Test that the least recently used entry is evicted first."""
+        cache.set_document("users", "u1", {})
+        cache.set_document("users", "u2", {})
+        cache.get_document("users", "u1")
+        cache.set_document("users", "u3", {})
+
+        assert cache.get_document("users", "u1")[0] is True
+        assert cache.get_document("users", "u2")[0] is False
+        assert cache.stats()["evictions"] == 1
+
+    def test_uncached_collection_is_ignored(self, cache):
+        """Test that collections without a TTL are never stored."""
+        cache.set_document("user_devices", "d1", {})
+
+        assert cache.get_document("user_devices", "d1") == (False, None)
+
+    def test_invalidate_drops_document_and_queries(self, cache):
+        """Test that invalidating a document also drops its collection's queries."""
+        key = cache.query_key(filters=None, limit=10)
+        cache.set_document("users", "u1", {})
+        cache.set_query("users", key, [])
+        cache.invalidate("users", "u1")
+
+        assert cache.get_document("users", "u1")[0] is False
+        assert cache.get_query("users", key) is None
+
+    def test_stale_read_is_not_stored(self, cache):
+        """Test that a read that raced a write is discarded."""
+        generation = cache.generation("users")
+        cache.invalidate("users", "u1")
+        cache.set_document("users", "u1", {"tier": "stale"}, generation)
+
+        assert cache.get_document("users", "u1")[0] is False
@@ -0,0 +1,343 @@
+"""
+Unit tests for FirestoreClient against the latency-free emulator stand-in.
+"""
+
+import asyncio
+import pytest
+from google.api_core import exceptions as gcp_exceptions
+from app.core.database import FirestoreClient
+from app.core.dataloader import batching_scope
+from app.core.exceptions import ValidationError
+from app.core.db_utils import chunk_operations
+from benchmarks.firestore_standin import FirestoreStandIn, StandInBatch
+
+
+@pytest.fixture
+def standin():
+    """Stand-in Firestore with no simulated latency."""
+    return FirestoreStandIn(latency_ms=0, per_write_ms=0)
+
+
+@pytest.fixture
+def client(standin):
+    """FirestoreClient bound to the stand-in, without the read cache."""
+    client = FirestoreClient(client=standin, max_workers=4, cache_enabled=False)
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def cached_client(standin):
+    """FirestoreClient bound to the stand-in with the read cache enabled."""
+    client = FirestoreClient(client=standin, max_workers=4, cache_enabled=True)
+    yield client
+    client.close()
+
+
+class TestChunking:
+    """Test cases for splitting writes into batches."""
+
+    def test_chunks_respect_max_size(self):
+        """Test that no chunk exceeds the batch limit."""
+        ops = [(i, {"collection": "users", "document_id": f"u{i}"}) for i in range(1201)]
+        chunks = chunk_operations(ops, 500)
+
+        assert [len(c) for c in chunks] == [500, 500, 201]
+
+    def test_same_document_stays_in_one_chunk(self):
+        """Test that writes to one document are never split across chunks."""
+        ops = [(i, {"collection": "users", "document_id": f"u{i}"}) for i in range(4)]
+        ops.append((4, {"collection": "users", "document_id": "u3"}))
+        chunks = chunk_operations(ops, 4)
+
+        assert [index for index, _ in chunks[-1]] == [3, 4]
+
+
+class TestBulkWrite:
+    """Test cases for the chunked parallel bulk writer."""
+
+    @pytest.mark.asyncio
+    async def test_bulk_write_over_batch_limit(self, client, standin):
+        """Test that more than 500 writes are committed successfully."""
+        ops = [
+            {"type": "create", "collection": "users", "document_id": f"u{i}", "data": {"n": i}}
+            for i in range(1200)
+        ]
+        result = await client.bulk_write(ops)
+
+        assert result["success"] is True
+        assert result["written"] == 1200
+        assert len(standin.data["users"]) == 1200
+
+    @pytest.mark.asyncio
+    async def test_auto_generated_ids_are_reported(self, client):
+        """Test that creates without an ID get one and report it."""
+        result = await client.bulk_write([{"type": "create", "collection": "users", "data": {}}])
+
+        assert result["results"][0]["document_id"]
+
+    @pytest.mark.asyncio
+    async def test_failed_operation_is_isolated(self, client, standin):
+        """Test that one bad write only fails itself, not its batch."""
+        standin.data["users"] = {"u1": {}}
+        ops = [
+            {"type": "update", "collection": "users", "document_id": "u1", "data": {"a": 1}},
+            {"type": "update", "collection": "users", "document_id": "missing", "data": {"a": 1}},
+        ]
+        result = await client.bulk_write(ops)
+
+        assert result["success"] is False
+        assert result["failed"] == 1
+        assert result["results"][0]["success"] is True
+        assert result["results"][1]["error"]
+        assert standin.data["users"]["u1"] == {"a": 1}
+
+    @pytest.mark.asyncio
+    async def test_transient_failure_is_retried(self, client, standin, monkeypatch):
+        """Test that a transient commit error is retried with backoff."""
+        calls = {"count": 0}
+        original_commit = StandInBatch.commit
+
+        def flaky_commit(batch):
+            calls["count"] += 1
+            if calls["count"] == 1:
+                raise gcp_exceptions.ServiceUnavailable("try again")
+            original_commit(batch)
+
+        monkeypatch.setattr(StandInBatch, "commit", flaky_commit)
+        monkeypatch.setattr("app.core.resilience.backoff_delay", lambda attempt: 0)
+
+        success = await client.batch_write(
+            [{"type": "create", "collection": "users", "document_id": "u1", "data": {}}]
+        )
+
+        assert success is True
+        assert calls["count"] == 2
+
+
+class TestMultiGet:
+    """Test cases for multi-document reads and request-scoped batching."""
+
+    @pytest.mark.asyncio
+    async def test_get_documents(self, client, standin):
+        """Test that get_documents maps every requested ID, found or not."""
+        standin.data["users"] = {"u1": {"tier": "free"}, "u2": {"tier": "paid"}}
+        documents = await client.get_documents("users", ["u1", "u2", "nope"])
+
+        assert documents["u1"] == {"tier": "free", "id": "u1"}
+        assert documents["u2"]["tier"] == "paid"
+        assert documents["nope"] is None
+        assert standin.round_trips == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_reads_are_coalesced(self, client, standin):
+        """Test that reads in one tick become a single RPC inside a scope."""
+        standin.data["users"] = {"u1": {"tier": "free"}}
+        standin.data["anonymous_users"] = {"a1": {"tier": "anonymous"}}
+
+        with batching_scope():
+            user, anonymous, missing = await asyncio.gather(
+                client.get_document("users", "u1"),
+                client.get_document("anonymous_users", "a1"),
+                client.get_document("users", "nope")
+            )
+
+        assert user["tier"] == "free"
+        assert anonymous["tier"] == "anonymous"
+        assert missing is None
+        assert standin.round_trips == 1
+
+    @pytest.mark.asyncio
+    async def test_duplicate_loads_get_independent_copies(self, client, standin):
+        """Test that callers asking for the same document cannot see each other's edits."""
+        standin.data["users"] = {"u1": {"tier": "free"}}
+
+        with batching_scope():
+            first, second = await asyncio.gather(
+                client.get_document("users", "u1"),
+                client.get_document("users", "u1")
+            )
+
+        first.pop("tier")
+        assert second["tier"] == "free"
+
+    @pytest.mark.asyncio
+    async def test_reads_outside_scope_are_not_batched(self, client, standin):
+        """Test that without a scope each read is its own RPC."""
+        standin.data["users"] = {"u1": {}, "u2": {}}
+        await asyncio.gather(client.get_document("users", "u1"), client.get_document("users", "u2"))
+
+        assert standin.round_trips == 2
+
+
+class TestReadThroughCache:
+    """Test cases for the read-through cache wired into the client."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_read_is_served_from_cache(self, cached_client, standin):
+        """Test that a second read of a cached collection skips the backend."""
+        standin.data["users"] = {"u1": {"tier": "free"}}
+        await cached_client.get_document("users", "u1")
+        user = await cached_client.get_document("users", "u1")
+
+        assert user["tier"] == "free"
+        assert standin.round_trips == 1
+        assert cached_client.cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_update_invalidates(self, cached_client, standin):
+        """Test that writing a document drops its cached copy."""
+        standin.data["users"] = {"u1": {"tier": "free"}}
+        await cached_client.get_document("users", "u1")
+        await cached_client.update_document("users", "u1", {"tier": "paid"})
+        user = await cached_client.get_document("users", "u1")
+
+        assert user["tier"] == "paid"
+
+    @pytest.mark.asyncio
+    async def test_uncached_read_sees_other_writers(self, cached_client, standin):
+        """Test that cached=False reads past the cache and refreshes it."""
+        standin.data["users"] = {"u1": {"usage_stats": {"practice_mcqs_today": 1}}}
+        await cached_client.get_document("users", "u1")
+        standin.data["users"]["u1"] = {"usage_stats": {"practice_mcqs_today": 5}}  # written by another worker
+
+        fresh = await cached_client.get_document("users", "u1", cached=False)
+        cached = await cached_client.get_document("users", "u1")
+
+        assert fresh["usage_stats"]["practice_mcqs_today"] == 5
+        assert cached["usage_stats"]["practice_mcqs_today"] == 5
+        assert standin.round_trips == 2
+
+    @pytest.mark.asyncio
+    async def test_write_invalidates_cached_queries(self, cached_client, standin):
+        """Test that any write to a collection drops its cached query results."""
+        standin.data["questions"] = {"q1": {"exam_type": "MCAT"}}
+        filters = [{"field": "exam_type", "operator": "==", "value": "MCAT"}]
+        assert len(await cached_client.query_collection("questions", filters=filters)) == 1
+
+        await cached_client.create_document("questions", {"exam_type": "MCAT"}, "q2")
+
+        assert len(await cached_client.query_collection("questions", filters=filters)) == 2
+
+    @pytest.mark.asyncio
+    async def test_uncached_collection_always_reads(self, cached_client, standin):
+        """Test that collections without a TTL bypass the cache."""
+        standin.data["user_devices"] = {"d1": {}}
+        await cached_client.get_document("user_devices", "d1")
+        await cached_client.get_document("user_devices", "d1")
+
+        assert standin.round_trips == 2
+
+
+class TestProjection:
+    """Test cases for field projection."""
+
+    @pytest.mark.asyncio
+    async def test_query_projection(self, client, standin):
+        """Test that projected queries only return the selected fields."""
+        standin.data["questions"] = {"q1": {"question_text": "?", "explanation": {"long": "text"}}}
+        results = await client.query_collection("questions", fields=["question_text"])
+
+        assert results == [{"question_text": "?", "id": "q1"}]
+
+    @pytest.mark.asyncio
+    async def test_get_document_projection(self, client, standin):
+        """Test that a projected get returns only the selected fields."""
+        standin.data["questions"] = {"q1": {"question_text": "?", "references": ["a"]}}
+        question = await client.get_document("questions", "q1", fields=["question_text"])
+
+        assert question == {"question_text": "?", "id": "q1"}
+
+    @pytest.mark.asyncio
+    async def test_projection_of_cached_document(self, cached_client, standin):
+        """Test that a cached full document is projected without a backend read."""
+        standin.data["questions"] = {"q1": {"question_text": "?", "references": ["a"]}}
+        await cached_client.get_document("questions", "q1")
+        question = await cached_client.get_document("questions", "q1", fields=["question_text"])
+
+        assert question == {"question_text": "?", "id": "q1"}
+        assert standin.round_trips == 1
+
+
+class TestAggregation:
+    """Test cases for server-side count and aggregation queries."""
+
+    @pytest.mark.asyncio
+    async def test_count_with_filters(self, client, standin):
+        """Test counting documents that match a filter."""
+        standin.data["user_devices"] = {
+            "d1": {"user_id": "u1"}, "d2": {"user_id": "u1"}, "d3": {"user_id": "u2"}
+        }
+        count = await client.count(
+            "user_devices", filters=[{"field": "user_id", "operator": "==", "value": "u1"}]
+        )
+
+        assert count == 2
+
+    @pytest.mark.asyncio
+    async def test_sum_and_avg_with_default_aliases(self, client, standin):
+        """Test sum/avg results keyed by their default aliases."""
+        standin.data["questions"] = {"q1": {"attempts": 4}, "q2": {"attempts": 6}}
+        result = await client.aggregate(
+            "questions", [{"type": "count"}, {"type": "sum", "field": "attempts"}, {"type": "avg", "field": "attempts"}]
+        )
+
+        assert result == {"count": 2, "sum_attempts": 10, "avg_attempts": 5}
+
+    @pytest.mark.asyncio
+    async def test_invalid_aggregation(self, client):
+        """Test that unknown aggregation types are rejected."""
+        with pytest.raises(ValidationError):
+            await client.aggregate("questions", [{"type": "median", "field": "x"}])
+
+
+class TestAtomicWrites:
+    """Test cases for increments and transactional read-modify-write."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_increments_are_not_lost(self, client, standin):
+        """Test that concurrent increments on nested fields all apply."""
+        standin.data["questions"] = {"q1": {"performance_stats": {"total_attempts": 0}}}
+        await asyncio.gather(*(
+            client.increment("questions", "q1", {"performance_stats.total_attempts": 1, "performance_stats.total_time": 2.5})
+            for _ in range(50)
+        ))
+
+        stats = standin.data["questions"]["q1"]["performance_stats"]
+        assert stats["total_attempts"] == 50
+        assert stats["total_time"] == 125.0
+
+    @pytest.mark.asyncio
+    async def test_increment_missing_document(self, client):
+        """Test that incrementing a missing document reports failure."""
+        assert await client.increment("questions", "missing", {"count": 1}) is False
+
+    @pytest.mark.asyncio
+    async def test_transactional_update_serializes_writers(self, client, standin):
+        """Test that concurrent read-modify-write transactions see each other's writes."""
+        standin.data["counters"] = {"c1": {"value": 0}}
+        await asyncio.gather(*(
+            client.transactional_update("counters", "c1", lambda current: {"value": current["value"] + 1})
+            for _ in range(20)
+        ))
+
+        assert standin.data["counters"]["c1"]["value"] == 20
+
+    @pytest.mark.asyncio
+    async def test_transactional_update_creates_and_skips(self, client, standin):
+        """Test creating a missing document and skipping a no-op update."""
+        created = await client.transactional_update("counters", "new", lambda current: {"value": 1} if current is None else None)
+        skipped = await client.transactional_update("counters", "new", lambda current: None)
+
+        assert created == {"value": 1}
+        assert skipped is None
+        assert standin.data["counters"]["new"] == {"value": 1}
+
+    @pytest.mark.asyncio
+    async def test_transactional_update_invalidates_cache(self, cached_client, standin):
+        """Test that a committed transaction drops the cached document."""
+        standin.data["users"] = {"u1": {"credits": 1}}
+        await cached_client.get_document("users", "u1")
+        await cached_client.transactional_update("users", "u1", lambda current: {"credits": current["credits"] + 1})
+
+        assert (await cached_client.get_document("users", "u1"))["credits"] == 2
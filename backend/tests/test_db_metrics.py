@@ -0,0 +1,87 @@
+"""
+Unit tests for database call instrumentation.
+"""
+
+import pytest
+from app.core.db_metrics import db_metrics, filter_shape, request_scope
+from app.core.memory_database import MemoryDatabase
+
+
+@pytest.fixture
+def database():
+    """Memory database with a few questions and fresh metrics."""
+    db_metrics.reset()
+    database = MemoryDatabase()
+    database.load("questions", {f"q{i}": {"exam_type": "ECAT", "score": i} for i in range(5)})
+    yield database
+    db_metrics.reset()
+    db_metrics.slow_query_ms = 250.0
+
+
+class TestDatabaseMetrics:
+    """Test cases for per-operation histograms and request attribution."""
+
+    @pytest.mark.asyncio
+    async def test_records_latency_and_documents(self, database):
+        """Test that reads and writes are counted per collection and operation."""
+        await database.query_collection("questions", filters=[{"field": "exam_type", "operator": "==", "value": "ECAT"}])
+        await database.get_document("questions", "q1")
+        await database.update_document("questions", "q1", {"score": 10})
+
+        questions = db_metrics.snapshot()["collections"]["questions"]
+        assert questions["query"]["count"] == 1
+        assert questions["query"]["documents_read"] == 5
+        assert questions["get"]["documents_read"] == 1
+        assert questions["update"]["documents_written"] == 1
+        assert questions["query"]["p50_ms"] is not None
+
+    @pytest.mark.asyncio
+    async def test_failed_update_counts_as_error(self, database):
+        """Test that an update reporting failure is counted as an error."""
+        await database.update_document("questions", "missing", {"score": 1})
+
+        assert db_metrics.snapshot()["collections"]["questions"]["update"]["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_request_attribution(self, database):
+        """Test that calls inside a request scope are added to its stats."""
+        await database.get_document("questions", "q0")
+        with request_scope() as stats:
+            await database.get_documents("questions", ["q1", "q2"])
+            async for _ in database.query_iter("questions", batch_size=2):
+                pass
+
+        assert stats.calls == 2
+        assert stats.reads == 7
+
+    @pytest.mark.asyncio
+    async def test_slow_query_log_has_shape_not_values(self, database):
+        """Test that slow calls are logged with the filter shape only."""
+        db_metrics.slow_query_ms = 0
+        await database.query_collection(
+            "questions", filters=[{"field": "exam_type", "operator": "==", "value": "ECAT"}], order_by="-score", limit=3
+        )
+
+        entry = db_metrics.snapshot()["slow_queries"][-1]
+        assert entry["shape"] == "exam_type == ? ORDER BY -score LIMIT 3"
+        assert "ECAT" not in str(entry)
+
+    def test_endpoint_totals(self, database):
+        """Test that per-endpoint totals accumulate request stats."""
+        with request_scope() as stats:
+            stats.reads = 4
+        db_metrics.record_request("GET /api/v1/questions/practice", stats)
+        db_metrics.record_request("GET /api/v1/questions/practice", stats)
+
+        endpoint = db_metrics.snapshot()["endpoints"]["GET /api/v1/questions/practice"]
+        assert endpoint["requests"] == 2
+        assert endpoint["reads"] == 8
+
+    def test_filter_shape_for_aggregations(self):
+        """Test the shape of an aggregation query."""
+        shape = filter_shape({
+            "aggregations": [{"type": "count"}],
+            "filters": [{"field": "user_id", "operator": "==", "value": "u1"}]
+        })
+
+        assert shape == "count user_id == ?"
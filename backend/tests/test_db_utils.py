@@ -0,0 +1,72 @@
+"""
+Unit tests for the backend-neutral database helpers.
+"""
+
+import pytest
+from datetime import datetime, timezone
+from app.core.db_utils import (
+    encode_page_token, decode_page_token, page_token_for,
+    parse_order_by, get_field, project
+)
+from app.core.exceptions import ValidationError
+
+
+class TestPageTokens:
+    """Test cases for cursor page tokens."""
+
+    def test_round_trip_plain_values(self):
+        """Test that plain cursor values survive encoding."""
+        token = encode_page_token(["MCAT", 42], "doc_1")
+        values, document_id = decode_page_token(token)
+
+        assert values == ["MCAT", 42]
+        assert document_id == "doc_1"
+
+    def test_round_trip_datetime(self):
+        """Test that datetimes come back as datetimes, not strings."""
+        created_at = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+        values, _ = decode_page_token(encode_page_token([created_at], "doc_1"))
+
+        assert values == [created_at]
+
+    def test_token_is_url_safe(self):
+        """Test that tokens can be passed as query parameters."""
+        token = encode_page_token(["a/b+c?"], "doc/1")
+
+        assert all(c.isalnum() or c in "-_" for c in token)
+
+    def test_invalid_token(self):
+        """Test that garbage tokens raise a validation error."""
+        with pytest.raises(ValidationError):
+            decode_page_token("not-a-token")
+
+    def test_page_token_for_document(self):
+        """Test building a token from the last document of a page."""
+        token = page_token_for({"id": "q9", "created_at": "2024-01-01"}, "created_at")
+
+        assert decode_page_token(token) == (["2024-01-01"], "q9")
+
+
+class TestFieldHelpers:
+    """Test cases for order and field path helpers."""
+
+    def test_parse_order_by(self):
+        """Test ascending, descending and missing order specs."""
+        assert parse_order_by("created_at") == ("created_at", False)
+        assert parse_order_by("-created_at") == ("created_at", True)
+        assert parse_order_by(None) == (None, False)
+
+    def test_get_nested_field(self):
+        """Test dotted field path resolution."""
+        document = {"performance_stats": {"total_attempts": 3}}
+
+        assert get_field(document, "performance_stats.total_attempts") == 3
+        assert get_field(document, "performance_stats.missing") is None
+
+    def test_project_nested_fields(self):
+        """Test projecting top-level and dotted fields, keeping the ID."""
+        document = {"id": "q1", "text": "?", "stats": {"total": 3, "avg": 1.5}, "notes": "x"}
+
+        assert project(document, ["text", "stats.total", "missing"]) == {
+            "id": "q1", "text": "?", "stats": {"total": 3}
+        }
@@ -0,0 +1,148 @@
+"""
+Unit tests for exam blueprints and stratified paper assembly.
+"""
+
+import asyncio
+from collections import Counter
+import pytest
+from app.core.exam_blueprints import EXAM_BLUEPRINTS, apportion, expand_blueprint, validate_blueprint
+from app.core.exceptions import ValidationError
+from app.core.memory_database import MemoryDatabase
+from app.services import question_service as question_service_module
+from app.services.exam_assembly import ExamAssembler
+from app.services.question_index import QuestionIndex
+from app.services.question_service import QuestionService
+
+BLUEPRINT = {
+    "question_count": 10,
+    "sections": [
+        {"subject": "physics", "question_count": 6, "difficulty": {"easy": 1, "hard": 1}, "arde_probability": {"high": 1}},
+        {"subject": "chemistry", "question_count": 4, "difficulty": {"medium": 1}, "arde_probability": {"high": 1, "low": 1}},
+    ]
+}
+
+
+def question(n, subject, difficulty, arde_probability):
+    """Approved ECAT question ``n``."""
+    return {
+        "question_text": f"Question {n}?",
+        "options": [],
+        "correct_answer": "A",
+        "exam_type": "ECAT",
+        "subject": subject,
+        "topic": "general",
+        "difficulty": difficulty,
+        "arde_probability": arde_probability,
+        "historical_frequency": 0,
+        "is_active": True,
+        "approval_status": "approved",
+        "random_key": n / 100
+    }
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """Bank with plenty of chemistry but only two hard, high-ARDE physics questions."""
+    database = MemoryDatabase()
+    bank = {}
+    for n in range(10):
+        bank[f"pe{n}"] = question(n, "physics", "easy", "high")
+        bank[f"pm{n}"] = question(10 + n, "physics", "medium", "low")
+        bank[f"c{n}"] = question(20 + n, "chemistry", "medium", ["high", "low"][n % 2])
+    bank["ph0"] = question(30, "physics", "hard", "high")
+    bank["ph1"] = question(31, "physics", "hard", "high")
+    database.load("questions", bank)
+    monkeypatch.setattr(question_service_module, "db", database)
+    return database
+
+
+@pytest.fixture
+def index(database):
+    """Index built over ``database``."""
+    index = QuestionIndex(database)
+    asyncio.run(index.build())
+    return index
+
+
+class TestBlueprints:
+    """Test cases for blueprint arithmetic and validation."""
+
+    def test_apportion_sums_to_total(self):
+        """Test that largest-remainder shares add up and follow the weights."""
+        shares = apportion(10, {"easy": 0.3, "medium": 0.5, "hard": 0.2, "none": 0})
+
+        assert shares == {"easy": 3, "medium": 5, "hard": 2}
+        assert sum(apportion(7, {"a": 1, "b": 1, "c": 1}).values()) == 7
+
+    def test_official_blueprints_expand_to_paper_length(self):
+        """Test that every official pattern expands to exactly its question count."""
+        for exam_type, blueprint in EXAM_BLUEPRINTS.items():
+            validate_blueprint(blueprint)
+            strata = expand_blueprint(exam_type, blueprint)
+
+            assert sum(stratum["quota"] for stratum in strata) == blueprint["question_count"]
+
+    def test_invalid_blueprints_are_rejected(self):
+        """Test mismatched totals and unknown difficulty levels."""
+        with pytest.raises(ValidationError):
+            validate_blueprint({**BLUEPRINT, "question_count": 12})
+        with pytest.raises(ValidationError):
+            validate_blueprint({"sections": [{"subject": "physics", "question_count": 5, "difficulty": {"expert": 1}}]})
+        with pytest.raises(ValidationError):
+            validate_blueprint({"sections": []})
+
+    def test_blueprint_size_and_time_are_capped(self):
+        """Test the limits that keep a client-supplied blueprint from fanning out or running long."""
+        with pytest.raises(ValidationError):
+            validate_blueprint({"sections": [{"subject": "physics", "question_count": 10 ** 6}]})
+        with pytest.raises(ValidationError):
+            validate_blueprint({"sections": [{"subject": f"s{n}", "question_count": 1} for n in range(11)]})
+        with pytest.raises(ValidationError):
+            validate_blueprint({"sections": [
+                {"subject": "physics", "question_count": 30, "topics": {f"t{n}": 1 for n in range(21)}}
+            ]})
+        for time_minutes in ("100", 0, 1.5, True, 101):
+            with pytest.raises(ValidationError):
+                validate_blueprint({**BLUEPRINT, "time_minutes": time_minutes}, max_time_minutes=100)
+        assert validate_blueprint({**BLUEPRINT, "time_minutes": 60}, max_time_minutes=100)["time_minutes"] == 60
+
+
+class TestExamAssembler:
+    """Test cases for filling and backfilling strata."""
+
+    @pytest.mark.asyncio
+    async def test_quotas_are_met_from_index(self, index):
+        """Test per-stratum quotas, section order and backfill of a short stratum."""
+        assembler = ExamAssembler(QuestionService(index=index))
+
+        result = await assembler.assemble("ECAT", BLUEPRINT)
+        paper = result["questions"]
+
+        assert len({q["id"] for q in paper}) == 10 and result["shortfall"] == 0
+        assert [q["subject"] for q in paper] == ["physics"] * 6 + ["chemistry"] * 4
+        assert Counter(q["arde_probability"] for q in paper[6:]) == {"high": 2, "low": 2}
+        # Only two hard physics questions exist; the third comes from medium
+        hard = next(s for s in result["strata"] if s["subject"] == "physics" and s["difficulty"] == "hard")
+        assert (hard["quota"], hard["filled"], hard["backfilled"]) == (3, 3, 1)
+        assert all("random_key" not in q and "approval_status" not in q for q in paper)
+
+    @pytest.mark.asyncio
+    async def test_database_path_without_index(self, database):
+        """Test assembly through random-key probes when the index is not ready."""
+        assembler = ExamAssembler(QuestionService(index=QuestionIndex(database)))
+
+        result = await assembler.assemble("ECAT", BLUEPRINT)
+
+        assert len({q["id"] for q in result["questions"]}) == 10
+
+    @pytest.mark.asyncio
+    async def test_small_bank_reports_shortfall(self, index):
+        """Test that a paper larger than the bank is returned short, without repeats."""
+        assembler = ExamAssembler(QuestionService(index=index))
+        blueprint = {"sections": [{"subject": "physics", "question_count": 40}]}
+
+        result = await assembler.assemble("ECAT", blueprint)
+
+        # 22 physics + 10 chemistry questions exist
+        assert len({q["id"] for q in result["questions"]}) == 32
+        assert result["shortfall"] == 8
@@ -0,0 +1,163 @@
+"""
+Unit tests for the pre-assembled exam paper pool.
+"""
+
+import asyncio
+import pytest
+from app.core.config import settings
+from app.core.memory_database import MemoryDatabase
+from app.core.write_behind import WriteBehindBuffer
+from app.services import question_service as question_service_module
+from app.services.exam_assembly import ExamAssembler
+from app.services.exam_paper_pool import ExamPaperPool
+from app.services.question_index import QuestionIndex
+from app.services.question_service import QuestionService
+
+SUBJECTS = ["mathematics", "physics", "chemistry", "english"]
+
+
+def question(n):
+    """Approved ECAT question ``n``, cycling through subjects and difficulties."""
+    return {
+        "question_text": f"Question {n}?",
+        "options": [],
+        "correct_answer": "A",
+        "exam_type": "ECAT",
+        "subject": SUBJECTS[n % 4],
+        "topic": "general",
+        "difficulty": ["easy", "medium", "hard"][n % 3],
+        "arde_probability": ["high", "medium", "low"][n // 12 % 3],
+        "historical_frequency": 0,
+        "is_active": True,
+        "approval_status": "approved",
+        "random_key": n / 400
+    }
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """Pool of at most three ECAT papers over a 400-question bank."""
+    monkeypatch.setattr(settings, "EXAM_PAPER_POOL_SIZE", 3)
+    monkeypatch.setattr(settings, "EXAM_PAPER_POOL_MIN", 2)
+    monkeypatch.setattr(settings, "EXAM_PAPER_MAX_USES", 3)
+    database = MemoryDatabase()
+    database.load("questions", {f"q{n}": question(n) for n in range(400)})
+    monkeypatch.setattr(question_service_module, "db", database)
+
+    index = QuestionIndex(database)
+    asyncio.run(index.build())
+    pool = ExamPaperPool(database, ExamAssembler(QuestionService(index=index)), index, WriteBehindBuffer(database))
+    asyncio.run(pool.refill("ECAT"))
+    return pool
+
+
+class TestExamPaperPool:
+    """Test cases for refilling, handing out and retiring papers."""
+
+    @pytest.mark.asyncio
+    async def test_refill_stores_id_lists(self, pool):
+        """Test that refilled papers are stored as full-length ID lists."""
+        stored = await pool.database.query_collection("exam_papers")
+
+        assert len(stored) == 3 and len(pool.papers["ECAT"]) == 3
+        assert all(len(set(paper["question_ids"])) == 100 for paper in stored)
+        assert "question_text" not in stored[0]
+
+    @pytest.mark.asyncio
+    async def test_checkout_serves_questions_without_repeats(self, pool):
+        """Test that a user gets each pooled paper once, then nothing."""
+        served = [await pool.checkout("ECAT", "user1") for _ in range(3)]
+
+        assert len({paper["paper_id"] for paper in served}) == 3
+        assert [q["subject"] for q in served[0]["questions"]][:30] == ["mathematics"] * 30
+        assert "approval_status" not in served[0]["questions"][0]
+        assert await pool.checkout("ECAT", "user1") is None
+        assert await pool.checkout("MCAT", "user1") is None
+        assert (await pool.database.get_document("exam_papers", served[0]["paper_id"]))["uses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_papers_rotate_after_max_uses(self, pool):
+        """Test that a paper handed out EXAM_PAPER_MAX_USES times leaves the pool."""
+        [paper] = pool.papers["ECAT"][:1]
+        pool.papers["ECAT"][:] = [paper]
+
+        for user in range(3):
+            assert (await pool.checkout("ECAT", f"user{user}"))["paper_id"] == paper["id"]
+
+        assert pool.papers["ECAT"] == []
+        assert await pool.database.get_document("exam_papers", paper["id"]) is None
+        assert pool.stats()["rotated"] == 1
+
+    @pytest.mark.asyncio
+    async def test_max_uses_is_shared_between_workers(self, pool):
+        """Test that syncing takes in another worker's handouts and retires used-up papers."""
+        other = ExamPaperPool(pool.database, pool.assembler, pool.index, WriteBehindBuffer(pool.database))
+        await other.load()
+        [paper] = pool.papers["ECAT"][:1]
+        pool.papers["ECAT"][:] = [paper]
+        other.papers["ECAT"][:] = [next(p for p in other.papers["ECAT"] if p["id"] == paper["id"])]
+
+        served = [await pool.checkout("ECAT", f"user{n}") for n in range(2)]
+        await other.sync_uses()
+        served.append(await other.checkout("ECAT", "user2"))
+        await pool.sync_uses()
+
+        assert all(served)
+        assert pool.papers["ECAT"] == [] and other.papers["ECAT"] == []
+        assert await pool.database.get_document("exam_papers", paper["id"]) is None
+
+    @pytest.mark.asyncio
+    async def test_handouts_are_counted_through_the_write_buffer(self, pool):
+        """Test that handouts are buffered increments rather than a write per checkout."""
+        buffer = pool.write_buffer
+        buffer.start()
+        [paper] = pool.papers["ECAT"][:1]
+        pool.papers["ECAT"][:] = [paper]
+
+        await pool.checkout("ECAT", "user1")
+        await pool.checkout("ECAT", "user2")
+        assert (await pool.database.get_document("exam_papers", paper["id"]))["uses"] == 0
+
+        await buffer.stop()
+        assert (await pool.database.get_document("exam_papers", paper["id"]))["uses"] == 2
+
+    @pytest.mark.asyncio
+    async def test_refill_adopts_papers_stored_by_other_workers(self, pool):
+        """Test that a short pool is topped up from stored papers before assembling new ones."""
+        other = ExamPaperPool(pool.database, pool.assembler, pool.index)
+
+        assert await other.refill("ECAT") == 3
+        assert other.stats()["assembled"] == 0
+        assert len(await pool.database.query_collection("exam_papers")) == 3
+
+    @pytest.mark.asyncio
+    async def test_retired_questions_trigger_regeneration(self, pool):
+        """Test that papers with a retired question are replaced by fresh ones."""
+        old = {paper["id"] for paper in pool.papers["ECAT"]}
+        retired = {paper["question_ids"][0] for paper in pool.papers["ECAT"]}
+        for question_id in retired:
+            await pool.database.update_document("questions", question_id, {"is_active": False})
+        await pool.index.build()
+
+        await pool.maintain()
+
+        assert len(pool.papers["ECAT"]) == 3 and not old & {paper["id"] for paper in pool.papers["ECAT"]}
+        assert all(not retired & set(paper["question_ids"]) for paper in pool.papers["ECAT"])
+
+    @pytest.mark.asyncio
+    async def test_load_restores_stored_papers(self, pool):
+        """Test that a new pool picks up papers stored by another process."""
+        other = ExamPaperPool(pool.database, pool.assembler, pool.index)
+        await other.load()
+
+        assert {paper["id"] for paper in other.papers["ECAT"]} == {paper["id"] for paper in pool.papers["ECAT"]}
+
+    @pytest.mark.asyncio
+    async def test_load_reads_at_most_a_full_pool(self, pool):
+        """Test that loading stops at EXAM_PAPER_POOL_SIZE papers however many are stored."""
+        for _ in range(5):
+            await pool.database.create_document("exam_papers", {"exam_type": "ECAT", "question_ids": [], "uses": 0})
+        other = ExamPaperPool(pool.database, pool.assembler, pool.index)
+        await other.load()
+
+        assert len(other.papers["ECAT"]) == 3
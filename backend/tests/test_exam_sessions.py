@@ -0,0 +1,192 @@
+"""
+Unit tests for server-side exam sessions.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from app.core.exceptions import ConflictError, NotFoundError, ValidationError
+from app.core.memory_database import MemoryDatabase
+from app.core.sqlite_database import SQLiteDatabase
+from app.services.exam_session_service import ExamSessionService
+from app.services.question_index import QuestionIndex
+
+
+def question(n):
+    return {
+        "question_text": f"Question {n}?",
+        "options": [],
+        "correct_answer": "A",
+        "exam_type": "ECAT",
+        "subject": "physics",
+        "topic": "mechanics",
+        "difficulty": "easy",
+        "arde_probability": "high",
+        "historical_frequency": 0,
+        "is_active": True,
+        "approval_status": "approved",
+        "created_by": "admin"
+    }
+
+
+@pytest.fixture
+def database():
+    """Memory database with twelve approved questions."""
+    database = MemoryDatabase()
+    database.load("questions", {f"q{n}": question(n) for n in range(12)})
+    return database
+
+
+@pytest.fixture(params=["index", "database"])
+def service(request, database):
+    """Session service reading questions from a built index or from the database."""
+    index = QuestionIndex(database)
+    if request.param == "index":
+        asyncio.run(index.build())
+    return ExamSessionService(database, index)
+
+
+PAPER = [f"q{n}" for n in (5, 3, 11, 0, 7, 1, 9)]
+
+
+class TestExamSessions:
+    """Test cases for creating, paging and closing sessions."""
+
+    @pytest.mark.asyncio
+    async def test_pages_follow_paper_order(self, service):
+        """Test that following next_offset returns the paper once, in order."""
+        session = await service.create_session("u1", "sprint", "ECAT", PAPER, time_minutes=10)
+
+        seen, offset = [], 0
+        while offset is not None:
+            page = await service.get_questions(session["id"], "u1", offset, limit=3)
+            seen += [(q["position"], q["id"]) for q in page["items"]]
+            offset = page["next_offset"]
+
+        assert seen == list(enumerate(PAPER))
+        assert page["total"] == 7
+        assert "created_by" not in page["items"][0] and "approval_status" not in page["items"][0]
+        assert "correct_answer" not in page["items"][0]
+
+    @pytest.mark.asyncio
+    async def test_summary_hides_paper_and_counts_down(self, service):
+        """Test the resumable summary of a session."""
+        session = await service.create_session("u1", "sre", "ECAT", PAPER, time_minutes=100, details={"exam_pattern": {}})
+
+        summary = service.summary(await service.get_session(session["id"], "u1"))
+
+        assert "question_ids" not in summary and summary["question_count"] == 7
+        assert 5990 < summary["remaining_seconds"] <= 6000
+        assert summary["exam_pattern"] == {} and summary["status"] == "active"
+
+    @pytest.mark.asyncio
+    async def test_sessions_are_private_and_unique(self, service):
+        """Test that repeat starts get distinct sessions only their owner can read."""
+        first = await service.create_session("u1", "sprint", "ECAT", PAPER, time_minutes=10)
+        second = await service.create_session("u1", "sprint", "ECAT", PAPER, time_minutes=10)
+
+        assert first["id"] != second["id"]
+        with pytest.raises(NotFoundError):
+            await service.get_questions(first["id"], "u2")
+
+    @pytest.mark.asyncio
+    async def test_ended_sessions_stop_serving(self, service, database):
+        """Test expired and submitted sessions, and out-of-range offsets."""
+        session = await service.create_session("u1", "sprint", "ECAT", PAPER, time_minutes=10)
+
+        with pytest.raises(ValidationError):
+            await service.get_questions(session["id"], "u1", offset=7)
+
+        claimed = await service.begin_grading(session["id"], "u1")
+        await service.complete(session["id"], claimed["grading_claim"], "r1")
+        with pytest.raises(ConflictError):
+            await service.complete(session["id"], claimed["grading_claim"], "r2")
+        with pytest.raises(ValidationError):
+            await service.get_questions(session["id"], "u1")
+
+        expired = await service.create_session("u1", "sprint", "ECAT", PAPER, time_minutes=10)
+        await database.update_document("exam_sessions", expired["id"], {"deadline": datetime.utcnow() - timedelta(seconds=1)})
+        with pytest.raises(ValidationError):
+            await service.get_questions(expired["id"], "u1")
+
+    @pytest.mark.asyncio
+    async def test_only_one_submit_grades_a_session(self, service):
+        """Test that a second submit is refused while the first holds the grading claim."""
+        session = await service.create_session("u1", "sprint", "ECAT", PAPER, time_minutes=10)
+
+        claimed = await service.begin_grading(session["id"], "u1")
+        with pytest.raises(ConflictError):
+            await service.begin_grading(session["id"], "u1")
+        with pytest.raises(NotFoundError):
+            await service.begin_grading(session["id"], "u2")
+
+        await service.release(session["id"], claimed["grading_claim"])
+        retried = await service.begin_grading(session["id"], "u1")
+        with pytest.raises(ConflictError):
+            await service.complete(session["id"], claimed["grading_claim"], "r1")
+        await service.complete(session["id"], retried["grading_claim"], "r1")
+        assert (await service.get_session(session["id"], "u1"))["result_id"] == "r1"
+
+    @pytest.mark.asyncio
+    async def test_late_submission_is_rejected(self, service, database):
+        """Test that a submit past the deadline's grace period expires the session."""
+        session = await service.create_session("u1", "sprint", "ECAT", PAPER, time_minutes=10)
+        await database.update_document("exam_sessions", session["id"], {"deadline": datetime.utcnow() - timedelta(seconds=10)})
+        await service.begin_grading(session["id"], "u1")  # within the grace period
+
+        late = await service.create_session("u1", "sprint", "ECAT", PAPER, time_minutes=10)
+        await database.update_document("exam_sessions", late["id"], {"deadline": datetime.utcnow() - timedelta(hours=1)})
+        with pytest.raises(ValidationError):
+            await service.begin_grading(late["id"], "u1")
+        assert (await database.get_document("exam_sessions", late["id"]))["status"] == "expired"
+
+    @pytest.mark.asyncio
+    async def test_stale_grading_claim_is_taken_over(self, service, database):
+        """Test that a session left grading by a dead worker can be graded again."""
+        session = await service.create_session("u1", "sprint", "ECAT", PAPER, time_minutes=10)
+        claimed = await service.begin_grading(session["id"], "u1")
+        await database.update_document(
+            "exam_sessions", session["id"], {"grading_started_at": datetime.utcnow() - timedelta(minutes=6)}
+        )
+
+        retried = await service.begin_grading(session["id"], "u1")
+
+        assert retried["grading_claim"] != claimed["grading_claim"]
+
+
+class TestExamSessionsOnSQLite:
+    """Test cases for sessions on a backend that returns stored timestamps tz-aware."""
+
+    @pytest.fixture
+    def service(self, tmp_path):
+        """Session service over SQLite, reading questions from the database."""
+        database = SQLiteDatabase(path=str(tmp_path / "sessions.db"), max_workers=2, cache_enabled=False)
+        asyncio.run(database.bulk_write([
+            {"type": "create", "collection": "questions", "document_id": f"q{n}", "data": question(n)} for n in range(12)
+        ]))
+        yield ExamSessionService(database, QuestionIndex(database))
+        database.close()
+
+    @pytest.mark.asyncio
+    async def test_session_round_trip(self, service):
+        """Test summary, paging and submit against aware stored deadlines."""
+        session = await service.create_session("u1", "sprint", "ECAT", PAPER, time_minutes=10)
+        stored = await service.get_session(session["id"], "u1")
+        assert stored["deadline"].tzinfo is not None
+
+        assert 590 < service.summary(stored)["remaining_seconds"] <= 600
+        assert (await service.get_questions(session["id"], "u1", limit=3))["next_offset"] == 3
+
+        claimed = await service.begin_grading(session["id"], "u1")
+        with pytest.raises(ConflictError):
+            await service.begin_grading(session["id"], "u1")
+        await service.complete(session["id"], claimed["grading_claim"], "r1")
+
+    @pytest.mark.asyncio
+    async def test_late_submission_is_rejected(self, service):
+        """Test the deadline check against an aware stored deadline."""
+        session = await service.create_session("u1", "sprint", "ECAT", PAPER, time_minutes=10)
+        await service.database.update_document("exam_sessions", session["id"], {"deadline": datetime.utcnow() - timedelta(hours=1)})
+
+        with pytest.raises(ValidationError):
+            await service.begin_grading(session["id"], "u1")
@@ -0,0 +1,92 @@
+"""
+Unit tests for server-side exam grading.
+"""
+
+import time
+import pytest
+from app.core.exceptions import ValidationError
+from app.core.memory_database import MemoryDatabase
+from app.services.answer_key_store import AnswerKeyStore
+from app.services.grading_service import GradingService
+
+SUBJECTS = ["biology", "chemistry", "physics", "english"]
+
+
+@pytest.fixture
+def database():
+    """Memory database with 200 questions whose answer is always 'B'."""
+    database = MemoryDatabase()
+    database.load("questions", {
+        f"q{n}": {"correct_answer": "B", "subject": SUBJECTS[n % 4], "topic": f"t{n % 2}", "question_text": "?"}
+        for n in range(200)
+    })
+    return database
+
+
+def submission(question_ids, answers, exam_type="MCAT"):
+    return {
+        "exam_id": "e1",
+        "exam_type": exam_type,
+        "question_ids": question_ids,
+        "answers": [{"question_id": q, "selected_answer": a, "time_taken": 1.0} for q, a in answers.items()]
+    }
+
+
+class TestScore:
+    """Test cases for the scoring pass."""
+
+    def test_counts_score_and_breakdowns(self):
+        """Test outcome codes, marking and per-subject/topic tallies."""
+        key = {
+            "a": {"correct_answer": "A", "subject": "physics", "topic": "optics"},
+            "b": {"correct_answer": "B", "subject": "physics", "topic": "waves"},
+            "c": {"correct_answer": "C", "subject": "english", "topic": "grammar"}
+        }
+        marking = {"correct": 4.0, "incorrect": -1.0, "unanswered": 0.0}
+
+        result = GradingService.score(["a", "b", "c", "gone"], {"a": "A", "b": "A"}, key, marking)
+
+        assert result["outcomes"] == "ciux"
+        assert (result["correct"], result["incorrect"], result["unanswered"], result["ungraded"]) == (1, 1, 1, 1)
+        assert (result["score"], result["max_score"], result["percentage"]) == (3.0, 12.0, 25.0)
+        assert result["by_subject"]["physics"]["score"] == 3.0 and result["by_subject"]["physics"]["total"] == 2
+        assert result["by_topic"]["physics"]["waves"]["incorrect"] == 1
+        assert result["by_topic"]["english"]["grammar"]["unanswered"] == 1
+
+
+class TestGradeSubmission:
+    """Test cases for grading and storing submissions."""
+
+    @pytest.mark.asyncio
+    async def test_full_paper_is_graded_and_stored(self, database):
+        """Test a 200-question paper end to end, with a CPU budget for the scoring pass."""
+        service = GradingService(database, AnswerKeyStore(database))
+        question_ids = [f"q{n}" for n in range(200)]
+        answers = {q: ("B" if n % 2 else "A") for n, q in enumerate(question_ids[:150])}
+
+        result = await service.grade_submission("u1", submission(question_ids, answers))
+
+        assert (result["correct"], result["incorrect"], result["unanswered"]) == (75, 75, 50)
+        assert result["percentage"] == 37.5 and result["time_taken"] == 150.0
+        stored = await database.get_document("exam_results", result["id"])
+        assert stored["outcomes"] == result["outcomes"] and len(stored["outcomes"]) == 200
+
+        key = await service.load_answer_key(question_ids)
+        started = time.perf_counter()
+        for _ in range(10):
+            GradingService.score(question_ids, answers, key, {"correct": 1.0, "incorrect": 0.0, "unanswered": 0.0})
+        assert (time.perf_counter() - started) / 10 < 0.005
+
+    @pytest.mark.asyncio
+    async def test_invalid_submissions_are_rejected(self, database):
+        """Test duplicate answers, answers off the paper and a missing paper."""
+        service = GradingService(database, AnswerKeyStore(database))
+        duplicate = submission(["q1"], {"q1": "B"})
+        duplicate["answers"] *= 2
+
+        with pytest.raises(ValidationError):
+            await service.grade_submission("u1", duplicate)
+        with pytest.raises(ValidationError):
+            await service.grade_submission("u1", submission(["q1"], {"q2": "B"}))
+        with pytest.raises(ValidationError):
+            await service.grade_submission("u1", submission(None, {"q1": "B"}))
@@ -187,7 +187,9 @@ class TestLimitsService:
     @pytest.mark.asyncio
     async def test_validate_feature_access_device_denied(self, limits_service):
         """Test feature access validation for denied device access."""
-        with patch.object(limits_service, '_get_device_count', return_value=0):
+        anonymous_user = {"id": "test_user_id", "tier": "anonymous", "usage_stats": {}}
+        with patch.object(limits_service, '_get_user_data', return_value=anonymous_user), \
+             patch.object(limits_service, '_get_device_count', return_value=0):
             is_allowed, validation_info = await limits_service.validate_feature_access(
                 "test_user_id", "anonymous", "device", "device"
             )
@@ -219,8 +221,18 @@ class TestLimitsService:
             success = await limits_service.reset_daily_limits("test_user_id")
 
             assert success is True
-            # Should try to update both users and anonymous_users collections
-            assert mock_update.call_count == 2
+            # A regular user is found in users; anonymous_users is not touched
+            mock_update.assert_called_once()
+            assert mock_update.call_args[0][0] == "users"
+
+    @pytest.mark.asyncio
+    async def test_reset_daily_limits_anonymous_user(self, limits_service):
+        """Test that the reset falls back to anonymous_users."""
+        with patch.object(limits_service.db, 'update_document', side_effect=[False, True]) as mock_update:
+            success = await limits_service.reset_daily_limits("anon_user")
+
+            assert success is True
+            assert [call[0][0] for call in mock_update.call_args_list] == ["users", "anonymous_users"]
 
     @pytest.mark.asyncio
     async def test_reset_daily_limits_failure(self, limits_service):
@@ -264,7 +276,8 @@ class TestLimitsService:
             result = await limits_service._get_user_data("test_user")
 
             assert result == expected_data
-            mock_get.assert_called_with("users", "test_user")
+            # Outside a request scope anonymous users are only read on a miss
+            mock_get.assert_called_once_with("users", "test_user", cached=True)
 
     @pytest.mark.asyncio
     async def test_get_user_data_anonymous_user(self, limits_service):
@@ -280,16 +293,16 @@ class TestLimitsService:
     @pytest.mark.asyncio
     async def test_get_device_count(self, limits_service):
         """Test getting device count for user."""
-        mock_devices = [{"id": "device1"}, {"id": "device2"}]
-        with patch.object(limits_service.db, 'query_collection', return_value=mock_devices):
+        with patch.object(limits_service.db, 'count', return_value=2) as mock_count:
             count = await limits_service._get_device_count("test_user")
 
             assert count == 2
+            mock_count.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_get_device_count_error(self, limits_service):
         """Test device count when database error occurs."""
-        with patch.object(limits_service.db, 'query_collection', side_effect=Exception("DB Error")):
+        with patch.object(limits_service.db, 'count', side_effect=Exception("DB Error")):
             count = await limits_service._get_device_count("test_user")
 
             assert count == 0
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""
+Unit tests for the in-memory database backend.
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from app.core.database import create_database
+from app.core.db_base import BaseDatabase
+from app.core.db_utils import Increment
+from app.core.exceptions import ValidationError
+from app.core.memory_database import MemoryDatabase
+
+
+@pytest.fixture
+def memory_db():
+    """Memory backend with an index on the question taxonomy fields."""
+    return MemoryDatabase(indexes={"questions": ["exam_type", "difficulty"]})
+
+
+@pytest.fixture
+def question_bank(memory_db):
+    """Ten questions across two exams with increasing creation times."""
+    start = datetime(2024, 1, 1)
+    memory_db.load("questions", {
+        f"q{i}": {
+            "exam_type": "ECAT" if i % 2 else "MCAT",
+            "difficulty": ["easy", "medium", "hard"][i % 3],
+            "score": i,
+            "tags": ["algebra"] if i < 5 else ["biology"],
+            "created_at": start + timedelta(days=i)
+        }
+        for i in range(10)
+    })
+    return memory_db
+
+
+class TestMemoryDatabaseDocuments:
+    """Test cases for document reads and writes."""
+
+    @pytest.mark.asyncio
+    async def test_create_get_round_trip(self, memory_db):
+        """Test that stored documents come back with their ID and are copies."""
+        data = {"name": "Ali", "profile": {"city": "Lahore"}}
+        document_id = await memory_db.create_document("users", data)
+        data["profile"]["city"] = "Karachi"
+
+        document = await memory_db.get_document("users", document_id)
+        document["name"] = "changed"
+
+        assert (await memory_db.get_document("users", document_id)) == {
+            "id": document_id, "name": "Ali", "profile": {"city": "Lahore"}
+        }
+
+    @pytest.mark.asyncio
+    async def test_update_dotted_paths_and_increments(self, memory_db):
+        """Test nested field updates and increment transforms."""
+        await memory_db.create_document("questions", {"stats": {"total": 1}}, document_id="q1")
+        assert await memory_db.update_document("questions", "q1", {"stats.total": Increment(2), "stats.last": "x"})
+
+        assert (await memory_db.get_document("questions", "q1"))["stats"] == {"total": 3, "last": "x"}
+
+    @pytest.mark.asyncio
+    async def test_update_missing_document_fails(self, memory_db):
+        """Test that updating a missing document reports failure."""
+        assert await memory_db.update_document("questions", "missing", {"a": 1}) is False
+
+    @pytest.mark.asyncio
+    async def test_bulk_write_reports_per_operation(self, memory_db):
+        """Test ordered bulk writes with an isolated failure."""
+        result = await memory_db.bulk_write([
+            {"type": "create", "collection": "users", "document_id": "u1", "data": {"n": 1}},
+            {"type": "update", "collection": "users", "document_id": "u1", "data": {"n": 2}},
+            {"type": "update", "collection": "users", "document_id": "ghost", "data": {"n": 1}},
+            {"type": "create", "collection": "users", "data": {"n": 3}},
+        ])
+
+        assert result["written"] == 3
+        assert result["results"][2]["success"] is False
+        assert result["results"][3]["document_id"]
+        assert (await memory_db.get_document("users", "u1"))["n"] == 2
+
+
+class TestMemoryDatabaseQueries:
+    """Test cases for filtering, ordering, paging and aggregation."""
+
+    @pytest.mark.asyncio
+    async def test_equality_and_range_filters(self, question_bank):
+        """Test combining an indexed equality filter with a range filter."""
+        results = await question_bank.query_collection("questions", filters=[
+            {"field": "exam_type", "operator": "==", "value": "ECAT"},
+            {"field": "score", "operator": ">=", "value": 5}
+        ], order_by="score")
+
+        assert [q["id"] for q in results] == ["q5", "q7", "q9"]
+
+    @pytest.mark.asyncio
+    async def test_in_and_array_contains(self, question_bank):
+        """Test in and array-contains filters."""
+        results = await question_bank.query_collection("questions", filters=[
+            {"field": "difficulty", "operator": "in", "value": ["easy", "hard"]},
+            {"field": "tags", "operator": "array-contains", "value": "algebra"}
+        ])
+
+        assert sorted(q["id"] for q in results) == ["q0", "q2", "q3"]
+
+    @pytest.mark.asyncio
+    async def test_order_limit_offset_and_projection(self, question_bank):
+        """Test descending order with limit, offset and field projection."""
+        results = await question_bank.query_collection(
+            "questions", order_by="-created_at", limit=2, offset=1, fields=["score"]
+        )
+
+        assert results == [{"score": 8, "id": "q8"}, {"score": 7, "id": "q7"}]
+
+    @pytest.mark.asyncio
+    async def test_index_follows_updates(self, question_bank):
+        """Test that indexed lookups see updated and deleted documents."""
+        await question_bank.update_document("questions", "q0", {"exam_type": "ECAT"})
+        await question_bank.delete_document("questions", "q1")
+
+        results = await question_bank.query_collection(
+            "questions", filters=[{"field": "exam_type", "operator": "==", "value": "ECAT"}]
+        )
+
+        assert sorted(q["id"] for q in results) == ["q0", "q3", "q5", "q7", "q9"]
+
+    @pytest.mark.asyncio
+    async def test_query_page_walks_all_documents(self, question_bank):
+        """Test that following page tokens visits every match exactly once."""
+        seen, token = [], None
+        while True:
+            page = await question_bank.query_page("questions", order_by="-created_at", page_size=4, page_token=token)
+            seen.extend(q["id"] for q in page["items"])
+            token = page["next_page_token"]
+            if not token:
+                break
+
+        assert seen == [f"q{i}" for i in range(9, -1, -1)]
+
+    @pytest.mark.asyncio
+    async def test_query_iter(self, question_bank):
+        """Test streaming a filtered query in small batches."""
+        ids = [q["id"] async for q in question_bank.query_iter(
+            "questions", filters=[{"field": "exam_type", "operator": "==", "value": "MCAT"}], batch_size=2
+        )]
+
+        assert ids == ["q0", "q2", "q4", "q6", "q8"]
+
+    @pytest.mark.asyncio
+    async def test_aggregations(self, question_bank):
+        """Test count, sum and avg over a filtered query."""
+        result = await question_bank.aggregate("questions", [
+            {"type": "count"}, {"type": "sum", "field": "score"}, {"type": "avg", "field": "score"}
+        ], filters=[{"field": "exam_type", "operator": "==", "value": "ECAT"}])
+
+        assert result == {"count": 5, "sum_score": 25, "avg_score": 5}
+
+    @pytest.mark.asyncio
+    async def test_unknown_operator(self, question_bank):
+        """Test that unsupported operators are rejected."""
+        with pytest.raises(ValidationError):
+            await question_bank.query_collection("questions", filters=[{"field": "score", "operator": "~", "value": 1}])
+
+
+class TestDatabaseFactory:
+    """Test cases for backend selection."""
+
+    def test_memory_backend(self):
+        """Test that the memory backend can be selected by name."""
+        assert isinstance(create_database("memory"), MemoryDatabase)
+
+    def test_unknown_backend(self):
+        """Test that an unknown backend name is rejected."""
+        with pytest.raises(ValueError):
+            create_database("mongodb")
+
+    def test_incomplete_backend_cannot_be_created(self):
+        """Test that a backend missing a primitive fails at construction, not on first use."""
+        class PartialDatabase(BaseDatabase):
+            async def _get_uncached(self, collection, document_id, fields=None):
+                return None
+
+        with pytest.raises(TypeError):
+            PartialDatabase()
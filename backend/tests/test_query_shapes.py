@@ -0,0 +1,158 @@
+"""
+Unit tests for the query-shape registry and index manifest generation.
+"""
+
+import itertools
+import pytest
+from app.core.memory_database import MemoryDatabase
+from app.core.query_shapes import QueryShapeRegistry, build_manifest, query_shapes, shape_key
+
+
+def eq(*fields):
+    """Equality filters on ``fields``."""
+    return [{"field": field, "operator": "==", "value": 1} for field in fields]
+
+
+def shapes_for(*queries):
+    """Serialized shapes for ``(collection, filters, order_by)`` queries."""
+    registry = QueryShapeRegistry()
+    for collection, filters, order_by in queries:
+        registry.record(collection, filters, order_by)
+    return registry.shapes()
+
+
+def index_fields(index):
+    return [(field["fieldPath"], field.get("order") or field.get("arrayConfig")) for field in index["fields"]]
+
+
+class TestShapeKey:
+    """Test cases for query normalization."""
+
+    def test_ignores_values_and_filter_order(self):
+        """Test that queries differing only in values or filter order share a shape."""
+        first = shape_key("questions", [
+            {"field": "subject", "operator": "==", "value": "physics"},
+            {"field": "exam_type", "operator": "in", "value": ["ECAT"]}
+        ], "-created_at")
+        second = shape_key("questions", [
+            {"field": "exam_type", "operator": "==", "value": "MCAT"},
+            {"field": "subject", "operator": "==", "value": "biology"}
+        ], "-created_at")
+
+        assert first == second
+
+    def test_keeps_inequality_operators(self):
+        """Test that inequality filters are kept apart from equality filters."""
+        key = shape_key("questions", [{"field": "score", "operator": ">=", "value": 3}])
+
+        assert key == ("questions", (), (), (("score", ">="),), None)
+
+
+class TestQueryShapeRegistry:
+    """Test cases for recording and persisting shapes."""
+
+    @pytest.mark.asyncio
+    async def test_backend_queries_are_recorded(self):
+        """Test that instrumented queries, pages and counts record their shape."""
+        query_shapes.reset()
+        database = MemoryDatabase()
+        database.load("questions", {"q1": {"exam_type": "ECAT", "created_at": 1}})
+
+        await database.query_collection("questions", filters=eq("exam_type"), order_by="-created_at")
+        await database.query_page("questions", filters=eq("exam_type"), order_by="-created_at")
+        await database.count("questions", filters=eq("exam_type"))
+
+        shapes = {(shape["order_by"], tuple(shape["operations"])): shape["count"] for shape in query_shapes.shapes()}
+        assert shapes == {("-created_at", ("page", "query")): 2, (None, ("aggregate",)): 1}
+
+    def test_save_and_load_merge_counts(self, tmp_path):
+        """Test that saved shapes are merged into another registry."""
+        registry = QueryShapeRegistry()
+        registry.record("questions", eq("exam_type"), "-created_at")
+        path = str(tmp_path / "shapes.json")
+        registry.save(path)
+
+        other = QueryShapeRegistry()
+        other.record("questions", eq("exam_type"), "-created_at")
+        other.load(path)
+
+        assert [shape["count"] for shape in other.shapes()] == [2]
+
+
+class TestBuildManifest:
+    """Test cases for deriving composite indexes and warnings."""
+
+    def test_single_field_and_equality_only_need_no_index(self):
+        """Test that single-field and equality-only queries use automatic indexes."""
+        result = build_manifest(shapes_for(
+            ("questions", eq("exam_type"), None),
+            ("questions", eq("exam_type"), "exam_type"),
+            ("questions", eq("exam_type", "subject"), None)
+        ))
+
+        assert result["manifest"]["indexes"] == []
+
+    def test_equality_with_order_needs_composite(self):
+        """Test that equality filters plus an ordering produce one composite index."""
+        result = build_manifest(shapes_for(("questions", eq("subject", "exam_type"), "-created_at")))
+
+        [index] = result["manifest"]["indexes"]
+        assert index["collectionGroup"] == "questions"
+        assert index_fields(index) == [
+            ("exam_type", "ASCENDING"), ("subject", "ASCENDING"), ("created_at", "DESCENDING")
+        ]
+
+    def test_inequality_field_precedes_order_field(self):
+        """Test index field order for a range filter ordered by another field."""
+        result = build_manifest(shapes_for((
+            "questions",
+            eq("exam_type") + [{"field": "score", "operator": ">", "value": 1}],
+            "-created_at"
+        )))
+
+        [index] = result["manifest"]["indexes"]
+        assert index_fields(index) == [
+            ("exam_type", "ASCENDING"), ("score", "ASCENDING"), ("created_at", "DESCENDING")
+        ]
+
+    def test_optional_filters_use_index_merging(self):
+        """Test that an exploding family gets one index per equality field."""
+        optional = ["subject", "topic", "difficulty"]
+        queries = [
+            ("questions", eq("exam_type", *combo), "-created_at")
+            for r in range(len(optional) + 1)
+            for combo in itertools.combinations(optional, r)
+        ]
+        result = build_manifest(shapes_for(*queries), threshold=4)
+
+        indexes = result["manifest"]["indexes"]
+        assert len(indexes) == 4
+        assert all(index_fields(index)[1] == ("created_at", "DESCENDING") for index in indexes)
+        assert any("8 equality-filter combinations" in warning["message"] for warning in result["warnings"])
+
+    def test_small_family_keeps_exact_indexes(self):
+        """Test that families under the threshold get one index per combination."""
+        result = build_manifest(shapes_for(
+            ("questions", eq("exam_type"), "-created_at"),
+            ("questions", eq("exam_type", "subject"), "-created_at")
+        ), threshold=4)
+
+        assert len(result["manifest"]["indexes"]) == 2
+        assert result["warnings"] == []
+
+    def test_flags_rejected_and_scanning_shapes(self):
+        """Test warnings for several array filters, != and unindexed local filters."""
+        result = build_manifest(shapes_for(
+            ("questions", [
+                {"field": "tags", "operator": "array-contains", "value": "a"},
+                {"field": "topics", "operator": "array-contains-any", "value": ["b"]}
+            ], None),
+            ("questions", eq("exam_type") + [{"field": "status", "operator": "!=", "value": "x"}], None),
+            ("payments", eq("provider_id"), None)
+        ))
+
+        levels = {(warning["level"], warning["shape"].split(":")[0]) for warning in result["warnings"]}
+        messages = " ".join(warning["message"] for warning in result["warnings"])
+        assert ("error", "questions") in levels
+        assert "!= and not-in" in messages
+        assert "memory backend scans" in messages and "SQLite backend scans" in messages
@@ -0,0 +1,153 @@
+"""
+Unit tests for the in-memory question bank index.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+import json
+import pytest
+from app.core.memory_database import MemoryDatabase
+from app.services.question_index import QuestionIndex
+from app.services.question_service import QuestionService
+
+BASE_TIME = datetime(2024, 1, 1)
+
+
+def question(n, **overrides):
+    """Approved question ``n``; higher ``n`` is newer."""
+    return {
+        "question_text": f"Question {n}?",
+        "options": [],
+        "correct_answer": "A",
+        "exam_type": "ECAT",
+        "subject": "physics" if n % 2 else "chemistry",
+        "topic": "mechanics",
+        "difficulty": ["easy", "medium", "hard"][n % 3],
+        "arde_probability": ["low", "medium", "high"][n % 3],
+        "historical_frequency": 0,
+        "created_at": BASE_TIME + timedelta(minutes=n),
+        "updated_at": BASE_TIME + timedelta(minutes=n),
+        "created_by": "admin",
+        "is_active": True,
+        "approval_status": "approved",
+        "performance_stats": {"total_attempts": 4, "correct_attempts": 1, "timed_attempts": 4, "total_time": 40.0},
+        **overrides
+    }
+
+
+@pytest.fixture
+def database():
+    """Memory database with ten approved questions and one pending."""
+    database = MemoryDatabase()
+    database.load("questions", {f"q{n}": question(n) for n in range(10)})
+    database.load("questions", {"pending": question(20, approval_status="pending")})
+    return database
+
+
+@pytest.fixture
+def index(database):
+    """Index built over ``database``."""
+    index = QuestionIndex(database)
+    asyncio.run(index.build())
+    return index
+
+
+class TestQuestionIndex:
+    """Test cases for building, querying and refreshing the index."""
+
+    def test_build_keeps_servable_questions(self, index):
+        """Test that only approved, active questions are indexed, without internal fields."""
+        assert len(index) == 10
+        [newest] = index.query({"exam_type": "ECAT"}, 1)
+        assert newest["id"] == "q9"
+        assert "created_by" not in newest and "approval_status" not in newest
+
+    def test_query_filters_and_orders(self, index):
+        """Test equality and list criteria, newest first, with a limit."""
+        physics = index.query({"exam_type": "ECAT", "subject": "physics", "topic": None})
+        high_or_low = index.query({"exam_type": "ECAT", "arde_probability": ["high", "low"]}, 3)
+
+        assert [q["id"] for q in physics] == ["q9", "q7", "q5", "q3", "q1"]
+        assert [q["id"] for q in high_or_low] == ["q9", "q8", "q6"]
+        assert index.count({"exam_type": "MCAT"}) == 0
+
+    def test_results_are_copies(self, index):
+        """Test that modifying a result does not change the index."""
+        [first] = index.query({"exam_type": "ECAT"}, 1)
+        first["performance_stats"]["total_attempts"] = 100
+        first.pop("subject")
+
+        [again] = index.query({"exam_type": "ECAT"}, 1)
+        assert again["performance_stats"]["total_attempts"] == 4
+        assert again["subject"] == "physics"
+
+    def test_pages_cover_results_once(self, index):
+        """Test that following page tokens visits every match exactly once."""
+        seen, token = [], None
+        while True:
+            page = index.page({"exam_type": "ECAT"}, page_size=4, page_token=token)
+            seen += [q["id"] for q in page["items"]]
+            token = page["next_page_token"]
+            if token is None:
+                break
+
+        assert seen == [f"q{n}" for n in range(9, -1, -1)]
+
+    @pytest.mark.asyncio
+    async def test_refresh_applies_changes_since_watermark(self, database):
+        """Test that approvals, retirements and edits are picked up by a refresh."""
+        index = QuestionIndex(database)
+        await index.build()
+
+        later = BASE_TIME + timedelta(hours=1)
+        await database.update_document("questions", "pending", {"approval_status": "approved", "updated_at": later})
+        await database.update_document("questions", "q9", {"is_active": False, "updated_at": later})
+        await database.update_document("questions", "q0", {"topic": "optics", "updated_at": later})
+        changed = await index.refresh()
+
+        assert changed == 3
+        assert [q["id"] for q in index.query({"exam_type": "ECAT"}, 2)] == ["pending", "q8"]
+        assert [q["id"] for q in index.query({"exam_type": "ECAT", "topic": "optics"})] == ["q0"]
+        assert index.query({"exam_type": "ECAT", "topic": "mechanics"}, 1)[0]["id"] == "pending"
+
+    @pytest.mark.asyncio
+    async def test_stat_roll_ups_wait_for_rebuild(self, database, index):
+        """Test that a stats-only write is skipped by the poll and picked up by a rebuild."""
+        before = index.versions(["q0"])
+        await database.update_document("questions", "q0", {
+            "performance_stats.total_attempts": 5, "stats_updated_at": BASE_TIME + timedelta(hours=1)
+        })
+
+        await index.refresh()
+        assert index.versions(["q0"]) == before
+
+        await index.build()
+        assert index.versions(["q0"]) != before
+        assert index.get_many(["q0"])["q0"]["performance_stats"]["total_attempts"] == 5
+
+
+class TestQuestionServiceWithIndex:
+    """Test cases for serving practice and exam selections from the index."""
+
+    @pytest.mark.asyncio
+    async def test_practice_and_exam_use_index(self, index):
+        """Test that the service answers from a ready index with derived stats."""
+        service = QuestionService(index=index)
+
+        practice = json.loads((await service.get_practice_questions_json("ECAT", subject="chemistry", limit=2))["body"])
+        exam = await service.get_questions_for_exam("ECAT", question_count=6)
+
+        assert [q["id"] for q in practice] == ["q8", "q6"]
+        assert practice[0]["performance_stats"]["average_time"] == 10.0
+        assert len(exam) == 6
+        assert sorted(q["arde_probability"] for q in exam).count("high") == 3
+
+    @pytest.mark.asyncio
+    async def test_stats_are_derived_once(self, index):
+        """Test that repeated reads do not compound the derived averages."""
+        # Separate services, so the second encodes from the index rather than its JSON cache
+        await QuestionService(index=index).get_practice_questions_json("ECAT", limit=1)
+        [question] = json.loads((await QuestionService(index=index).get_practice_questions_json("ECAT", limit=1))["body"])
+
+        assert question["performance_stats"]["average_time"] == 10.0
+        assert question["performance_stats"]["difficulty_score"] == 25.0
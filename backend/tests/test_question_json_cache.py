@@ -0,0 +1,140 @@
+"""
+Unit tests for pre-encoded practice question JSON.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+import json
+import pytest
+from app.core.memory_database import MemoryDatabase
+from app.models.question import QuestionDeliveryResponse
+from app.services import question_json_cache
+from app.services import question_service as question_service_module
+from app.services.question_index import QuestionIndex
+from app.services.question_service import QuestionService
+
+BASE_TIME = datetime(2024, 1, 1, 12, 30, 0, 250000)
+
+
+def question(n, **overrides):
+    return {
+        "question_text": f"Question {n} – ünïcode?",
+        "options": [
+            {"option_id": "A", "text": "one", "is_correct": True},
+            {"option_id": "B", "text": "two", "is_correct": False}
+        ],
+        "correct_answer": "A",
+        "exam_type": "ECAT",
+        "subject": "physics" if n % 2 else "chemistry",
+        "topic": "mechanics",
+        "difficulty": "easy",
+        "arde_probability": "high",
+        "historical_frequency": n,
+        "created_at": BASE_TIME + timedelta(minutes=n),
+        "updated_at": BASE_TIME + timedelta(minutes=n),
+        "is_active": True,
+        "approval_status": "approved",
+        "created_by": "admin",
+        "performance_stats": {"total_attempts": 3, "correct_attempts": 1, "timed_attempts": 3, "total_time": 10.0},
+        **overrides
+    }
+
+
+@pytest.fixture
+def database():
+    """Memory database with six approved questions."""
+    database = MemoryDatabase()
+    database.load("questions", {f"q{n}": question(n) for n in range(6)})
+    return database
+
+
+@pytest.fixture
+def service(database, monkeypatch):
+    """Service over a built index of ``database``."""
+    monkeypatch.setattr(question_service_module, "db", database)
+    index = QuestionIndex(database)
+    asyncio.run(index.build())
+    return QuestionService(index=index)
+
+
+def pydantic_json(items):
+    return [json.loads(QuestionDeliveryResponse(**item).model_dump_json()) for item in items]
+
+
+class TestEncoding:
+    """Test cases for the encoders."""
+
+    @pytest.mark.parametrize("encoder", ["orjson", "json"])
+    def test_matches_pydantic_output(self, encoder, monkeypatch):
+        """Test that both encoders produce the model's JSON, datetimes included."""
+        if encoder == "json":
+            monkeypatch.setattr(question_json_cache, "orjson", None)
+        items = [question(1), question(2, created_at=datetime(2024, 5, 1, tzinfo=timezone.utc), performance_stats=None)]
+        for item in items:
+            item["id"] = f"q{item['historical_frequency']}"
+        QuestionService.prepare_for_delivery(items)
+
+        body = question_json_cache.join_array(question_json_cache.encode_question(item) for item in items)
+
+        expected = pydantic_json([{**item, "performance_stats": item["performance_stats"] or {}} for item in items])
+        assert json.loads(body) == expected
+        assert json.loads(body)[1]["created_at"] == "2024-05-01T00:00:00Z"
+
+
+class TestPracticeJson:
+    """Test cases for serving practice pages from the cache."""
+
+    @pytest.mark.asyncio
+    async def test_pages_match_the_model_path(self, service):
+        """Test that encoded pages equal the pydantic response, page by page."""
+        token, seen = None, []
+        while True:
+            encoded = await service.get_practice_questions_json("ECAT", limit=4, page_token=token)
+            page = await service.get_practice_questions_page("ECAT", limit=4, page_token=token)
+
+            assert json.loads(encoded["body"]) == pydantic_json(page["items"])
+            assert encoded["next_page_token"] == page["next_page_token"]
+            seen += [item["id"] for item in page["items"]]
+            token = page["next_page_token"]
+            if token is None:
+                break
+
+        assert seen == [f"q{n}" for n in range(5, -1, -1)]
+        assert b"correct_answer" not in encoded["body"] and b"is_correct" not in encoded["body"]
+
+    @pytest.mark.asyncio
+    async def test_repeat_requests_are_served_from_cache(self, service):
+        """Test result and fragment hits for repeated and overlapping requests."""
+        first = await service.get_practice_questions_json("ECAT", limit=3)
+        again = await service.get_practice_questions_json("ECAT", limit=3)
+        await service.get_practice_questions_json("ECAT", subject="physics")
+        stats = service.json_cache.stats()
+
+        assert again is first
+        assert stats["result_hits"] == 1 and stats["fragments"] == 4
+        assert stats["fragment_hits"] == 2  # q5 and q3 were encoded for the first page
+
+    @pytest.mark.asyncio
+    async def test_updated_question_is_re_encoded(self, service, database):
+        """Test that a changed updated_at invalidates the page and that question only."""
+        before = await service.get_practice_questions_json("ECAT", limit=3)
+        await service.index.refresh()
+        assert await service.get_practice_questions_json("ECAT", limit=3) is before
+
+        await database.update_document("questions", "q4", {"question_text": "Edited?", "updated_at": BASE_TIME + timedelta(days=1)})
+        await service.index.refresh()
+        after = json.loads((await service.get_practice_questions_json("ECAT", limit=3))["body"])
+
+        assert [item["question_text"] for item in after][1] == "Edited?"
+        assert service.json_cache.stats()["fragment_hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_database_fallback(self, database, monkeypatch):
+        """Test that an unready index still serves the same JSON, uncached."""
+        monkeypatch.setattr(question_service_module, "db", database)
+        service = QuestionService(index=QuestionIndex(database))
+
+        encoded = await service.get_practice_questions_json("ECAT", limit=2)
+
+        assert [item["id"] for item in json.loads(encoded["body"])] == ["q5", "q4"]
+        assert len(service.json_cache) == 0
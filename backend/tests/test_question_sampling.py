@@ -0,0 +1,145 @@
+"""
+Unit tests for random exam question sampling.
+"""
+
+import asyncio
+from collections import Counter
+import random
+import pytest
+from app.core.memory_database import MemoryDatabase
+from app.services import question_service as question_service_module
+from app.services.question_index import QuestionIndex
+from app.services.question_service import QuestionService
+
+
+def question(n, **overrides):
+    """Approved ECAT question ``n`` with a random key spread over [0, 1)."""
+    return {
+        "question_text": f"Question {n}?",
+        "options": [],
+        "correct_answer": "A",
+        "exam_type": "ECAT",
+        "subject": "physics",
+        "topic": "mechanics",
+        "difficulty": "easy",
+        "arde_probability": "high" if n % 2 else "low",
+        "historical_frequency": 0,
+        "is_active": True,
+        "approval_status": "approved",
+        "random_key": (n + 0.5) / 40,
+        **overrides
+    }
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """Memory database with forty approved questions, used by the service."""
+    database = MemoryDatabase()
+    database.load("questions", {f"q{n}": question(n) for n in range(40)})
+    monkeypatch.setattr(question_service_module, "db", database)
+    return database
+
+
+@pytest.fixture
+def index(database):
+    """Index built over ``database``."""
+    index = QuestionIndex(database)
+    asyncio.run(index.build())
+    return index
+
+
+class TestIndexSampling:
+    """Test cases for sampling from the question index."""
+
+    def test_sample_is_distinct_and_matching(self, index):
+        """Test that a sample has no repeats and honours the criteria."""
+        sample = index.sample({"exam_type": "ECAT", "arde_probability": "high"}, 10, rng=random.Random(1))
+
+        assert len({q["id"] for q in sample}) == 10
+        assert all(q["arde_probability"] == "high" for q in sample)
+
+    def test_sample_is_uniform(self, index):
+        """Test that every matching question is drawn about equally often."""
+        rng = random.Random(7)
+        counts = Counter(
+            q["id"] for _ in range(4000) for q in index.sample({"exam_type": "ECAT"}, 5, rng=rng)
+        )
+
+        # 4000 * 5 / 40 = 500 expected draws per question
+        assert len(counts) == 40
+        assert min(counts.values()) > 400 and max(counts.values()) < 600
+
+    def test_selective_criteria_fall_back_to_full_pass(self, index):
+        """Test that rare matches are still all found."""
+        sample = index.sample({"exam_type": "ECAT", "arde_probability": ["high"], "subject": "physics"}, 30)
+
+        assert len(sample) == 20
+
+    def test_small_pool_returns_everything(self, index):
+        """Test that asking for more than exist returns every match once."""
+        assert len(index.sample({"exam_type": "ECAT"}, 100)) == 40
+        assert index.sample({"exam_type": "MCAT"}, 5) == []
+
+
+class TestServiceSampling:
+    """Test cases for exam papers drawn by the question service."""
+
+    @pytest.mark.asyncio
+    async def test_database_probes_without_index(self, database):
+        """Test random_key probing when the index is not ready."""
+        service = QuestionService(index=QuestionIndex(database))
+        random.seed(3)
+
+        exam = await service.get_questions_for_exam("ECAT", question_count=10)
+
+        assert len({q["id"] for q in exam}) == 10
+        assert Counter(q["arde_probability"] for q in exam) == {"high": 5, "low": 5}
+        assert all("random_key" not in q for q in exam)
+
+    @pytest.mark.asyncio
+    async def test_sampling_writes_nothing(self, database):
+        """Test that drawing a paper does not re-key (write to) the questions it picks."""
+        service = QuestionService(index=QuestionIndex(database))
+        before = {q["id"]: q["random_key"] for q in await database.query_collection("questions", fields=["random_key"])}
+        random.seed(5)
+
+        await service.sample_questions({"exam_type": "ECAT"}, 3)
+
+        after = {q["id"]: q["random_key"] for q in await database.query_collection("questions", fields=["random_key"])}
+        assert after == before
+
+    @pytest.mark.asyncio
+    async def test_probe_wraps_around(self, database):
+        """Test that a probe past the largest key returns the smallest one."""
+        service = QuestionService(index=QuestionIndex(database))
+
+        probed = await service._probe([{"field": "exam_type", "operator": "==", "value": "ECAT"}], 0.999)
+
+        assert probed["id"] == "q0"
+
+        probed = await service._probe([{"field": "exam_type", "operator": "==", "value": "ECAT"}], 0.001, descending=True)
+
+        assert probed["id"] == "q39"
+
+    @pytest.mark.asyncio
+    async def test_papers_differ_between_students(self, index):
+        """Test that two papers from the index are not the same selection."""
+        service = QuestionService(index=index)
+
+        first = await service.get_questions_for_exam("ECAT", question_count=10, arde_priority=False)
+        second = await service.get_questions_for_exam("ECAT", question_count=10, arde_priority=False)
+
+        assert {q["id"] for q in first} != {q["id"] for q in second}
+
+    @pytest.mark.asyncio
+    async def test_assign_missing_random_keys(self, database):
+        """Test that only questions without a key get one."""
+        database.load("questions", {"legacy": question(99, random_key=None)})
+        service = QuestionService(index=QuestionIndex(database))
+
+        assert await service.assign_missing_random_keys() == 1
+        assert isinstance((await database.get_document("questions", "legacy"))["random_key"], float)
+        assert (await database.get_document("questions", "q0"))["random_key"] == 0.5 / 40
+
+        assert await service.assign_missing_random_keys(redraw=True) == 41
+        assert (await database.get_document("questions", "q0"))["random_key"] != 0.5 / 40
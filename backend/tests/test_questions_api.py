@@ -0,0 +1,139 @@
+"""
+Unit tests for the question endpoints' answer handling.
+"""
+
+import asyncio
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from app.core.exceptions import DatabaseUnavailableError
+from app.core.memory_database import MemoryDatabase
+from app.core.security import create_access_token
+from app.core.sharded_counter import ShardedCounter
+from app.core.write_behind import WriteBehindBuffer
+from app.main import app
+from app.api.v1.endpoints import questions as questions_endpoints
+from app.services import question_service as question_service_module
+from app.services.answer_key_store import AnswerKeyStore
+from app.services.attempt_ingestion import AttemptQueue
+from app.services.exam_session_service import exam_session_service
+from app.services.question_service import question_service
+
+
+@pytest.fixture
+def database():
+    """Memory database with one approved question."""
+    database = MemoryDatabase()
+    database.load("questions", {"q1": {
+        "question_text": "Question 1?",
+        "options": [
+            {"option_id": "A", "text": "One", "is_correct": True},
+            {"option_id": "B", "text": "Two", "is_correct": False}
+        ],
+        "correct_answer": "A",
+        "exam_type": "ECAT",
+        "subject": "physics",
+        "topic": "mechanics",
+        "difficulty": "easy",
+        "arde_probability": "high",
+        "historical_frequency": 0,
+        "created_at": datetime(2024, 1, 1),
+        "is_active": True,
+        "approval_status": "approved"
+    }})
+    return database
+
+
+@pytest.fixture
+def client(database, monkeypatch):
+    """Client signed in as a free user, with the question and session services on ``database``."""
+    counter = ShardedCounter(
+        "questions", "performance_stats", ["total_attempts", "correct_attempts", "timed_attempts", "total_time"],
+        num_shards=2, database=database, buffer=WriteBehindBuffer(database)
+    )
+    monkeypatch.setattr(question_service_module, "db", database)
+    monkeypatch.setattr(question_service_module, "attempt_queue", AttemptQueue(database, counter))
+    monkeypatch.setattr(question_service, "answer_keys", AnswerKeyStore(database))
+    monkeypatch.setattr(exam_session_service, "database", database)
+
+    async def current_user():
+        return {"id": "u1", "tier": "free"}
+    app.dependency_overrides[questions_endpoints.get_current_user_dependency] = current_user
+    client = TestClient(app, base_url="http://localhost")
+    client.headers["Authorization"] = f"Bearer {create_access_token({'sub': 'u1'})}"
+    yield client
+    app.dependency_overrides.pop(questions_endpoints.get_current_user_dependency)
+
+
+class TestQuestionEndpoints:
+    """Test cases for keeping answers server-side."""
+
+    def test_single_question_has_no_answer_fields(self, client):
+        """Test that fetching one question does not reveal its answer."""
+        response = client.get("/api/v1/questions/q1")
+
+        assert response.status_code == 200
+        question = response.json()
+        assert question["id"] == "q1"
+        assert "correct_answer" not in question
+        assert all(set(option) == {"option_id", "text"} for option in question["options"])
+
+    def test_single_question_reads_no_stat_shards(self, client, database):
+        """Test that a question read shows rolled-up stats without summing the shards."""
+        client.post("/api/v1/questions/attempt", params={
+            "question_id": "q1", "time_taken": 3.0, "selected_answer": "A"
+        })
+        asyncio.run(question_service_module.attempt_queue.counter.write_buffer.flush())
+        assert asyncio.run(question_service_module.attempt_queue.counter.totals(["q1"]))["q1"]["total_attempts"] == 1
+
+        response = client.get("/api/v1/questions/q1")
+
+        assert response.json()["performance_stats"] == {}
+
+    def test_attempt_is_graded_server_side(self, client):
+        """Test that a selected answer is checked and the answer returned."""
+        response = client.post("/api/v1/questions/attempt", params={
+            "question_id": "q1", "time_taken": 3.0, "selected_answer": "B"
+        })
+
+        assert response.status_code == 200
+        assert response.json() == {"success": True, "is_correct": False, "correct_answer": "A"}
+
+    def test_client_graded_attempt_is_deprecated_and_unverified(self, client, database):
+        """Test that the old is_correct shape still works but reveals nothing and skips stats."""
+        response = client.post("/api/v1/questions/attempt", params={
+            "question_id": "q1", "time_taken": 3.0, "is_correct": True
+        })
+
+        assert response.status_code == 200
+        assert response.json() == {"success": True}
+        assert response.headers["Deprecation"] == "true"
+        [attempt] = asyncio.run(database.query_collection("question_attempts"))
+        assert attempt["verified"] is False
+        assert asyncio.run(question_service_module.attempt_queue.counter.totals(["q1"])) == {}
+
+    def test_exam_questions_are_not_graded_during_the_exam(self, client):
+        """Test that practice grading is refused for questions on the user's exam in progress."""
+        asyncio.run(exam_session_service.create_session("u1", "sprint", "ECAT", ["q1"], time_minutes=10))
+
+        single = client.post("/api/v1/questions/attempt", params={
+            "question_id": "q1", "time_taken": 3.0, "selected_answer": "A"
+        })
+        batch = client.post("/api/v1/questions/attempts/batch", json={
+            "idempotency_key": "session-0001",
+            "attempts": [{"question_id": "q1", "selected_answer": "A", "time_taken": 3.0}]
+        })
+
+        assert single.status_code == 409 and "correct_answer" not in single.json()
+        assert batch.status_code == 409
+
+    def test_database_outage_is_a_503(self, client, database, monkeypatch):
+        """Test that an unavailable database is not reported as a missing question or a 500."""
+        async def unavailable(*args, **kwargs):
+            raise DatabaseUnavailableError("circuit is open")
+        monkeypatch.setattr(database, "get_document", unavailable)
+
+        response = client.get("/api/v1/questions/q1")
+
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
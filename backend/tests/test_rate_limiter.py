@@ -2,6 +2,7 @@
 Unit tests for the tier-aware rate limiter middleware.
 """
 
+import json
 import pytest
 from unittest.mock import MagicMock, AsyncMock, patch
 from fastapi import Request
@@ -71,9 +72,13 @@ class TestRateLimitMiddleware:
     def test_get_user_tier_error_fallback(self, middleware):
         """Test user tier fallback on error."""
         # Mock request that raises error when accessing state
+        class BrokenState:
+            @property
+            def user_tier(self):
+                raise RuntimeError("state unavailable")
+
         mock_request = MagicMock(spec=Request)
-        mock_request.state = MagicMock()
-        mock_request.state.user_tier = MagicMock(side_effect=AttributeError)
+        mock_request.state = BrokenState()
 
         tier = middleware._get_user_tier(mock_request)
         assert tier == "free"  # DEFAULT_TIER
@@ -220,7 +225,7 @@ class TestRateLimitMiddleware:
         assert isinstance(response, JSONResponse)
         assert response.status_code == 429
 
-        response_data = response.body
+        response_data = json.loads(response.body)
         assert "detail" in response_data
         assert "tier" in response_data
         assert "reset_time" in response_data
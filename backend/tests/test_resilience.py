@@ -0,0 +1,279 @@
+"""
+Unit tests for deadlines, retries and the circuit breaker.
+"""
+
+import asyncio
+import threading
+import pytest
+from google.api_core import exceptions as gcp_exceptions
+from app.core.database import FirestoreClient
+from app.core.exceptions import DatabaseUnavailableError
+from app.core.memory_database import MemoryDatabase
+from app.core.resilience import BoundedExecutor, CircuitBreaker, call_with_resilience, deadline_scope, remaining_time
+from app.core.write_behind import WriteBehindBuffer
+from benchmarks.firestore_standin import FirestoreStandIn, StandInDocument
+
+TRANSIENT = (gcp_exceptions.ServiceUnavailable,)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    """Retry immediately."""
+    monkeypatch.setattr("app.core.resilience.backoff_delay", lambda attempt: 0)
+
+
+def flaky(failures, exception=gcp_exceptions.ServiceUnavailable):
+    """Coroutine factory failing ``failures`` times before returning "ok"."""
+    calls = {"count": 0}
+
+    async def call():
+        calls["count"] += 1
+        if calls["count"] <= failures:
+            raise exception("unavailable")
+        return "ok"
+    return call, calls
+
+
+class TestCircuitBreaker:
+    """Test cases for circuit breaker state changes."""
+
+    def test_opens_after_threshold(self):
+        """Test that consecutive failures open the circuit and reject calls."""
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+
+        assert breaker.state == "open"
+        with pytest.raises(DatabaseUnavailableError):
+            breaker.before_call()
+        assert breaker.stats()["rejected"] == 1
+
+    def test_half_open_probe(self):
+        """Test that one probe is let through after the reset timeout."""
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.001)
+        breaker.record_failure()
+        breaker._opened_at -= 1
+
+        breaker.before_call()
+        assert breaker.state == "half_open"
+        with pytest.raises(DatabaseUnavailableError):
+            breaker.before_call()
+
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+    def test_failed_probe_reopens(self):
+        """Test that a failed probe opens the circuit again."""
+        breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=0.001)
+        for _ in range(3):
+            breaker.record_failure()
+        breaker._opened_at -= 1
+        breaker.before_call()
+        breaker.record_failure()
+
+        assert breaker.state == "open"
+
+
+class TestCallWithResilience:
+    """Test cases for retries and deadlines."""
+
+    @pytest.mark.asyncio
+    async def test_retries_idempotent_call(self):
+        """Test that transient failures of an idempotent call are retried."""
+        call, calls = flaky(2)
+        result = await call_with_resilience(call, CircuitBreaker("test"), TRANSIENT, max_retries=3)
+
+        assert result == "ok"
+        assert calls["count"] == 3
+
+    @pytest.mark.asyncio
+    async def test_non_idempotent_call_not_retried(self):
+        """Test that a non-idempotent call fails on the first transient error."""
+        call, calls = flaky(1)
+        with pytest.raises(DatabaseUnavailableError):
+            await call_with_resilience(call, CircuitBreaker("test"), TRANSIENT, idempotent=False)
+
+        assert calls["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_other_errors_not_retried(self):
+        """Test that non-transient errors propagate unchanged and keep the circuit closed."""
+        breaker = CircuitBreaker("test", failure_threshold=1)
+        call, calls = flaky(1, gcp_exceptions.NotFound)
+        with pytest.raises(gcp_exceptions.NotFound):
+            await call_with_resilience(call, breaker, TRANSIENT)
+
+        assert calls["count"] == 1
+        assert breaker.state == "closed"
+
+    @pytest.mark.asyncio
+    async def test_deadline_bounds_slow_call(self):
+        """Test that a call outliving the request deadline is abandoned."""
+        async def slow():
+            await asyncio.sleep(1)
+
+        with deadline_scope(0.05):
+            with pytest.raises(DatabaseUnavailableError):
+                await call_with_resilience(slow, CircuitBreaker("test"), TRANSIENT, max_retries=0)
+
+    @pytest.mark.asyncio
+    async def test_expired_deadline_fails_fast(self):
+        """Test that no call is made once the deadline has passed."""
+        call, calls = flaky(0)
+        with deadline_scope(-1):
+            with pytest.raises(DatabaseUnavailableError):
+                await call_with_resilience(call, CircuitBreaker("test"), TRANSIENT)
+
+        assert calls["count"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_probe_is_not_a_success(self):
+        """Test that cancelling a half-open probe neither closes the circuit nor wedges it."""
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.001)
+        breaker.record_failure()
+        breaker._opened_at -= 1
+
+        task = asyncio.create_task(call_with_resilience(lambda: asyncio.sleep(1), breaker, TRANSIENT))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert breaker.state == "half_open"
+        breaker.before_call()  # the next probe is let through
+
+    def test_nested_deadline_only_shrinks(self):
+        """Test that an inner scope cannot extend the outer deadline."""
+        with deadline_scope(1):
+            with deadline_scope(60):
+                assert remaining_time() <= 1
+        assert remaining_time() is None
+
+
+class TestBoundedExecutor:
+    """Test cases for bounding outstanding blocking calls."""
+
+    @pytest.mark.asyncio
+    async def test_abandoned_calls_stay_counted(self):
+        """Test that timed-out calls hold their slot until the thread finishes."""
+        executor = BoundedExecutor("test", max_workers=1, max_queued=1)
+        release = threading.Event()
+        try:
+            for _ in range(2):
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(executor.run(release.wait), timeout=0.01)
+
+            # One thread still blocked; the queued call was cancelled
+            assert executor.in_flight == 1
+            blocked = asyncio.ensure_future(executor.run(release.wait))
+            await asyncio.sleep(0.01)
+            with pytest.raises(DatabaseUnavailableError):
+                await executor.run(lambda: "ok")
+            assert executor.stats()["rejected"] == 1
+
+            release.set()
+            await blocked
+            await asyncio.sleep(0.01)
+            assert await executor.run(lambda: "ok") == "ok"
+            assert executor.in_flight == 0
+        finally:
+            release.set()
+            executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_saturation_is_not_retried(self):
+        """Test that a saturated pool fails fast without touching the breaker."""
+        breaker = CircuitBreaker("test", failure_threshold=1)
+        calls = {"count": 0}
+
+        async def saturated():
+            calls["count"] += 1
+            raise DatabaseUnavailableError("saturated")
+
+        with pytest.raises(DatabaseUnavailableError):
+            await call_with_resilience(saturated, breaker, TRANSIENT, max_retries=3)
+
+        assert calls["count"] == 1
+        assert breaker.state == "closed"
+
+
+class TestFirestoreResilience:
+    """Test cases for the Firestore client's error handling."""
+
+    @pytest.fixture
+    def client(self):
+        """FirestoreClient bound to a stand-in, with a low breaker threshold."""
+        standin = FirestoreStandIn(latency_ms=0, per_write_ms=0)
+        standin.data["users"] = {"u1": {"count": 0}}
+        client = FirestoreClient(client=standin, max_workers=2, cache_enabled=False)
+        client.breaker = CircuitBreaker("firestore", failure_threshold=2, reset_timeout=60)
+        yield client
+        client.close()
+
+    @pytest.mark.asyncio
+    async def test_update_missing_document_returns_false(self, client):
+        """Test that only a missing document is reported as False."""
+        assert await client.update_document("users", "missing", {"count": 1}) is False
+
+    @pytest.mark.asyncio
+    async def test_update_outage_raises(self, client, monkeypatch):
+        """Test that an unavailable backend raises instead of returning False."""
+        def unavailable(document, data, **kwargs):
+            raise gcp_exceptions.ServiceUnavailable("down")
+        monkeypatch.setattr(StandInDocument, "update", unavailable)
+
+        with pytest.raises(DatabaseUnavailableError):
+            await client.update_document("users", "u1", {"name": "x"})
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_fails_fast(self, client, monkeypatch):
+        """Test that reads are rejected without an RPC while the circuit is open."""
+        calls = {"count": 0}
+
+        def unavailable(document, **kwargs):
+            calls["count"] += 1
+            raise gcp_exceptions.ServiceUnavailable("down")
+        monkeypatch.setattr(StandInDocument, "get", unavailable)
+
+        with pytest.raises(DatabaseUnavailableError):
+            await client.get_document("users", "u1")
+        made = calls["count"]
+        with pytest.raises(DatabaseUnavailableError):
+            await client.get_document("users", "u1")
+
+        assert client.breaker.state == "open"
+        assert calls["count"] == made
+
+
+class TestWriteBehindFailures:
+    """Test cases for how buffered writes react to failure reasons."""
+
+    @pytest.mark.asyncio
+    async def test_unavailable_updates_are_requeued(self):
+        """Test that updates are kept, not dropped or redirected, during an outage."""
+        database = MemoryDatabase()
+        database.load("users", {"u1": {"count": 0}})
+        buffer = WriteBehindBuffer(database, flush_interval=60)
+        buffer.start()
+        try:
+            await buffer.increment("users", "u1", {"count": 1}, fallback_collection="anonymous_users")
+
+            async def outage(operations, max_concurrency=None):
+                return {"success": False, "written": 0, "failed": len(operations), "results": [
+                    {"index": i, "success": False, "error": "down", "reason": "unavailable"}
+                    for i, _ in enumerate(operations)
+                ]}
+            real_bulk_write, database.bulk_write = database.bulk_write, outage
+            result = await buffer.flush()
+
+            assert result == {"written": 0, "failed": 0, "requeued": 1}
+            assert buffer.stats()["pending"] == 1
+
+            database.bulk_write = real_bulk_write
+            await buffer.flush()
+        finally:
+            await buffer.stop()
+
+        assert (await database.get_document("users", "u1"))["count"] == 1
+        assert await database.get_document("anonymous_users", "u1") is None
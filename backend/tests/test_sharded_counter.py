@@ -0,0 +1,95 @@
+"""
+Unit tests for sharded counters.
+"""
+
+import asyncio
+import pytest
+from app.core.memory_database import MemoryDatabase
+from app.core.sharded_counter import ShardedCounter
+from app.core.write_behind import WriteBehindBuffer
+
+COUNTERS = ["total_attempts", "correct_attempts", "timed_attempts", "total_time"]
+
+
+@pytest.fixture
+def database():
+    """Memory database with one question that already has stats."""
+    database = MemoryDatabase()
+    database.load("questions", {
+        "q1": {"exam_type": "ECAT", "performance_stats": {"total_attempts": 10, "correct_attempts": 4}},
+        "q2": {"exam_type": "ECAT"}
+    })
+    return database
+
+
+@pytest.fixture
+def counter(database):
+    """Four-shard counter writing through an unstarted buffer."""
+    return ShardedCounter(
+        "questions", "performance_stats", COUNTERS,
+        shard_collection="question_stat_shards", num_shards=4,
+        database=database, buffer=WriteBehindBuffer(database)
+    )
+
+
+def attempt(is_correct, time_taken):
+    return {"total_attempts": 1, "correct_attempts": int(is_correct), "timed_attempts": 1, "total_time": time_taken}
+
+
+class TestShardedCounter:
+    """Test cases for incrementing, reading and rolling up shards."""
+
+    @pytest.mark.asyncio
+    async def test_increments_spread_over_shards(self, counter, database):
+        """Test that increments land on shards, not on the parent document."""
+        await asyncio.gather(*(counter.increment("q2", attempt(True, 2.0)) for _ in range(40)))
+
+        shards = await database.query_collection("question_stat_shards")
+        assert len(shards) == 4
+        assert sum(1 for shard in shards if shard["counts"]) > 1
+        assert "performance_stats" not in await database.get_document("questions", "q2")
+
+    @pytest.mark.asyncio
+    async def test_totals_include_pre_shard_stats(self, counter):
+        """Test that the first shard is seeded with the parent's existing counters."""
+        await counter.increment("q1", attempt(True, 3.0))
+        await counter.increment("q1", attempt(False, 5.0))
+
+        totals = await counter.totals(["q1", "q2"])
+
+        assert totals == {"q1": {"total_attempts": 12, "correct_attempts": 5, "timed_attempts": 2, "total_time": 8.0}}
+
+    @pytest.mark.asyncio
+    async def test_roll_up_writes_totals_to_parent(self, counter, database):
+        """Test that a roll-up stores absolute totals and can be repeated."""
+        for _ in range(3):
+            await counter.increment("q2", attempt(True, 1.5))
+
+        assert await counter.roll_up() == 1
+        assert await counter.roll_up(["q2"]) == 1
+        assert await counter.roll_up() == 0
+
+        question = await database.get_document("questions", "q2")
+        assert question["performance_stats"] == {"total_attempts": 3, "correct_attempts": 3, "timed_attempts": 3, "total_time": 4.5}
+        # Stats are stamped separately so the index poll does not treat them as edits
+        assert "stats_updated_at" in question and "updated_at" not in question
+
+    @pytest.mark.asyncio
+    async def test_with_totals_refreshes_documents(self, counter, database):
+        """Test that read-path documents get live totals without a roll-up."""
+        await counter.increment("q1", attempt(True, 1.0))
+        question = await database.get_document("questions", "q1")
+
+        await counter.with_totals([question])
+
+        assert question["performance_stats"]["total_attempts"] == 11
+        assert (await database.get_document("questions", "q1"))["performance_stats"]["total_attempts"] == 10
+
+    @pytest.mark.asyncio
+    async def test_deleted_parent_is_not_retried(self, counter, database):
+        """Test that a roll-up drops parents that no longer exist."""
+        await counter.increment("q2", attempt(False, 1.0))
+        await database.delete_document("questions", "q2")
+
+        assert await counter.roll_up() == 0
+        assert counter._dirty == set()
@@ -0,0 +1,161 @@
+"""
+Unit tests for the SQLite database backend.
+"""
+
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from app.core.exceptions import ValidationError
+from app.core.sqlite_database import SQLiteDatabase
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """SQLite backend on a temporary file, without the read cache."""
+    database = SQLiteDatabase(path=str(tmp_path / "test.db"), max_workers=4, cache_enabled=False)
+    yield database
+    database.close()
+
+
+async def seed_questions(database):
+    """Ten questions across two exams with increasing creation times."""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    await database.bulk_write([
+        {
+            "type": "create",
+            "collection": "questions",
+            "document_id": f"q{i}",
+            "data": {
+                "exam_type": "ECAT" if i % 2 else "MCAT",
+                "difficulty": ["easy", "medium", "hard"][i % 3],
+                "is_active": i != 4,
+                "score": i,
+                "tags": ["algebra"] if i < 5 else ["biology"],
+                "created_at": start + timedelta(days=i)
+            }
+        }
+        for i in range(10)
+    ])
+
+
+class TestSQLiteDocuments:
+    """Test cases for document reads and writes."""
+
+    @pytest.mark.asyncio
+    async def test_round_trip_preserves_types(self, sqlite_db):
+        """Test that nested values, booleans and datetimes survive storage."""
+        created_at = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+        document_id = await sqlite_db.create_document("users", {
+            "is_active": True, "profile": {"tier": "free"}, "created_at": created_at
+        })
+
+        document = await sqlite_db.get_document("users", document_id)
+
+        assert document == {
+            "id": document_id, "is_active": True, "profile": {"tier": "free"}, "created_at": created_at
+        }
+
+    @pytest.mark.asyncio
+    async def test_concurrent_increments(self, sqlite_db):
+        """Test that concurrent increments are applied atomically."""
+        await sqlite_db.create_document("questions", {"stats": {"total": 0}}, document_id="q1")
+        await asyncio.gather(*(sqlite_db.increment("questions", "q1", {"stats.total": 1}) for _ in range(25)))
+
+        assert (await sqlite_db.get_document("questions", "q1"))["stats"]["total"] == 25
+
+    @pytest.mark.asyncio
+    async def test_update_missing_document_fails(self, sqlite_db):
+        """Test that updating a missing document reports failure."""
+        assert await sqlite_db.update_document("users", "missing", {"a": 1}) is False
+
+    @pytest.mark.asyncio
+    async def test_get_documents(self, sqlite_db):
+        """Test multi-get with a missing ID."""
+        await seed_questions(sqlite_db)
+
+        documents = await sqlite_db.get_documents("questions", ["q1", "nope"], fields=["score"])
+
+        assert documents == {"q1": {"score": 1, "id": "q1"}, "nope": None}
+
+    @pytest.mark.asyncio
+    async def test_bulk_write_isolates_failures(self, sqlite_db):
+        """Test that one failing operation does not roll back the others."""
+        result = await sqlite_db.bulk_write([
+            {"type": "create", "collection": "users", "document_id": "u1", "data": {"n": 1}},
+            {"type": "update", "collection": "users", "document_id": "ghost", "data": {"n": 1}},
+            {"type": "update", "collection": "users", "document_id": "u1", "data": {"n": 2}},
+        ])
+
+        assert [r["success"] for r in result["results"]] == [True, False, True]
+        assert (await sqlite_db.get_document("users", "u1"))["n"] == 2
+
+
+class TestSQLiteQueries:
+    """Test cases for filtering, ordering, paging and aggregation."""
+
+    @pytest.mark.asyncio
+    async def test_filters_on_generated_and_json_fields(self, sqlite_db):
+        """Test equality on an indexed column combined with JSON field filters."""
+        await seed_questions(sqlite_db)
+
+        results = await sqlite_db.query_collection("questions", filters=[
+            {"field": "exam_type", "operator": "==", "value": "MCAT"},
+            {"field": "is_active", "operator": "==", "value": True},
+            {"field": "created_at", "operator": ">=", "value": datetime(2024, 1, 3)}
+        ], order_by="-created_at")
+
+        assert [q["id"] for q in results] == ["q8", "q6", "q2"]
+
+    @pytest.mark.asyncio
+    async def test_in_and_array_contains(self, sqlite_db):
+        """Test in and array-contains filters."""
+        await seed_questions(sqlite_db)
+
+        results = await sqlite_db.query_collection("questions", filters=[
+            {"field": "difficulty", "operator": "in", "value": ["easy", "hard"]},
+            {"field": "tags", "operator": "array-contains", "value": "algebra"}
+        ])
+
+        assert [q["id"] for q in results] == ["q0", "q2", "q3"]
+
+    @pytest.mark.asyncio
+    async def test_limit_offset_projection(self, sqlite_db):
+        """Test ordering with limit, offset and projection."""
+        await seed_questions(sqlite_db)
+
+        results = await sqlite_db.query_collection("questions", order_by="score", limit=2, offset=3, fields=["score"])
+
+        assert results == [{"score": 3, "id": "q3"}, {"score": 4, "id": "q4"}]
+
+    @pytest.mark.asyncio
+    async def test_query_page_and_iter(self, sqlite_db):
+        """Test that paging and streaming visit every match once, in order."""
+        await seed_questions(sqlite_db)
+
+        paged, token = [], None
+        while True:
+            page = await sqlite_db.query_page("questions", order_by="-created_at", page_size=3, page_token=token)
+            paged.extend(q["id"] for q in page["items"])
+            token = page["next_page_token"]
+            if not token:
+                break
+        streamed = [q["id"] async for q in sqlite_db.query_iter("questions", order_by="-created_at", batch_size=4)]
+
+        assert paged == streamed == [f"q{i}" for i in range(9, -1, -1)]
+
+    @pytest.mark.asyncio
+    async def test_aggregations(self, sqlite_db):
+        """Test count, sum and avg in one statement."""
+        await seed_questions(sqlite_db)
+
+        result = await sqlite_db.aggregate("questions", [
+            {"type": "count"}, {"type": "sum", "field": "score"}, {"type": "avg", "field": "score"}
+        ], filters=[{"field": "exam_type", "operator": "==", "value": "ECAT"}])
+
+        assert result == {"count": 5, "sum_score": 25, "avg_score": 5}
+
+    @pytest.mark.asyncio
+    async def test_unknown_operator(self, sqlite_db):
+        """Test that unsupported operators are rejected."""
+        with pytest.raises(ValidationError):
+            await sqlite_db.query_collection("questions", filters=[{"field": "score", "operator": "~", "value": 1}])
@@ -0,0 +1,124 @@
+"""
+Unit tests for the write-behind update buffer.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.core.db_utils import Increment
+from app.core.memory_database import MemoryDatabase
+from app.core.write_behind import WriteBehindBuffer, merge_update
+
+
+class TestMergeUpdate:
+    """Test cases for folding successive updates into one."""
+
+    def test_increments_add_up(self):
+        """Test that repeated increments become a single increment."""
+        pending = {}
+        merge_update(pending, {"stats.total": Increment(1)})
+        merge_update(pending, {"stats.total": Increment(2)})
+
+        assert pending == {"stats.total": Increment(3)}
+
+    def test_increment_after_plain_value(self):
+        """Test that an increment on a pending plain value is applied to it."""
+        pending = {"usage": 10}
+        merge_update(pending, {"usage": Increment(5)})
+
+        assert pending == {"usage": 15}
+
+    def test_later_value_wins(self):
+        """Test that a plain value replaces a pending increment."""
+        pending = {"usage": Increment(5)}
+        merge_update(pending, {"usage": 0})
+
+        assert pending == {"usage": 0}
+
+    def test_parent_replaces_children(self):
+        """Test that writing a whole field drops pending writes beneath it."""
+        pending = {"stats.total": Increment(1), "stats.correct": Increment(1)}
+        merge_update(pending, {"stats": {"total": 0}})
+
+        assert pending == {"stats": {"total": 0}}
+
+    def test_child_merges_into_pending_parent(self):
+        """Test that a subfield update lands inside a pending whole-field write."""
+        pending = {"stats": {"total": 1}}
+        merge_update(pending, {"stats.total": Increment(2), "stats.correct": 1})
+
+        assert pending == {"stats": {"total": 3, "correct": 1}}
+
+
+class TestWriteBehindBuffer:
+    """Test cases for buffering, flushing and fallbacks."""
+
+    @pytest.fixture
+    def database(self):
+        """Memory database with one registered and one anonymous user."""
+        database = MemoryDatabase()
+        database.load("users", {"u1": {"usage_stats": {"practice_mcqs_today": 0}}})
+        database.load("anonymous_users", {"a1": {"usage_stats": {"practice_mcqs_today": 0}}})
+        return database
+
+    @pytest.mark.asyncio
+    async def test_writes_through_when_not_running(self, database):
+        """Test that updates are applied immediately without the flusher."""
+        buffer = WriteBehindBuffer(database)
+        assert await buffer.increment("users", "u1", {"usage_stats.practice_mcqs_today": 1})
+
+        assert (await database.get_document("users", "u1"))["usage_stats"]["practice_mcqs_today"] == 1
+
+    @pytest.mark.asyncio
+    async def test_coalesces_updates_into_one_write(self, database):
+        """Test that many updates to one document flush as one write."""
+        buffer = WriteBehindBuffer(database, flush_interval=60)
+        buffer.start()
+        try:
+            with patch.object(database, "bulk_write", wraps=database.bulk_write) as bulk_write:
+                for _ in range(20):
+                    await buffer.increment("users", "u1", {"usage_stats.practice_mcqs_today": 1})
+                assert (await database.get_document("users", "u1"))["usage_stats"]["practice_mcqs_today"] == 0
+
+                result = await buffer.flush()
+        finally:
+            await buffer.stop()
+
+        assert result == {"written": 1, "failed": 0, "requeued": 0}
+        assert len(bulk_write.call_args.args[0]) == 1
+        assert (await database.get_document("users", "u1"))["usage_stats"]["practice_mcqs_today"] == 20
+
+    @pytest.mark.asyncio
+    async def test_fallback_collection(self, database):
+        """Test that updates for a missing document retry in the fallback collection."""
+        buffer = WriteBehindBuffer(database, flush_interval=60)
+        buffer.start()
+        await buffer.increment("users", "a1", {"usage_stats.practice_mcqs_today": 3}, fallback_collection="anonymous_users")
+        await buffer.stop()
+
+        assert (await database.get_document("anonymous_users", "a1"))["usage_stats"]["practice_mcqs_today"] == 3
+        assert buffer.stats()["failed"] == 0
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_pending_updates(self, database):
+        """Test that stopping the buffer drains what is still queued."""
+        buffer = WriteBehindBuffer(database, flush_interval=60)
+        buffer.start()
+        await buffer.update("users", "u1", {"last_active": "now"})
+        await buffer.stop()
+
+        assert (await database.get_document("users", "u1"))["last_active"] == "now"
+        assert buffer.stats()["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_requeued(self, database):
+        """Test that a flush that errors out keeps the updates for next time."""
+        buffer = WriteBehindBuffer(database, flush_interval=60)
+        buffer.start()
+        await buffer.increment("users", "u1", {"usage_stats.practice_mcqs_today": 1})
+        with patch.object(database, "bulk_write", AsyncMock(side_effect=RuntimeError("down"))):
+            with pytest.raises(RuntimeError):
+                await buffer.flush()
+        await buffer.increment("users", "u1", {"usage_stats.practice_mcqs_today": 1})
+        await buffer.stop()
+
+        assert (await database.get_document("users", "u1"))["usage_stats"]["practice_mcqs_today"] == 2
@@ -0,0 +1 @@
+# Maintenance tools for the backend
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Assign a random_key to every question that lacks one.
+
+Exam papers drawn without the in-memory question index probe questions by
+``random_key``; questions created before the field existed are never drawn
+until this has run once against the configured ``DATABASE_BACKEND``.
+
+With ``--redraw`` every question gets a fresh key. Probes favour questions
+next to large gaps between keys; re-keying now and then (e.g. nightly) moves
+that bias to other questions instead of the draws themselves writing keys.
+
+Usage:
+    python -m tools.backfill_random_keys [--redraw]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.question_service import question_service  # noqa: E402
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--redraw", action="store_true", help="give every question a new key")
+    args = parser.parse_args()
+
+    updated = asyncio.run(question_service.assign_missing_random_keys(redraw=args.redraw))
+    print(f"Assigned random keys to {updated} questions")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Generate firestore.indexes.json from recorded query shapes.
+
+Reads one or more query-shape files (written on shutdown when
+``QUERY_SHAPES_PATH`` is set, or saved from ``GET /api/v1/metrics/query-shapes``),
+writes the composite index manifest and prints a warning for every shape that
+would scan, need an excessive number of indexes or be rejected by Firestore.
+
+Usage:
+    python -m tools.index_manifest shapes.json [more.json ...] [--output ../firestore.indexes.json] [--threshold 4] [--strict]
+
+With ``--strict`` the exit status is 1 if there are any warnings, so the
+check can gate a deployment.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.query_shapes import EXPLOSION_THRESHOLD, QueryShapeRegistry, build_manifest  # noqa: E402
+
+
+def run(paths, output: str, threshold: int, strict: bool) -> int:
+    registry = QueryShapeRegistry()
+    for path in paths:
+        registry.load(path)
+    shapes = registry.shapes()
+    result = build_manifest(shapes, threshold=threshold)
+
+    with open(output, "w") as f:
+        json.dump(result["manifest"], f, indent=2)
+        f.write("\n")
+    print(f"{len(shapes)} query shapes -> {len(result['manifest']['indexes'])} composite indexes in {output}")
+
+    for warning in result["warnings"]:
+        print(f"{warning['level'].upper()}: {warning['shape']}\n    {warning['message']}", file=sys.stderr)
+    return 1 if strict and result["warnings"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("paths", nargs="+", help="query-shape JSON files")
+    parser.add_argument("--output", default="firestore.indexes.json")
+    parser.add_argument("--threshold", type=int, default=EXPLOSION_THRESHOLD,
+                        help="equality-filter combinations before index merging is used")
+    parser.add_argument("--strict", action="store_true", help="exit with status 1 on any warning")
+    args = parser.parse_args()
+    sys.exit(run(args.paths, args.output, args.threshold, args.strict))